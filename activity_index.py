@@ -0,0 +1,186 @@
+"""
+Índice em memória das atividades para o explorador (busca, filtros e paginação).
+
+A tabela de atividades recentes ordenava o histórico enriquecido inteiro para
+mostrar 10 linhas, e não havia como navegar pelas mais antigas. O índice é
+montado uma vez por versão dos dados (data_context) e as consultas só
+devolvem as posições de uma página:
+- Colunas em arrays numpy (início, dia, modalidade, distância, duração, TSS)
+  para filtros por intervalo vetorizados
+- Ordem pré-calculada por coluna (argsort estável): ordenar é indexar
+- Índice invertido dos tokens de 'activityName' (minúsculas, sem acento),
+  com busca por prefixo sobre a lista ordenada de tokens; vários termos
+  combinam com E
+"""
+import bisect
+import re
+import unicodedata
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from calculations import CATEGORY_CODES, _activity_category, _safe_float
+
+# Colunas ordenáveis do explorador
+ACTIVITY_SORT_COLUMNS = ('start', 'name', 'category', 'distance', 'duration', 'tss')
+
+ACTIVITY_PAGE_SIZE = 20
+
+_TOKEN_RE = re.compile(r"[0-9a-z]+")
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _normalize(text: str) -> str:
+    """Minúsculas e sem acentos ('Natação' -> 'natacao')"""
+    decomposed = unicodedata.normalize('NFKD', str(text or ''))
+    return ''.join(c for c in decomposed if not unicodedata.combining(c)).lower()
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(_normalize(text))
+
+
+def _parse_start_time(value) -> datetime:
+    """"YYYY-MM-DD HH:MM:SS" ou ISO (com ou sem Z/offset), como calculations._activity_day"""
+    text = str(value).strip()
+    if 'T' not in text:
+        text = text.replace(' ', 'T', 1)
+    if text.endswith('Z'):
+        text = text[:-1] + '+00:00'
+    return datetime.fromisoformat(text).replace(tzinfo=None)
+
+
+def activity_datetime(activity: dict) -> datetime:
+    """Início da atividade (local, GMT ou epoch); 1970-01-01 se ausente ou inválido"""
+    for field in ('startTimeLocal', 'startTime', 'startTimeGMT', 'startTimeUtc'):
+        if activity.get(field):
+            try:
+                return _parse_start_time(activity[field])
+            except (TypeError, ValueError):
+                pass
+    seconds = activity.get('startTimeInSeconds') or activity.get('startTimeInSecondsGMT')
+    if seconds:
+        try:
+            return datetime.utcfromtimestamp(float(seconds))
+        except (TypeError, ValueError, OverflowError, OSError):
+            pass
+    return _EPOCH
+
+
+def build_activity_index(workouts_with_tss: List[dict]) -> dict:
+    """
+    Monta colunas, ordens e índice invertido das atividades (posições da lista).
+
+    Returns:
+        {'size', 'columns': {coluna: np.ndarray},
+         'order'/'order_desc': {coluna: posições em ordem crescente/decrescente},
+         'tokens': [token ordenado], 'postings': {token: np.ndarray de posições}}
+    """
+    starts = [activity_datetime(w) for w in workouts_with_tss]
+    names = [str(w.get('activityName') or '') for w in workouts_with_tss]
+    columns = {
+        'start': np.array([(s - _EPOCH).total_seconds() for s in starts], dtype=float),
+        'day': np.array([s.date().toordinal() for s in starts], dtype=np.int64),
+        'category': np.array([CATEGORY_CODES.get(_activity_category(w), CATEGORY_CODES['other'])
+                              for w in workouts_with_tss], dtype=np.int8),
+        'distance': np.array([_safe_float(w.get('distance')) / 1000 for w in workouts_with_tss], dtype=float),
+        'duration': np.array([_safe_float(w.get('duration')) / 3600 for w in workouts_with_tss], dtype=float),
+        'tss': np.array([_safe_float(w.get('tss')) for w in workouts_with_tss], dtype=float),
+    }
+    sort_keys = dict(columns, name=np.array([_normalize(n) for n in names], dtype=object))
+    order = {column: np.argsort(sort_keys[column], kind='stable') for column in ACTIVITY_SORT_COLUMNS}
+    # Decrescente estável (empates na ordem da lista, como sorted(reverse=True))
+    reversed_positions = np.arange(len(workouts_with_tss))[::-1]
+    order_desc = {
+        column: reversed_positions[np.argsort(sort_keys[column][reversed_positions], kind='stable')][::-1]
+        for column in ACTIVITY_SORT_COLUMNS
+    }
+
+    postings: Dict[str, set] = {}
+    for position, name in enumerate(names):
+        for token in tokenize(name):
+            postings.setdefault(token, set()).add(position)
+
+    return {
+        'size': len(workouts_with_tss),
+        'columns': columns,
+        'order': order,
+        'order_desc': order_desc,
+        'tokens': sorted(postings),
+        'postings': {token: np.array(sorted(p), dtype=np.int64) for token, p in postings.items()},
+    }
+
+
+def _prefix_matches(index: dict, prefix: str) -> np.ndarray:
+    """Posições com algum token começando por `prefix`"""
+    tokens = index['tokens']
+    first = bisect.bisect_left(tokens, prefix)
+    last = bisect.bisect_left(tokens, prefix + '\uffff')
+    if first == last:
+        return np.empty(0, dtype=np.int64)
+    return np.unique(np.concatenate([index['postings'][t] for t in tokens[first:last]]))
+
+
+def _range_mask(values: np.ndarray, low: Optional[float], high: Optional[float]) -> np.ndarray:
+    mask = np.ones(len(values), dtype=bool)
+    if low is not None:
+        mask &= values >= low
+    if high is not None:
+        mask &= values <= high
+    return mask
+
+
+def query_activities(index: dict, search: str = '', categories: Optional[Iterable[str]] = None,
+                     start_date: Optional[date] = None, end_date: Optional[date] = None,
+                     distance_range: tuple = (None, None), duration_range: tuple = (None, None),
+                     sort_by: str = 'start', descending: bool = True,
+                     page: int = 1, page_size: int = ACTIVITY_PAGE_SIZE) -> dict:
+    """
+    Filtra, ordena e pagina as atividades do índice.
+
+    Args:
+        search: Termos do nome (prefixo de token; todos precisam casar)
+        categories: Modalidades aceitas (todas se vazio/None)
+        start_date, end_date: Intervalo de dias (inclusivo)
+        distance_range: (mín, máx) em km; None = sem limite
+        duration_range: (mín, máx) em horas; None = sem limite
+        sort_by: Uma de ACTIVITY_SORT_COLUMNS
+        page: Página (1 = primeira)
+
+    Returns:
+        {'positions': posições da página na lista de atividades, 'total', 'page', 'pages'}
+    """
+    columns = index['columns']
+    mask = np.ones(index['size'], dtype=bool)
+
+    for term in tokenize(search):
+        term_mask = np.zeros(index['size'], dtype=bool)
+        term_mask[_prefix_matches(index, term)] = True
+        mask &= term_mask
+    if categories:
+        codes = [CATEGORY_CODES[c] for c in categories if c in CATEGORY_CODES]
+        mask &= np.isin(columns['category'], codes)
+    mask &= _range_mask(
+        columns['day'],
+        start_date.toordinal() if start_date else None,
+        end_date.toordinal() if end_date else None,
+    )
+    mask &= _range_mask(columns['distance'], *distance_range)
+    mask &= _range_mask(columns['duration'], *duration_range)
+
+    orders = index['order_desc'] if descending else index['order']
+    order = orders.get(sort_by, orders['start'])
+    matched = order[mask[order]]
+
+    total = len(matched)
+    pages = max(1, -(-total // page_size))
+    page = min(max(1, int(page or 1)), pages)
+    offset = (page - 1) * page_size
+    return {
+        'positions': matched[offset:offset + page_size].tolist(),
+        'total': total,
+        'page': page,
+        'pages': pages,
+    }
@@ -1,53 +1,60 @@
 import dash
-from dash import html, dcc, Input, Output, State
+from dash import html, dcc, Input, Output, State, MATCH, Patch, ClientsideFunction
+from dash.exceptions import PreventUpdate
 import dash_bootstrap_components as dbc
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import numpy as np
 from datetime import datetime, timedelta
 import calendar
+import functools
+import json
 
 from utils import format_hours_decimal
 from ai_chat import FitnessAI
+from chat_store import append_messages, load_page, new_session_id
 from details_page import render_details
-from wellness_page import render_wellness
-from calculations import compute_tss_variants, calculate_fitness_metrics, _activity_category
-from cache_manager import get_cached, set_cached, invalidate_type
+from wellness_page import render_wellness, render_health_charts, wellness_zoom_traces
+from downsampling import downsample_xy, lttb_graph, target_points, visible_range
+from figure_traces import bar, scatter
+from calculations import (
+    tss_config_fingerprint, calibrate_tss_factors, tss_calibration_factors,
+    threshold_history_or_default, update_threshold_history, _activity_category
+)
+from cache_manager import get_cached, set_cached, invalidate_type, invalidate_tss_memo
+from tss_enrichment import enrich_workouts_with_tss
+from data_context import activities_between, get_data_context, invalidate_data_context
+from figure_cache import figure_cached
+from calendar_index import load_calendar_month
+from activity_index import activity_datetime, query_activities
+from client_series import client_series_payload
+from rollups import (
+    empty_totals, latest_day, period_by_category, period_totals, range_by_category, daily_field, sum_totals
+)
+from fitness_series import (
+    LOAD_BREAKDOWNS, breakdown_to_metrics, current_breakdown,
+    refresh_fitness_metrics, series_to_metrics
+)
 from garmin_enhanced import GarminEnhanced
+from ingest_api import register_ingest_routes
+from performance_model import PERFORMANCE_MARKERS, performance_curve, refresh_performance_model, weekly_best
+from load_indices import (
+    ACWR_DANGER, ACWR_SWEET_SPOT, MONOTONY_HIGH, RAMP_HIGH, indices_range, latest_indices
+)
+from load_forecast import FORECAST_PERCENTILES, forecast_from_series, learn_day_ratios, simulate_load_forecast
+from training_planner import planned_tss_schedule
+import health_store
 from storage import (
     METRICS_FILE, WORKOUTS_FILE, load_config, save_config,
     load_credentials, save_credentials,
     validate_garmin_tokens_locally, save_garmin_tokens,
-    load_metrics, save_metrics,
+    load_metrics,
     load_workouts, save_workouts,
-    load_sync_state, save_sync_state
+    load_sync_state, save_sync_state,
+    load_threshold_history, save_threshold_history,
+    load_performance_markers, DATA_WRITE_LOCK
 )
 
-# Função para enriquecer workouts com TSS calculado dinamicamente
-def enrich_workouts_with_tss(workouts, config=None):
-    """Calcula TSS dinamicamente para cada workout (não salva)"""
-    if config is None:
-        config = load_config()
-    
-    enriched = []
-    for w in workouts:
-        w_copy = dict(w)
-        
-        # Remover TSS antigo se existir
-        if 'tss' in w_copy:
-            del w_copy['tss']
-        
-        # Calcular TSS novo
-        tss_result = compute_tss_variants(w_copy, config)
-        new_tss = tss_result.get('tss', 0.0)
-        w_copy['tss'] = new_tss
-        w_copy['tss_type'] = tss_result.get('tss_type', 'unknown')
-        w_copy['category'] = tss_result.get('category', _activity_category(w))
-        
-        enriched.append(w_copy)
-
-    return enriched
-
 # Função auxiliar para converter horas decimais em hh:mm:ss
 def format_hours_to_hms(hours):
     """Converte horas decimais para formato hh:mm:ss"""
@@ -67,6 +74,8 @@ app = dash.Dash(
 app.title = "Fitness Metrics Dashboard"
 # Expor WSGI server para provedores como Render/Gunicorn
 server = app.server
+# Endpoint de ingestão push (atividades/saúde) sem sincronização completa
+register_ingest_routes(server)
 
 
 _MONTHS_PT_BR = [
@@ -142,6 +151,40 @@ app.index_string = '''
             });
         });
         
+        // Seções do dashboard sob demanda: marca o Store da seção como visível
+        // quando o placeholder se aproxima da viewport (render_lazy_section)
+        (function() {
+            function markVisible(el) {
+                el.dataset.lazySeen = '1';
+                const storeId = JSON.parse(el.dataset.lazyStore);
+                if (window.dash_clientside && window.dash_clientside.set_props) {
+                    window.dash_clientside.set_props(storeId, {data: true});
+                }
+            }
+            const observer = ('IntersectionObserver' in window) ? new IntersectionObserver(function(entries) {
+                entries.forEach(function(entry) {
+                    if (entry.isIntersecting) {
+                        observer.unobserve(entry.target);
+                        markVisible(entry.target);
+                    }
+                });
+            }, {rootMargin: '200px 0px'}) : null;
+            function scan() {
+                document.querySelectorAll('.lazy-section[data-lazy-store]:not([data-lazy-seen]):not([data-lazy-watched])').forEach(function(el) {
+                    if (observer) {
+                        el.dataset.lazyWatched = '1';
+                        observer.observe(el);
+                    } else {
+                        markVisible(el);
+                    }
+                });
+            }
+            window.addEventListener('DOMContentLoaded', function() {
+                new MutationObserver(scan).observe(document.body, {childList: true, subtree: true});
+                scan();
+            });
+        })();
+        
         // Salvar preferência quando modo escuro mudar
         window.saveDarkModePreference = function(isDark) {
             localStorage.setItem('darkMode', isDark);
@@ -247,6 +290,7 @@ app.layout = html.Div(id='app-container', children=[
     dbc.Tabs([
         dbc.Tab(label="📊 Dashboard", tab_id="dashboard"),
         dbc.Tab(label="📅 Calendário", tab_id="calendar"),
+        dbc.Tab(label="🔎 Atividades", tab_id="activities"),
         dbc.Tab(label="🎯 Metas", tab_id="goals"),
         dbc.Tab(label="❤️ Saúde & Wellness", tab_id="wellness"),
         dbc.Tab(label="🤖 AI Chat", tab_id="ai_chat"),
@@ -269,6 +313,8 @@ def render_tab_content(active_tab):
         return render_dashboard()
     elif active_tab == "calendar":
         return render_calendar()
+    elif active_tab == "activities":
+        return render_activities()
     elif active_tab == "goals":
         return render_goals()
     elif active_tab == "wellness":
@@ -276,18 +322,111 @@ def render_tab_content(active_tab):
     elif active_tab == "ai_chat":
         return render_ai_chat()
     elif active_tab == "details":
+        context = get_data_context()
         return render_details(
-            metrics=load_metrics() or [],
-            workouts=enrich_workouts_with_tss(load_workouts()) or [],
-            config=load_config() or {},
+            metrics=context['metrics'] or [],
+            workouts=context['workouts'] or [],
+            config=context['config'] or {},
             calculate_personal_records=calculate_personal_records,
             calculate_achievements=calculate_achievements,
-            create_monthly_trend_chart=create_monthly_trend_chart,
+            create_monthly_trend_chart=functools.partial(create_monthly_trend_chart, data_version=context['version']),
         )
     elif active_tab == "config":
         return render_config()
     return html.P("Selecione uma aba.")
 
+# Callback das seções do dashboard carregadas sob demanda (uma requisição por seção)
+@app.callback(
+    Output({'type': 'lazy-section', 'section': MATCH}, 'children'),
+    Input({'type': 'lazy-visible', 'section': MATCH}, 'data'),
+    State({'type': 'lazy-visible', 'section': MATCH}, 'id'),
+)
+def render_lazy_section(visible, store_id):
+    # Seções abaixo da dobra esperam o IntersectionObserver marcar como visíveis
+    if not visible:
+        raise PreventUpdate
+    builder = DASHBOARD_SECTIONS.get(store_id['section'])
+    if builder is None:
+        raise PreventUpdate
+    try:
+        return builder(get_data_context())
+    except Exception as e:
+        return html.Div(f"❌ Erro ao carregar seção: {str(e)}", className="alert alert-danger")
+
+# Callback do seletor de intervalo da aba Saúde & Wellness (lê do health_store)
+@app.callback(
+    Output("wellness-charts", "children"),
+    Input("wellness-range", "value"),
+    prevent_initial_call=True
+)
+def update_wellness_range(days):
+    return render_health_charts(days or 90)
+
+# Gráficos reamostrados por LTTB ao dar zoom: gráfico -> fonte(início, fim, pontos)
+# com os traces (x, y) na ordem da figura
+LTTB_CHART_SOURCES = {
+    'fitness_history': lambda start, end, n_points: fitness_history_traces(
+        get_data_context()['series'], start, end, n_points
+    ),
+    'hrv': lambda start, end, n_points: wellness_zoom_traces('hrv', start, end, n_points),
+    'rhr': lambda start, end, n_points: wellness_zoom_traces('rhr', start, end, n_points),
+    'stress': lambda start, end, n_points: wellness_zoom_traces('stress', start, end, n_points),
+}
+
+# Explorador de carga: recorte e figura no navegador (assets/client_series.js)
+app.clientside_callback(
+    ClientsideFunction(namespace='client_series', function_name='figure'),
+    Output("client-series-chart", "figure"),
+    Input("client-series-store", "data"),
+    Input("client-series-period", "value"),
+    Input("client-series-metrics", "value")
+)
+
+# Zoom/reset no navegador: intervalo visível + largura do gráfico no store (sem servidor)
+app.clientside_callback(
+    """
+    function(relayoutData, view) {
+        var noUpdate = window.dash_clientside.no_update;
+        if (!relayoutData || !view) { return noUpdate; }
+        var range = null;
+        if (relayoutData['xaxis.range[0]'] !== undefined) {
+            range = [relayoutData['xaxis.range[0]'], relayoutData['xaxis.range[1]']];
+        } else if (relayoutData['xaxis.range']) {
+            range = relayoutData['xaxis.range'];
+        } else if (!relayoutData['xaxis.autorange']) {
+            return noUpdate;
+        }
+        var propId = window.dash_clientside.callback_context.triggered[0].prop_id;
+        var graph = document.getElementById(propId.slice(0, propId.lastIndexOf('.')));
+        var width = graph ? graph.offsetWidth : view.width;
+        if (JSON.stringify(range) === JSON.stringify(view.range) && width === view.width) { return noUpdate; }
+        return Object.assign({}, view, {range: range, width: width});
+    }
+    """,
+    Output({'type': 'lttb-view', 'chart': MATCH}, 'data'),
+    Input({'type': 'lttb-graph', 'chart': MATCH}, 'relayoutData'),
+    State({'type': 'lttb-view', 'chart': MATCH}, 'data'),
+    prevent_initial_call=True
+)
+
+@app.callback(
+    Output({'type': 'lttb-graph', 'chart': MATCH}, 'figure'),
+    Input({'type': 'lttb-view', 'chart': MATCH}, 'data'),
+    State({'type': 'lttb-graph', 'chart': MATCH}, 'id'),
+    prevent_initial_call=True
+)
+def resample_lttb_graph(view, graph_id):
+    """Reamostra o intervalo visível na resolução da largura do gráfico (só x/y dos traces)"""
+    source = LTTB_CHART_SOURCES.get(graph_id['chart'])
+    if source is None or not view:
+        raise PreventUpdate
+    start, end = visible_range(view)
+    patched = Patch()
+    for index, (x, y) in enumerate(source(start, end, target_points(view.get('width')))):
+        patched['data'][index]['x'] = x
+        patched['data'][index]['y'] = y
+    return patched
+
 # Callbacks para exportação de dados
 @app.callback(
     Output("download-metrics", "data"),
@@ -337,9 +476,15 @@ def export_weekly_pdf(n_clicks):
         start_date = end_date - timedelta(days=7)
         
         # Carregar dados
-        workouts = enrich_workouts_with_tss(load_workouts())
+        context = get_data_context()
+        workouts = context['workouts']
         metrics = load_metrics()
-        config = load_config()
+        config = context['config']
+        
+        # Totais por modalidade dos baldes diários (mesmos 7 dias do filtro abaixo)
+        totals_by_category = range_by_category(
+            context['rollups'], end_date.date() - timedelta(days=6), end_date.date()
+        )
         
         # Filtrar workouts da semana
         weekly_workouts = []
@@ -363,7 +508,8 @@ def export_weekly_pdf(n_clicks):
             config=config,
             start_date=start_date,
             end_date=end_date,
-            output_path=output_path
+            output_path=output_path,
+            totals_by_category=totals_by_category
         )
         
         # Retornar arquivo para download
@@ -411,9 +557,13 @@ def export_monthly_pdf(n_clicks):
             end_date = datetime(year, month + 1, 1) - timedelta(days=1)
         
         # Carregar dados
-        workouts = enrich_workouts_with_tss(load_workouts())
+        context = get_data_context()
+        workouts = context['workouts']
         metrics = load_metrics()
-        config = load_config()
+        config = context['config']
+        
+        # Totais por modalidade do balde mensal
+        totals_by_category = period_by_category(context['rollups'], 'month', start_date.date())
         
         # Filtrar workouts do mês
         monthly_workouts = []
@@ -437,7 +587,8 @@ def export_monthly_pdf(n_clicks):
             config=config,
             month=month,
             year=year,
-            output_path=output_path
+            output_path=output_path,
+            totals_by_category=totals_by_category
         )
         
         # Retornar arquivo para download
@@ -459,10 +610,9 @@ def export_monthly_pdf(n_clicks):
         return None, error_msg
 
 # Função auxiliar para calcular resumo semanal
-def calculate_weekly_summary():
+def calculate_weekly_summary(context=None):
     """Calcula resumo da semana atual (segunda a domingo)"""
-    workouts = enrich_workouts_with_tss(load_workouts())
-    config = load_config()
+    context = context or get_data_context()
     
     # Definir semana atual
     now = datetime.now()
@@ -470,31 +620,12 @@ def calculate_weekly_summary():
     week_start = (now - timedelta(days=days_since_monday)).replace(hour=0, minute=0, second=0, microsecond=0)
     week_end = week_start + timedelta(days=6, hours=23, minutes=59, seconds=59)
     
-    total_hours = 0.0
-    total_tss = 0.0
-    total_activities = 0
-    total_distance = 0.0
-    
-    for workout in workouts:
-        try:
-            start_time = workout.get('startTimeLocal', workout.get('startTime', ''))
-            if not start_time:
-                continue
-                
-            activity_date = datetime.strptime(start_time, "%Y-%m-%d %H:%M:%S")
-            
-            if week_start <= activity_date <= week_end:
-                duration_h = float(workout.get('duration', 0) or 0) / 3600
-                tss = float(workout.get('tss', 0) or 0)
-                distance = float(workout.get('distance', 0) or 0) / 1000
-                name = workout.get('activityName', 'N/A')[:40]
-                
-                total_hours += duration_h
-                total_tss += tss
-                total_activities += 1
-                total_distance += distance
-        except Exception as e:
-            continue
+    # Totais da semana ISO nas tabelas de rollups
+    totals = period_totals(context['rollups'], 'week', week_start.date())
+    total_hours = totals['duration']
+    total_tss = totals['tss']
+    total_activities = int(totals['count'])
+    total_distance = totals['distance']
     
     # Formatar período
     week_str = f"{week_start.strftime('%d %b')} - {week_end.strftime('%d %b')}"
@@ -512,8 +643,12 @@ def calculate_weekly_summary():
     }
 
 # Função para calcular alertas inteligentes
-def calculate_smart_alerts(metrics):
-    """Gera alertas baseados nas métricas de treinamento"""
+def calculate_smart_alerts(metrics, indices=None):
+    """
+    Gera alertas baseados nas métricas de treinamento.
+    
+    indices: índices de risco do último dia (load_indices.latest_indices), opcional
+    """
     alerts = []
     
     if len(metrics) < 3:
@@ -582,6 +717,39 @@ def calculate_smart_alerts(metrics):
             'priority': 5
         })
     
+    # Alertas 6-8: índices de risco de carga (ACWR, monotonia, rampa)
+    indices = indices or {}
+    acwr = indices.get('acwr_ewma')
+    if acwr is not None and acwr > ACWR_DANGER:
+        alerts.append({
+            'icon': '⚠️',
+            'title': 'Pico de Carga',
+            'message': f'ACWR (EWMA) em {acwr:.2f}, acima de {ACWR_DANGER:.1f}',
+            'action': 'Carga aguda bem acima da habitual: segure o volume nos próximos dias',
+            'color': 'danger',
+            'priority': 1
+        })
+    monotony = indices.get('monotony')
+    if monotony is not None and monotony > MONOTONY_HIGH:
+        alerts.append({
+            'icon': '🔁',
+            'title': 'Treino Monótono',
+            'message': f'Monotonia em {monotony:.2f} (strain {indices.get("strain") or 0:.0f})',
+            'action': 'Alterne dias fortes e leves para reduzir a monotonia',
+            'color': 'warning',
+            'priority': 2
+        })
+    ramp = indices.get('ramp')
+    if ramp is not None and ramp > RAMP_HIGH:
+        alerts.append({
+            'icon': '📈',
+            'title': 'Rampa Agressiva',
+            'message': f'CTL subiu {ramp:.1f} pontos na última semana',
+            'action': 'Acima de 8 pontos/semana o risco de lesão aumenta',
+            'color': 'warning',
+            'priority': 2
+        })
+    
     # Ordenar por prioridade
     alerts.sort(key=lambda x: x['priority'])
     return alerts[:3]  # Retornar apenas os 3 mais importantes
@@ -1290,50 +1458,50 @@ def generate_predictions(metrics, config):
     last_metric = metrics[-1]
     last_14_metrics = metrics[-14:]
     
-    # Calcular tendência de CTL (últimos 14 dias)
-    ctl_values = [m['ctl'] for m in last_14_metrics]
-    if len(ctl_values) >= 2:
-        # Regressão linear simples
-        x = list(range(len(ctl_values)))
-        n = len(x)
-        sum_x = sum(x)
-        sum_y = sum(ctl_values)
-        sum_xy = sum(xi * yi for xi, yi in zip(x, ctl_values))
-        sum_x2 = sum(xi * xi for xi in x)
-        
-        slope = (n * sum_xy - sum_x * sum_y) / (n * sum_x2 - sum_x * sum_x) if (n * sum_x2 - sum_x * sum_x) != 0 else 0
-        
-        # Projetar CTL para 7, 14 e 30 dias
-        current_ctl = last_metric['ctl']
-        ctl_7_days = current_ctl + (slope * 7)
-        ctl_14_days = current_ctl + (slope * 14)
-        ctl_30_days = current_ctl + (slope * 30)
-        
-        ctl_target = config.get('ctl_target', 50.0)
-        
-        # Previsão 1: Quando atingirá meta de CTL
-        if slope > 0 and current_ctl < ctl_target:
-            days_to_target = int((ctl_target - current_ctl) / slope)
-            if days_to_target > 0 and days_to_target < 90:
-                target_date = (datetime.now() + timedelta(days=days_to_target)).strftime('%d/%m/%Y')
-                predictions.append({
-                    'icon': '🎯',
-                    'title': 'Meta de CTL',
-                    'prediction': f'Você atingirá CTL {ctl_target:.0f} em aproximadamente {days_to_target} dias',
-                    'date': target_date,
-                    'confidence': 'média' if slope > 0.5 else 'baixa',
-                    'type': 'goal'
-                })
-        
-        # Previsão 2: Projeções de curto/médio prazo
-        predictions.append({
-            'icon': '📈',
-            'title': 'Projeção de Forma',
-            'prediction': f'Em 7 dias: CTL {ctl_7_days:.1f} | Em 14 dias: CTL {ctl_14_days:.1f} | Em 30 dias: CTL {ctl_30_days:.1f}',
-            'trend': 'alta' if slope > 0 else 'baixa',
-            'confidence': 'média',
-            'type': 'projection'
-        })
+    # Projeção de CTL pela própria EMA: repete o padrão de TSS dos últimos
+    # 28 dias e simula a variabilidade diária (mediana das simulações)
+    recent_daily_tss = [m.get('daily_tss', 0) or 0 for m in metrics]
+    pattern = recent_daily_tss[-28:]
+    horizon = 90
+    planned = (pattern * (horizon // len(pattern) + 1))[:horizon]
+    forecast = simulate_load_forecast(
+        planned, last_metric['ctl'], last_metric['atl'],
+        learn_day_ratios(recent_daily_tss), n_simulations=500, seed=0
+    )
+    median_ctl = forecast['ctl'][FORECAST_PERCENTILES.index(50)]
+    
+    current_ctl = last_metric['ctl']
+    ctl_7_days = median_ctl[6]
+    ctl_14_days = median_ctl[13]
+    ctl_30_days = median_ctl[29]
+    slope = (ctl_30_days - current_ctl) / 30
+    
+    ctl_target = config.get('ctl_target', 50.0)
+    
+    # Previsão 1: Quando atingirá meta de CTL
+    if current_ctl < ctl_target:
+        reached = np.nonzero(median_ctl >= ctl_target)[0]
+        if reached.size:
+            days_to_target = int(reached[0]) + 1
+            target_date = (datetime.now() + timedelta(days=days_to_target)).strftime('%d/%m/%Y')
+            predictions.append({
+                'icon': '🎯',
+                'title': 'Meta de CTL',
+                'prediction': f'Você atingirá CTL {ctl_target:.0f} em aproximadamente {days_to_target} dias',
+                'date': target_date,
+                'confidence': 'média' if slope > 0.5 else 'baixa',
+                'type': 'goal'
+            })
+    
+    # Previsão 2: Projeções de curto/médio prazo
+    predictions.append({
+        'icon': '📈',
+        'title': 'Projeção de Forma',
+        'prediction': f'Em 7 dias: CTL {ctl_7_days:.1f} | Em 14 dias: CTL {ctl_14_days:.1f} | Em 30 dias: CTL {ctl_30_days:.1f}',
+        'trend': 'alta' if slope > 0 else 'baixa',
+        'confidence': 'média',
+        'type': 'projection'
+    })
     
     # Recomendação 3: TSS sugerido para próxima semana
     recent_tss = [m.get('daily_tss', 0) for m in last_14_metrics[-7:]]
@@ -1420,22 +1588,11 @@ def export_to_csv(metrics, workouts):
         return None, None
 
 # Função para criar tendência mensal (últimos 6 meses)
+@figure_cached('monthly_trend')
 def create_monthly_trend_chart(metrics, workouts):
-    """Cria gráfico de evolução mensal com barras por modalidade"""
+    """Cria gráfico de evolução mensal com barras por modalidade (baldes mensais dos rollups)"""
     try:
-        from datetime import datetime as dt_parse, date as dt_date, timedelta
-
-        def _parse_start_time(value: str):
-            if not value:
-                return None
-            try:
-                return dt_parse.strptime(value, "%Y-%m-%d %H:%M:%S")
-            except Exception:
-                pass
-            try:
-                return dt_parse.fromisoformat(value.replace("Z", "+00:00")).replace(tzinfo=None)
-            except Exception:
-                return None
+        from datetime import date as dt_date
 
         def _shift_month(year: int, month: int, delta: int):
             total = (year * 12 + (month - 1)) + delta
@@ -1449,23 +1606,7 @@ def create_monthly_trend_chart(metrics, workouts):
         def _month_label(year: int, month: int) -> str:
             return f"{month:02d}/{str(year)[2:]}"
 
-        def _type_key(workout) -> str:
-            try:
-                return (workout.get("activityType", {}) or {}).get("typeKey", "") or ""
-            except Exception:
-                return ""
-
-        def _bucket(type_key: str) -> str | None:
-            k = (type_key or "").lower()
-            if "run" in k or "running" in k or "corrida" in k:
-                return "running"
-            if "cycle" in k or "cycling" in k or "bike" in k or "biking" in k or "cicl" in k:
-                return "cycling"
-            if "swim" in k or "swimming" in k or "natação" in k or "natacao" in k:
-                return "swimming"
-            return None
-
-        workouts = enrich_workouts_with_tss(workouts) if workouts else []
+        context = get_data_context()
 
         today = dt_date.today()
         end_date = today
@@ -1489,34 +1630,14 @@ def create_monthly_trend_chart(metrics, workouts):
                 'count_ctl': 0,
             }
 
-        # Agregar TSS por mês (somente corrida/ciclismo/natação)
-        for workout in workouts:
-            try:
-                start_time = workout.get('startTimeLocal', workout.get('startTime', ''))
-                activity_dt = _parse_start_time(start_time)
-                if not activity_dt:
-                    continue
-                activity_day = activity_dt.date()
-                if activity_day < start_date or activity_day > end_date:
-                    continue
-
-                bucket = _bucket(_type_key(workout))
-                if not bucket:
-                    continue
-
-                key = activity_dt.strftime('%Y-%m')
-                if key not in monthly_data:
-                    continue
-
-                tss = float(workout.get('tss', 0) or 0)
-                monthly_data[key][bucket] += tss
-            except Exception:
-                pass
+        # TSS por mês (somente corrida/ciclismo/natação) dos baldes mensais
+        for key in months_order:
+            month_buckets = context['rollups'].get('month', {}).get(key, {})
+            for bucket in ('running', 'cycling', 'swimming'):
+                monthly_data[key][bucket] = month_buckets.get(bucket, {}).get('tss', 0.0)
 
-        # CTL: recomputar para cobrir os 6 meses (metrics carregado costuma ser só 42 dias)
-        config = load_config()
-        warmup_start = start_date - timedelta(days=60)
-        ctl_metrics = calculate_fitness_metrics(workouts, config, warmup_start, end_date)
+        # CTL dos 6 meses: recorte da série materializada (histórico completo)
+        ctl_metrics = series_to_metrics(context['series'], start_date, end_date)
 
         for metric in ctl_metrics:
             try:
@@ -1598,31 +1719,15 @@ def create_monthly_trend_chart(metrics, workouts):
 
 # Funções para renderizar cada aba
 def render_dashboard():
-    # Recalcular métricas dinamicamente com TSS correto
-    config = load_config()
-    workouts = enrich_workouts_with_tss(load_workouts())
-    
-    # Calcular métricas dos últimos 42 dias
-    from datetime import datetime, timedelta, date as dt_date
-    end_date = dt_date.today()
-    start_date = end_date - timedelta(days=42)
-    
-    metrics = calculate_fitness_metrics(workouts, config, start_date, end_date)
-    
-    # Salvar para outras partes do app usarem
-    save_metrics(metrics)
+    # Esqueleto do dashboard: cards de métricas e placeholders; as seções
+    # pesadas chegam depois por render_lazy_section (DASHBOARD_SECTIONS).
+    # Métricas = últimos 42 dias recortados da série materializada
+    context = get_data_context()
+    metrics = list(context['metrics'])
     
     if not metrics:
         # Dados mock para demonstração
-        metrics = [
-            {"date": "2025-12-01", "ctl": 45.0, "atl": 35.0, "tsb": 10.0},
-            {"date": "2025-12-02", "ctl": 46.0, "atl": 36.0, "tsb": 10.0},
-            {"date": "2025-12-03", "ctl": 47.0, "atl": 37.0, "tsb": 10.0},
-            {"date": "2025-12-04", "ctl": 48.0, "atl": 38.0, "tsb": 10.0},
-            {"date": "2025-12-05", "ctl": 49.0, "atl": 39.0, "tsb": 10.0},
-            {"date": "2025-12-06", "ctl": 50.0, "atl": 40.0, "tsb": 10.0},
-            {"date": "2025-12-07", "ctl": 51.0, "atl": 41.0, "tsb": 10.0},
-        ]
+        metrics = list(DASHBOARD_DEMO_METRICS)
     
     last_metric = metrics[-1]
     prev_metric = metrics[-8] if len(metrics) >= 8 else metrics[0]
@@ -1666,14 +1771,6 @@ def render_dashboard():
     atl_sparkline = [m['atl'] for m in last_7_metrics]
     tsb_sparkline = [m['tsb'] for m in last_7_metrics]
     
-    # Calcular resumo semanal uma vez
-    weekly_summary = calculate_weekly_summary()
-    
-    # Calcular progresso das metas
-    workouts = enrich_workouts_with_tss(load_workouts())
-    config = load_config()
-    goals_progress = calculate_goals_progress(workouts, config)
-    
     return dbc.Container([
         # ============ STATUS ATUAL: ONDE VOCÊ ESTÁ ============
         dbc.Row([
@@ -1814,19 +1911,22 @@ def render_dashboard():
         ], className="bg-light rounded-3 mb-4"),
 
         # Gráfico de análise completa
-        dbc.Row([
-            dbc.Col([
-                dbc.Card([
-                    dbc.CardBody([
-                        dcc.Graph(
-                            figure=create_metrics_chart(metrics),
-                            style={'height': '600px'},
-                            config={'displayModeBar': False}
-                        )
-                    ])
-                ], className="shadow-sm border-0", style={'borderRadius': '12px'})
-            ])
-        ], className="mb-4"),
+        _lazy_section('metrics_chart', 650, eager=True),
+
+        # CTL/ATL/TSB do histórico completo (reduzido por LTTB)
+        _lazy_section('fitness_history', 480),
+
+        # Explorador de carga (período e métricas trocados no navegador)
+        _lazy_section('load_explorer', 540),
+
+        # Carga por modalidade e por fonte de TSS (quebras da série materializada)
+        _lazy_section('load_breakdown', 600),
+
+        # Índices de risco de carga (ACWR, monotonia, strain, rampa)
+        _lazy_section('load_indices', 550),
+
+        # Modelo de desempenho (Banister) ajustado ao histórico
+        _lazy_section('performance_model', 500),
 
         # Separador visual
         html.Hr(className="my-5", style={'border': '2px solid #e9ecef', 'borderRadius': '2px'}),
@@ -1847,16 +1947,7 @@ def render_dashboard():
             ])
         ], className="bg-light rounded-3 mb-4"),
 
-        dbc.Row([
-            dbc.Col([
-                dbc.Card([
-                    dbc.CardBody([
-                        html.H5("🏃‍♂️ Atividades Recentes", className="card-title mb-3 text-center", style={'fontWeight': '600'}),
-                        create_recent_activities_table()
-                    ])
-                ], className="shadow-sm border-0", style={'borderRadius': '12px'})
-            ])
-        ], className="mb-4"),
+        _lazy_section('recent_activities', 600),
 
         # Separador visual com gradiente
         html.Div([
@@ -1870,31 +1961,10 @@ def render_dashboard():
         ]),
 
         # ============ TREINOS DA SEMANA ============
-        dbc.Row([
-            dbc.Col([
-                html.Div([
-                    html.H4("📈 Treinos da Semana", className="mb-2", style={'fontWeight': '700'}),
-                    html.Div(style={'width': '50px', 'height': '3px', 'background': 'linear-gradient(90deg, #667eea, #764ba2)', 'marginBottom': '1rem', 'borderRadius': '2px'})
-                ]),
-                dcc.Graph(
-                    figure=create_weekly_chart(),
-                    style={'height': '400px', 'width': '100%'},
-                    config={'displayModeBar': False, 'responsive': True}
-                )
-            ], md=12, style={'padding': '0 15px'})
-        ], className="mb-4"),
+        _lazy_section('weekly_chart', 460),
 
         # ============ DISTRIBUIÇÃO DOS TIPOS DE TREINO ============
-        dbc.Row([
-            dbc.Col([
-                html.H4("🥧 Distribuição dos Tipos de Treino", className="mb-3"),
-                dcc.Graph(
-                    figure=create_distribution_chart(),
-                    style={'height': '350px'},
-                    config={'displayModeBar': False}
-                )
-            ])
-        ], className="mb-4"),
+        _lazy_section('distribution_chart', 410),
 
         # Separador visual
         html.Hr(className="my-5", style={'border': '2px solid #e9ecef', 'borderRadius': '2px'}),
@@ -1941,103 +2011,354 @@ def render_dashboard():
             ])
         ], className="bg-light rounded-3 mb-4"),
 
-        dbc.Row([
-            dbc.Col([
-                dbc.Card([
-                    dbc.CardBody([
-                        create_modality_analysis_tabs()
-                    ])
-                ], className="shadow-sm border-0", style={'borderRadius': '12px'})
-            ])
-        ], className="mb-4"),
+        _lazy_section('modality_analysis', 1200),
 
     ])
 
-def create_metrics_chart(metrics):
-    try:
-        # Preparar dados
-        dates = [m['date'] for m in metrics]
-        ctl = [m['ctl'] for m in metrics]
-        atl = [m['atl'] for m in metrics]
-        tsb = [m['tsb'] for m in metrics]
-        
-        # Carregar configuração para metas
-        config = load_config()
-        ctl_target = config.get('ctl_target', 50.0)  # Meta de CTL ideal
-        atl_max = config.get('atl_max', 80.0)  # ATL máximo recomendado
+# ============ SEÇÕES DO DASHBOARD SOB DEMANDA ============
+# O callback da aba devolve só o "esqueleto" (cabeçalhos, cards de métricas e
+# resumos baratos). Cada seção pesada tem um placeholder e é montada pelo seu
+# próprio callback (render_lazy_section): as marcadas como eager logo após a
+# primeira pintura; as demais quando entram na viewport (IntersectionObserver
+# no index_string marca o Store da seção como visível).
+
+# Métricas de demonstração quando ainda não há dados
+DASHBOARD_DEMO_METRICS = [
+    {"date": "2025-12-01", "ctl": 45.0, "atl": 35.0, "tsb": 10.0},
+    {"date": "2025-12-02", "ctl": 46.0, "atl": 36.0, "tsb": 10.0},
+    {"date": "2025-12-03", "ctl": 47.0, "atl": 37.0, "tsb": 10.0},
+    {"date": "2025-12-04", "ctl": 48.0, "atl": 38.0, "tsb": 10.0},
+    {"date": "2025-12-05", "ctl": 49.0, "atl": 39.0, "tsb": 10.0},
+    {"date": "2025-12-06", "ctl": 50.0, "atl": 40.0, "tsb": 10.0},
+    {"date": "2025-12-07", "ctl": 51.0, "atl": 41.0, "tsb": 10.0},
+]
 
-        # Calcular deltas semanais e percentuais
-        if len(metrics) >= 8:
-            delta_ctl = ctl[-1] - ctl[-8]
-            pct_ctl = (ctl[-1] / ctl[-8] - 1) * 100 if ctl[-8] != 0 else 0
-            delta_atl = atl[-1] - atl[-8]
-            pct_atl = (atl[-1] / atl[-8] - 1) * 100 if atl[-8] != 0 else 0
-            delta_tsb = tsb[-1] - tsb[-8]
-            pct_tsb = (tsb[-1] / tsb[-8] - 1) * 100 if tsb[-8] != 0 else 0
-        else:
-            delta_ctl = delta_atl = delta_tsb = pct_ctl = pct_atl = pct_tsb = 0
 
-        # Calcular média móvel 7 dias
-        if len(ctl) >= 7:
-            ctl_ma = np.convolve(ctl, np.ones(7)/7, mode='valid').tolist()
-            atl_ma = np.convolve(atl, np.ones(7)/7, mode='valid').tolist()
-            tsb_ma = np.convolve(tsb, np.ones(7)/7, mode='valid').tolist()
-            ma_dates = dates[6:]
-        else:
-            ctl_ma = atl_ma = tsb_ma = []
-            ma_dates = []
+def _lazy_section(section: str, height: int, eager: bool = False):
+    """Placeholder (skeleton) de uma seção do dashboard carregada sob demanda"""
+    store_id = {'type': 'lazy-visible', 'section': section}
+    return html.Div([
+        dcc.Store(id=store_id, data=True if eager else None),
+        html.Div(
+            dbc.Card(dbc.CardBody([
+                dbc.Placeholder(xs=4, size="lg", className="mb-3"),
+                dbc.Placeholder(xs=12, style={'height': f'{height - 120}px'}),
+            ]), className="shadow-sm border-0", style={'borderRadius': '12px'}),
+            id={'type': 'lazy-section', 'section': section},
+            className='lazy-section' if not eager else None,
+            **{'data-lazy-store': json.dumps(store_id)},
+            style={'minHeight': f'{height}px'},
+        ),
+    ])
 
-        # Criar figura com subplots usando Plotly
-        fig = make_subplots(
-            rows=3, cols=1,
-            subplot_titles=('Métricas de Performance - Análise Completa', 'Mudanças na Última Semana', 'Progresso Mensal (Médias)'),
-            row_heights=[0.55, 0.22, 0.23],
-            vertical_spacing=0.15
-        )
 
-        # ========== SUBPLOT 1: Gráfico Principal ==========
-        # Destacar finais de semana
-        for date_str in dates:
-            try:
-                from datetime import datetime as dt_parse
-                date_obj = dt_parse.fromisoformat(date_str)
-                # 5=sábado, 6=domingo
-                if date_obj.weekday() in [5, 6]:
-                    fig.add_vrect(
-                        x0=date_str, x1=date_str,
-                        fillcolor="rgba(128, 128, 128, 0.1)",
-                        layer="below",
-                        line_width=0,
-                        row=1, col=1
+def _dashboard_section_metrics_chart(context):
+    """Gráfico de análise completa (CTL/ATL/TSB dos últimos 42 dias)"""
+    metrics = context['metrics'] or DASHBOARD_DEMO_METRICS
+    config = context['config']
+    return dbc.Row([
+        dbc.Col([
+            dbc.Card([
+                dbc.CardBody([
+                    dcc.Graph(
+                        figure=create_metrics_chart(metrics, config, data_version=context['version']),
+                        style={'height': '600px'},
+                        config={'displayModeBar': False}
                     )
-            except:
-                pass
-        
-        # Linhas de referência (metas)
-        # CTL ideal
-        fig.add_trace(
-            go.Scatter(
-                x=[dates[0], dates[-1]], 
-                y=[ctl_target, ctl_target],
-                mode='lines',
-                name=f'🎯 Meta CTL ({ctl_target:.0f})',
-                line=dict(color='#1976d2', width=2, dash='dot'),
-                opacity=0.6,
-                hovertemplate=f'<b>Meta CTL</b><br>Valor: {ctl_target:.0f}<extra></extra>'
-            ),
-            row=1, col=1
-        )
-        
-        # ATL máximo
-        fig.add_trace(
-            go.Scatter(
-                x=[dates[0], dates[-1]], 
-                y=[atl_max, atl_max],
-                mode='lines',
-                name=f'⚠️ ATL Máximo ({atl_max:.0f})',
-                line=dict(color='#d32f2f', width=2, dash='dot'),
-                opacity=0.6,
-                hovertemplate=f'<b>ATL Máximo</b><br>Valor: {atl_max:.0f}<extra></extra>'
+                ])
+            ], className="shadow-sm border-0", style={'borderRadius': '12px'})
+        ])
+    ], className="mb-4")
+
+
+def _dashboard_section_fitness_history(context):
+    """CTL/ATL/TSB do histórico completo (LTTB, reamostrado ao dar zoom)"""
+    series = context['series']
+    if not series or not series.get('start'):
+        return html.Div()
+    start, end = fitness_history_range(series)
+    return dbc.Row([
+        dbc.Col([
+            dbc.Card([
+                dbc.CardBody([
+                    html.H5("📉 Histórico Completo (CTL/ATL/TSB)", className="card-title mb-1 text-center", style={'fontWeight': '600'}),
+                    html.P("Arraste para dar zoom; duplo clique volta ao histórico completo",
+                           className="text-muted small text-center mb-2"),
+                    lttb_graph(
+                        'fitness_history', create_fitness_history_chart(series, data_version=context['version']), start, end,
+                        style={'height': '380px'},
+                        config={'displayModeBar': False}
+                    )
+                ])
+            ], className="shadow-sm border-0", style={'borderRadius': '12px'})
+        ])
+    ], className="mb-4")
+
+
+def _dashboard_section_load_explorer(context):
+    """Explorador de carga: série compacta no Store, período e métricas no navegador"""
+    return dbc.Row([
+        dbc.Col([
+            dbc.Card([
+                dbc.CardBody([
+                    html.H5("🎛️ Explorar Carga", className="card-title mb-3 text-center", style={'fontWeight': '600'}),
+                    dcc.Store(id="client-series-store", data=client_series_payload(context)),
+                    dbc.Row([
+                        dbc.Col([
+                            dbc.RadioItems(
+                                id="client-series-period",
+                                options=[{'label': f'{d} dias', 'value': str(d)} for d in (30, 90, 180, 365)]
+                                        + [{'label': 'Tudo', 'value': 'all'}],
+                                value="90",
+                                inline=True
+                            )
+                        ], md=4),
+                        dbc.Col([
+                            dbc.Checklist(
+                                id="client-series-metrics",
+                                options=[
+                                    {'label': 'TSS', 'value': 'tss'},
+                                    {'label': 'CTL', 'value': 'ctl'},
+                                    {'label': 'ATL', 'value': 'atl'},
+                                    {'label': 'TSB', 'value': 'tsb'},
+                                    {'label': '🚴 h', 'value': 'hours_cycling'},
+                                    {'label': '🏃 h', 'value': 'hours_running'},
+                                    {'label': '🏊 h', 'value': 'hours_swimming'},
+                                    {'label': '💪 h', 'value': 'hours_strength'},
+                                    {'label': '🏅 h', 'value': 'hours_other'},
+                                ],
+                                value=['ctl', 'atl', 'tsb'],
+                                inline=True
+                            )
+                        ], md=8),
+                    ], className="mb-2"),
+                    dcc.Graph(id="client-series-chart", style={'height': '420px'}, config={'displayModeBar': False})
+                ])
+            ], className="shadow-sm border-0", style={'borderRadius': '12px'})
+        ])
+    ], className="mb-4")
+
+
+def _dashboard_section_load_breakdown(context):
+    """Carga por modalidade e por fonte de TSS (quebras da série materializada)"""
+    series = context['series']
+    return dbc.Row([
+        dbc.Col([
+            dbc.Card([
+                dbc.CardBody([
+                    dcc.Graph(
+                        figure=create_load_breakdown_chart(series, data_version=context['version']),
+                        style={'height': '550px'},
+                        config={'displayModeBar': False}
+                    )
+                ])
+            ], className="shadow-sm border-0", style={'borderRadius': '12px'})
+        ])
+    ], className="mb-4")
+
+
+def _dashboard_section_load_indices(context):
+    """Índices de risco de carga (ACWR, monotonia, strain, rampa) e alertas do último dia"""
+    series = context['series']
+    alerts = calculate_smart_alerts(context['metrics'] or [], latest_indices(series))
+    return dbc.Row([
+        dbc.Col([
+            html.Div([
+                dbc.Alert([
+                    html.Strong(f"{alert['icon']} {alert['title']}: "),
+                    alert['message'],
+                    html.Div(alert['action'], className="small mt-1")
+                ], color=alert['color'], className="mb-2")
+                for alert in alerts
+            ], className="mb-3"),
+            dbc.Card([
+                dbc.CardBody([
+                    dcc.Graph(
+                        figure=create_load_indices_chart(series, data_version=context['version']),
+                        style={'height': '500px'},
+                        config={'displayModeBar': False}
+                    )
+                ])
+            ], className="shadow-sm border-0", style={'borderRadius': '12px'})
+        ])
+    ], className="mb-4")
+
+
+def _dashboard_section_performance_model(context):
+    """Modelo de desempenho (Banister) ajustado ao histórico"""
+    series = context['series']
+    # Reajusta só se a carga ou os marcadores mudaram
+    performance_model = refresh_performance_model(context['workouts'], series)
+    return dbc.Row([
+        dbc.Col([
+            dbc.Card([
+                dbc.CardBody([
+                    html.H5("🧬 Modelo de Desempenho (Banister)", className="card-title mb-3 text-center", style={'fontWeight': '600'}),
+                    create_performance_model_section(series, performance_model)
+                ])
+            ], className="shadow-sm border-0", style={'borderRadius': '12px'})
+        ])
+    ], className="mb-4")
+
+
+def _dashboard_section_recent_activities(context):
+    """Tabela das atividades mais recentes"""
+    return dbc.Row([
+        dbc.Col([
+            dbc.Card([
+                dbc.CardBody([
+                    html.H5("🏃‍♂️ Atividades Recentes", className="card-title mb-3 text-center", style={'fontWeight': '600'}),
+                    create_recent_activities_table(context)
+                ])
+            ], className="shadow-sm border-0", style={'borderRadius': '12px'})
+        ])
+    ], className="mb-4")
+
+
+def _dashboard_section_weekly_chart(context):
+    """Horas por modalidade em cada dia da semana atual"""
+    return dbc.Row([
+        dbc.Col([
+            html.Div([
+                html.H4("📈 Treinos da Semana", className="mb-2", style={'fontWeight': '700'}),
+                html.Div(style={'width': '50px', 'height': '3px', 'background': 'linear-gradient(90deg, #667eea, #764ba2)', 'marginBottom': '1rem', 'borderRadius': '2px'})
+            ]),
+            dcc.Graph(
+                figure=create_weekly_chart(context, data_version=context['version']),
+                style={'height': '400px', 'width': '100%'},
+                config={'displayModeBar': False, 'responsive': True}
+            )
+        ], md=12, style={'padding': '0 15px'})
+    ], className="mb-4")
+
+
+def _dashboard_section_distribution_chart(context):
+    """Distribuição dos tipos de treino da semana atual"""
+    return dbc.Row([
+        dbc.Col([
+            html.H4("🥧 Distribuição dos Tipos de Treino", className="mb-3"),
+            dcc.Graph(
+                figure=create_distribution_chart(context, data_version=context['version']),
+                style={'height': '350px'},
+                config={'displayModeBar': False}
+            )
+        ])
+    ], className="mb-4")
+
+
+def _dashboard_section_modality_analysis(context):
+    """Abas de análise por modalidade"""
+    return dbc.Row([
+        dbc.Col([
+            dbc.Card([
+                dbc.CardBody([
+                    create_modality_analysis_tabs(context)
+                ])
+            ], className="shadow-sm border-0", style={'borderRadius': '12px'})
+        ])
+    ], className="mb-4")
+
+# Seção -> builder (recebe o contexto de dados)
+DASHBOARD_SECTIONS = {
+    'metrics_chart': _dashboard_section_metrics_chart,
+    'fitness_history': _dashboard_section_fitness_history,
+    'load_explorer': _dashboard_section_load_explorer,
+    'load_breakdown': _dashboard_section_load_breakdown,
+    'load_indices': _dashboard_section_load_indices,
+    'performance_model': _dashboard_section_performance_model,
+    'recent_activities': _dashboard_section_recent_activities,
+    'weekly_chart': _dashboard_section_weekly_chart,
+    'distribution_chart': _dashboard_section_distribution_chart,
+    'modality_analysis': _dashboard_section_modality_analysis,
+}
+
+
+@figure_cached('metrics')
+def create_metrics_chart(metrics, config=None):
+    try:
+        # Preparar dados
+        dates = [m['date'] for m in metrics]
+        ctl = [m['ctl'] for m in metrics]
+        atl = [m['atl'] for m in metrics]
+        tsb = [m['tsb'] for m in metrics]
+        
+        # Configuração para metas
+        config = config if config is not None else load_config()
+        ctl_target = config.get('ctl_target', 50.0)  # Meta de CTL ideal
+        atl_max = config.get('atl_max', 80.0)  # ATL máximo recomendado
+
+        # Calcular deltas semanais e percentuais
+        if len(metrics) >= 8:
+            delta_ctl = ctl[-1] - ctl[-8]
+            pct_ctl = (ctl[-1] / ctl[-8] - 1) * 100 if ctl[-8] != 0 else 0
+            delta_atl = atl[-1] - atl[-8]
+            pct_atl = (atl[-1] / atl[-8] - 1) * 100 if atl[-8] != 0 else 0
+            delta_tsb = tsb[-1] - tsb[-8]
+            pct_tsb = (tsb[-1] / tsb[-8] - 1) * 100 if tsb[-8] != 0 else 0
+        else:
+            delta_ctl = delta_atl = delta_tsb = pct_ctl = pct_atl = pct_tsb = 0
+
+        # Calcular média móvel 7 dias
+        if len(ctl) >= 7:
+            ctl_ma = np.convolve(ctl, np.ones(7)/7, mode='valid').tolist()
+            atl_ma = np.convolve(atl, np.ones(7)/7, mode='valid').tolist()
+            tsb_ma = np.convolve(tsb, np.ones(7)/7, mode='valid').tolist()
+            ma_dates = dates[6:]
+        else:
+            ctl_ma = atl_ma = tsb_ma = []
+            ma_dates = []
+
+        # Criar figura com subplots usando Plotly
+        fig = make_subplots(
+            rows=3, cols=1,
+            subplot_titles=('Métricas de Performance - Análise Completa', 'Mudanças na Última Semana', 'Progresso Mensal (Médias)'),
+            row_heights=[0.55, 0.22, 0.23],
+            vertical_spacing=0.15
+        )
+
+        # ========== SUBPLOT 1: Gráfico Principal ==========
+        # Destacar finais de semana
+        for date_str in dates:
+            try:
+                from datetime import datetime as dt_parse
+                date_obj = dt_parse.fromisoformat(date_str)
+                # 5=sábado, 6=domingo
+                if date_obj.weekday() in [5, 6]:
+                    fig.add_vrect(
+                        x0=date_str, x1=date_str,
+                        fillcolor="rgba(128, 128, 128, 0.1)",
+                        layer="below",
+                        line_width=0,
+                        row=1, col=1
+                    )
+            except:
+                pass
+        
+        # Linhas de referência (metas)
+        # CTL ideal
+        fig.add_trace(
+            go.Scatter(
+                x=[dates[0], dates[-1]], 
+                y=[ctl_target, ctl_target],
+                mode='lines',
+                name=f'🎯 Meta CTL ({ctl_target:.0f})',
+                line=dict(color='#1976d2', width=2, dash='dot'),
+                opacity=0.6,
+                hovertemplate=f'<b>Meta CTL</b><br>Valor: {ctl_target:.0f}<extra></extra>'
+            ),
+            row=1, col=1
+        )
+        
+        # ATL máximo
+        fig.add_trace(
+            go.Scatter(
+                x=[dates[0], dates[-1]], 
+                y=[atl_max, atl_max],
+                mode='lines',
+                name=f'⚠️ ATL Máximo ({atl_max:.0f})',
+                line=dict(color='#d32f2f', width=2, dash='dot'),
+                opacity=0.6,
+                hovertemplate=f'<b>ATL Máximo</b><br>Valor: {atl_max:.0f}<extra></extra>'
             ),
             row=1, col=1
         )
@@ -2059,8 +2380,8 @@ def create_metrics_chart(metrics):
         
         # Linhas principais com tooltips aprimorados
         fig.add_trace(
-            go.Scatter(
-                x=dates, y=ctl, mode='lines+markers',
+            scatter(
+                dates, ctl, mode='lines+markers',
                 name='💪 CTL (Forma Física)',
                 line=dict(color='#1976d2', width=3),
                 marker=dict(size=6, symbol='circle'),
@@ -2074,8 +2395,8 @@ def create_metrics_chart(metrics):
         )
 
         fig.add_trace(
-            go.Scatter(
-                x=dates, y=atl, mode='lines+markers',
+            scatter(
+                dates, atl, mode='lines+markers',
                 name='😴 ATL (Fadiga)',
                 line=dict(color='#d32f2f', width=3),
                 marker=dict(size=6, symbol='square'),
@@ -2089,8 +2410,8 @@ def create_metrics_chart(metrics):
         )
 
         fig.add_trace(
-            go.Scatter(
-                x=dates, y=tsb, mode='lines+markers',
+            scatter(
+                dates, tsb, mode='lines+markers',
                 name='⚖️ TSB (Equilíbrio)',
                 line=dict(color='#388e3c', width=3),
                 marker=dict(size=6, symbol='triangle-up'),
@@ -2272,9 +2593,10 @@ def create_metrics_chart(metrics):
         )
         return fig
 
-def create_weekly_chart():
+@figure_cached('weekly')
+def create_weekly_chart(context=None):
     try:
-        workouts = enrich_workouts_with_tss(load_workouts())
+        context = context or get_data_context()
         
         # Definir semana atual (segunda a domingo)
         now = datetime.now()
@@ -2289,35 +2611,13 @@ def create_weekly_chart():
         natacao = [0.0] * 7
         forca = [0.0] * 7
         
-        # Processar atividades da semana
-        for workout in workouts:
-            try:
-                start_time = workout.get('startTimeLocal', workout.get('startTime', ''))
-                if not start_time:
-                    continue
-                    
-                activity_date = datetime.strptime(start_time, "%Y-%m-%d %H:%M:%S")
-                
-                # Verificar se está na semana atual
-                if week_start <= activity_date <= week_end:
-                    # Calcular dia da semana (0=segunda, 6=domingo)
-                    day_index = activity_date.isoweekday() - 1
-                    
-                    # Duração em horas
-                    duration_hours = float(workout.get('duration', 0) or 0) / 3600
-                    
-                    # Categorizar por modalidade
-                    category = _activity_category(workout)
-                    if category == 'running':
-                        corrida[day_index] += duration_hours
-                    elif category == 'cycling':
-                        ciclismo[day_index] += duration_hours
-                    elif category == 'swimming':
-                        natacao[day_index] += duration_hours
-                    elif category == 'strength':
-                        forca[day_index] += duration_hours
-            except Exception as e:
-                continue
+        # Horas por modalidade em cada dia da semana (baldes diários dos rollups)
+        for day_index in range(7):
+            day_buckets = period_by_category(context['rollups'], 'day', (week_start + timedelta(days=day_index)).date())
+            corrida[day_index] = day_buckets.get('running', {}).get('duration', 0.0)
+            ciclismo[day_index] = day_buckets.get('cycling', {}).get('duration', 0.0)
+            natacao[day_index] = day_buckets.get('swimming', {}).get('duration', 0.0)
+            forca[day_index] = day_buckets.get('strength', {}).get('duration', 0.0)
         
         # Converter arrays para formato hh:mm:ss
         corrida_hms = [format_hours_to_hms(h) for h in corrida]
@@ -2395,9 +2695,10 @@ def create_weekly_chart():
         )
         return fig
 
-def create_distribution_chart():
+@figure_cached('distribution')
+def create_distribution_chart(context=None):
     try:
-        workouts = enrich_workouts_with_tss(load_workouts())
+        context = context or get_data_context()
         
         # Definir semana atual (segunda a domingo)
         now = datetime.now()
@@ -2409,18 +2710,8 @@ def create_distribution_chart():
         from collections import defaultdict
         distribuicao = defaultdict(lambda: {'horas': 0, 'atividades': 0})
         
-        for w in workouts:
+        for w in activities_between(context, week_start, week_end):
             try:
-                start_time = w.get('startTimeLocal', w.get('startTime', ''))
-                if not start_time:
-                    continue
-                    
-                activity_date = datetime.strptime(start_time, "%Y-%m-%d %H:%M:%S")
-                
-                # Verificar se está na semana atual
-                if not (week_start <= activity_date <= week_end):
-                    continue
-                
                 tipo = w.get('activityType', {}).get('typeKey', '').lower()
                 duracao_horas = (w.get('duration', 0) or 0) / 3600
                 
@@ -2521,132 +2812,118 @@ def create_distribution_chart():
         )
         return fig
 
-def create_recent_activities_table():
+def _intensity_badge(tss):
+    """Badge de intensidade baseada em TSS"""
+    if tss < 50:
+        return dbc.Badge("Leve", color="success", className="me-1", style={'fontSize': '0.7rem'})
+    elif tss < 100:
+        return dbc.Badge("Moderado", color="info", className="me-1", style={'fontSize': '0.7rem'})
+    elif tss < 150:
+        return dbc.Badge("Intenso", color="warning", className="me-1", style={'fontSize': '0.7rem'})
+    else:
+        return dbc.Badge("Muito Intenso", color="danger", className="me-1", style={'fontSize': '0.7rem'})
+
+def _activities_table(entries, show_date=False):
+    """Tabela de atividades a partir de [(atividade, tss exibido)]"""
+    cell_style = {'padding': '0.35rem 0.5rem', 'verticalAlign': 'middle'}
+    table_rows = []
+    for w, tss_value in entries:
+        try:
+            activity_name = w.get('activityName', 'Atividade Desconhecida')
+            distance = w.get('distance', 0) or 0
+            duration_hours = float(w.get('duration', 0) or 0) / 3600
+            
+            category = _activity_category(w)
+            
+            modality_label = {
+                'cycling': '🚴 Bike',
+                'running': '🏃 Corrida',
+                'swimming': '🏊 Natação',
+                'strength': '💪 Força',
+                'other': '⚽ Outros'
+            }.get(category, '⚽ Outros')
+            
+            # Calcular pace/velocidade se disponível
+            pace_info = ""
+            if distance > 0 and duration_hours > 0:
+                try:
+                    if category == 'running':
+                        # Calcular pace (min/km)
+                        pace_min_per_km = (duration_hours * 60) / (distance / 1000)
+                        pace_mins = int(pace_min_per_km)
+                        pace_secs = int((pace_min_per_km - pace_mins) * 60)
+                        pace_info = f"{pace_mins}:{pace_secs:02d}/km"
+                    elif category in ['cycling', 'swimming']:
+                        # Calcular velocidade (km/h)
+                        speed = (distance / 1000) / duration_hours
+                        pace_info = f"{speed:.1f} km/h"
+                except:
+                    pace_info = ""
+            
+            # Formatar distância
+            if distance >= 1000:
+                distance_str = f"{distance/1000:.2f} km"
+            else:
+                distance_str = f"{distance:.0f} m"
+            
+            date_cell = []
+            if show_date:
+                start = activity_datetime(w)
+                date_cell = [html.Td(start.strftime('%d/%m/%Y') if start.year > 1970 else "—", style=cell_style)]
+            
+            table_rows.append(html.Tr(date_cell + [
+                html.Td([
+                    html.Div(activity_name[:35] + "..." if len(activity_name) > 35 else activity_name, 
+                            style={'fontWeight': '500', 'marginBottom': '1px'}),
+                    html.Small(pace_info, className="text-muted") if pace_info else None
+                ], style=cell_style),
+                html.Td(modality_label, style=cell_style),
+                html.Td(distance_str, style=cell_style),
+                html.Td(format_hours_to_hms(duration_hours), style=cell_style),
+                html.Td([
+                    _intensity_badge(tss_value),
+                    html.Span(f"{tss_value:.0f}", style={'fontWeight': '600'})
+                ], style=cell_style)
+            ]))
+            
+        except Exception as e:
+            # Continuar mesmo com erro, para garantir que exibimos todas as atividades possíveis
+            continue
+    
+    header_style = {'padding': '0.5rem', 'fontSize': '0.9rem'}
+    date_header = [html.Th("Data", style={'width': '12%', **header_style})] if show_date else []
+    return dbc.Table([
+        html.Thead([
+            html.Tr(date_header + [
+                html.Th("Atividade", style={'width': '35%', **header_style}),
+                html.Th("Modalidade", style={'width': '15%', **header_style}),
+                html.Th("Distância", style={'width': '15%', **header_style}),
+                html.Th("Duração", style={'width': '15%', **header_style}),
+                html.Th("TSS / Intensidade", style={'width': '20%', **header_style})
+            ], style={'background': '#f8f9fa'})
+        ]),
+        html.Tbody(table_rows, style={'fontSize': '0.9rem'})
+      ], bordered=True, hover=True, responsive="sm", size="sm", className="mb-0", 
+          style={
+              'background': 'white', 
+              'width': '100%', 
+              'tableLayout': 'fixed',
+              'borderCollapse': 'collapse'
+          })
+
+def create_recent_activities_table(context=None):
     try:
-        workouts = enrich_workouts_with_tss(load_workouts())
+        context = context or get_data_context()
+        workouts = context['workouts']
         if not workouts:
             return html.Div("Nenhuma atividade encontrada.", className="text-muted")
         
-        config_for_tss = load_config()
-        
-        def _modality_tss(category: str, tss_data: dict) -> float:
-            if category == 'running':
-                return float(tss_data.get('rtss', 0) or 0) or float(tss_data.get('hrtss', 0) or 0) or float(tss_data.get('tss', 0) or 0)
-            if category == 'swimming':
-                return float(tss_data.get('stss', 0) or 0) or float(tss_data.get('hrtss', 0) or 0) or float(tss_data.get('tss', 0) or 0)
-            if category == 'cycling':
-                return float(tss_data.get('tss', 0) or 0)
-            return float(tss_data.get('hrtss', 0) or 0) or float(tss_data.get('tss', 0) or 0) or 0.0
-        
-        def get_activity_datetime(w):
-            from datetime import datetime as dt
-            if w.get('startTimeLocal'):
-                try:
-                    return dt.strptime(w['startTimeLocal'], '%Y-%m-%d %H:%M:%S')
-                except Exception:
-                    pass
-            if w.get('startTimeGMT'):
-                try:
-                    return dt.strptime(w['startTimeGMT'], '%Y-%m-%d %H:%M:%S')
-                except Exception:
-                    pass
-            if w.get('startTimeInSeconds'):
-                return dt.fromtimestamp(w['startTimeInSeconds'])
-            return dt(1970,1,1)
-        
-        recent_workouts = sorted(workouts, key=get_activity_datetime, reverse=True)[:10]
+        # 10 mais recentes pela ordem pré-calculada do índice (sem ordenar o histórico);
+        # TSS já enriquecido com os limiares vigentes na data (o mesmo do CTL e do explorador)
+        page = query_activities(context['activity_index'], page_size=10)
+        entries = [(workouts[p], float(workouts[p].get('tss', 0) or 0)) for p in page['positions']]
         
-        table_rows = []
-        for w in recent_workouts:
-            try:
-                activity_name = w.get('activityName', 'Atividade Desconhecida')
-                distance = w.get('distance', 0) or 0
-                duration_hours = float(w.get('duration', 0) or 0) / 3600
-                
-                type_key = (w.get('activityType') or {}).get('typeKey', '')
-                category = _activity_category(w)
-                tss_calc = compute_tss_variants(w, config_for_tss)
-                tss_value = _modality_tss(category, tss_calc)
-                
-                modality_label = {
-                    'cycling': '🚴 Bike',
-                    'running': '🏃 Corrida',
-                    'swimming': '🏊 Natação',
-                    'strength': '💪 Força',
-                    'other': '⚽ Outros'
-                }.get(category, '⚽ Outros')
-                
-                # Determinar intensidade baseada em TSS
-                def get_intensity_badge(tss):
-                    if tss < 50:
-                        return dbc.Badge("Leve", color="success", className="me-1", style={'fontSize': '0.7rem'})
-                    elif tss < 100:
-                        return dbc.Badge("Moderado", color="info", className="me-1", style={'fontSize': '0.7rem'})
-                    elif tss < 150:
-                        return dbc.Badge("Intenso", color="warning", className="me-1", style={'fontSize': '0.7rem'})
-                    else:
-                        return dbc.Badge("Muito Intenso", color="danger", className="me-1", style={'fontSize': '0.7rem'})
-                
-                # Calcular pace/velocidade se disponível
-                pace_info = ""
-                if distance > 0 and duration_hours > 0:
-                    try:
-                        if category == 'running':
-                            # Calcular pace (min/km)
-                            pace_min_per_km = (duration_hours * 60) / (distance / 1000)
-                            pace_mins = int(pace_min_per_km)
-                            pace_secs = int((pace_min_per_km - pace_mins) * 60)
-                            pace_info = f"{pace_mins}:{pace_secs:02d}/km"
-                        elif category in ['cycling', 'swimming']:
-                            # Calcular velocidade (km/h)
-                            speed = (distance / 1000) / duration_hours
-                            pace_info = f"{speed:.1f} km/h"
-                    except:
-                        pace_info = ""
-                
-                # Formatar distância
-                if distance >= 1000:
-                    distance_str = f"{distance/1000:.2f} km"
-                else:
-                    distance_str = f"{distance:.0f} m"
-                
-                table_rows.append(html.Tr([
-                    html.Td([
-                        html.Div(activity_name[:35] + "..." if len(activity_name) > 35 else activity_name, 
-                                style={'fontWeight': '500', 'marginBottom': '1px'}),
-                        html.Small(pace_info, className="text-muted") if pace_info else None
-                    ], style={'padding': '0.35rem 0.5rem', 'verticalAlign': 'middle'}),
-                    html.Td(modality_label, style={'padding': '0.35rem 0.5rem', 'verticalAlign': 'middle'}),
-                    html.Td(distance_str, style={'padding': '0.35rem 0.5rem', 'verticalAlign': 'middle'}),
-                    html.Td(format_hours_to_hms(duration_hours), style={'padding': '0.35rem 0.5rem', 'verticalAlign': 'middle'}),
-                    html.Td([
-                        get_intensity_badge(tss_value),
-                        html.Span(f"{tss_value:.0f}", style={'fontWeight': '600'})
-                    ], style={'padding': '0.35rem 0.5rem', 'verticalAlign': 'middle'})
-                ]))
-                
-            except Exception as e:
-                # Continuar mesmo com erro, para garantir que exibimos todas as atividades possíveis
-                continue
-        
-        return dbc.Table([
-            html.Thead([
-                html.Tr([
-                    html.Th("Atividade", style={'width': '35%', 'padding': '0.5rem', 'fontSize': '0.9rem'}),
-                    html.Th("Modalidade", style={'width': '15%', 'padding': '0.5rem', 'fontSize': '0.9rem'}),
-                    html.Th("Distância", style={'width': '15%', 'padding': '0.5rem', 'fontSize': '0.9rem'}),
-                    html.Th("Duração", style={'width': '15%', 'padding': '0.5rem', 'fontSize': '0.9rem'}),
-                    html.Th("TSS / Intensidade", style={'width': '20%', 'padding': '0.5rem', 'fontSize': '0.9rem'})
-                ], style={'background': '#f8f9fa'})
-            ]),
-            html.Tbody(table_rows, style={'fontSize': '0.9rem'})
-          ], bordered=True, hover=True, responsive="sm", size="sm", className="mb-0", 
-              style={
-                  'background': 'white', 
-                  'width': '100%', 
-                  'tableLayout': 'fixed',
-                  'borderCollapse': 'collapse'
-              })
+        return _activities_table(entries)
         
     except Exception as e:
         return html.Div("Erro ao carregar atividades recentes.", className="text-danger")
@@ -2695,115 +2972,50 @@ def create_metrics_history_table(metrics):
     except Exception as e:
         return html.Div("Erro ao carregar histórico de métricas.", className="text-danger")
 
-def calculate_modality_progress(activities):
-    """Calcula progresso por modalidade agrupado por semana (42 dias)"""
-    if not activities:
+def calculate_modality_progress(rollups):
+    """Calcula progresso por modalidade nas 6 semanas ISO até a atividade mais recente (baldes semanais)"""
+    # Usar a semana da atividade mais recente como referência
+    most_recent = latest_day(rollups)
+    if most_recent is None:
         return {}
 
-    # Usar a data da atividade mais recente como referência
-    if activities:
-        most_recent = max(activities, key=lambda x: datetime.strptime(x.get('startTimeLocal', x.get('startTime', '1900-01-01')), "%Y-%m-%d %H:%M:%S"))
-        now = datetime.strptime(most_recent.get('startTimeLocal', most_recent.get('startTime', '1900-01-01')), "%Y-%m-%d %H:%M:%S")
-    else:
-        now = datetime.now()
-
-    # Ajustar para o domingo mais recente (fim da semana)
-    days_since_monday = now.isoweekday() - 1  # 0=segunda, 6=domingo
-    end_of_current_week = now + timedelta(days=(6 - days_since_monday))
-    
-    # Calcular 42 dias (6 semanas completas) para trás a partir do domingo
-    start_date = end_of_current_week - timedelta(days=41)  # 41 dias = 6 semanas - 1 dia
-    # Ajustar para segunda-feira mais próxima
-    start_date = start_date - timedelta(days=start_date.isoweekday() - 1)
+    # 6 semanas completas (segunda a domingo) terminando na semana mais recente
+    start_date = most_recent - timedelta(days=most_recent.weekday()) - timedelta(weeks=5)
 
-    # Inicializar estrutura de dados
     modalities = ['cycling', 'running', 'swimming', 'strength']
-    modality_data = {mod: [] for mod in modalities}
-
-    # Agrupar atividades por modalidade e semana
-    for activity in activities:
-        try:
-            activity_date = datetime.strptime(
-                activity.get('startTimeLocal', activity.get('startTime', '1900-01-01')),
-                "%Y-%m-%d %H:%M:%S"
-            )
-
-            # Pular atividades fora do período de 42 dias
-            if activity_date < start_date:
-                continue
-
-            # Categorizar atividade
-            activity_type = _activity_category(activity)
-            if activity_type not in modalities:
-                continue
-
-            # Calcular semana (0-5, onde 0 é a semana mais antiga, começando na segunda)
-            days_diff = (activity_date - start_date).days
-            week_num = min(days_diff // 7, 5)  # Limitar a 6 semanas (0-5)
-
-            # Dados da atividade
-            distance = float(activity.get('distance', 0) or 0) / 1000  # km
-            tss = float(activity.get('tss', 0) or 0)
-            duration = float(activity.get('duration', 0) or 0) / 3600  # horas
-
-            # Adicionar à modalidade correspondente
-            if week_num < 6:  # Apenas 6 semanas (42 dias)
-                modality_data[activity_type].append({
-                    'week': week_num,
-                    'distance': distance,
-                    'tss': tss,
-                    'duration': duration,
-                    'date': activity_date.date()
-                })
-
-        except Exception as e:
-            continue
-
-    # Agregar por semana para cada modalidade
-    result = {}
-    for modality in modalities:
-        weekly_data = {}
-        for activity in modality_data[modality]:
-            week = activity['week']
-            if week not in weekly_data:
-                weekly_data[week] = {
-                    'distance': 0,
-                    'tss': 0,
-                    'duration': 0,
-                    'activities': 0,
-                    'week_start': start_date + timedelta(days=week*7)
-                }
-            weekly_data[week]['distance'] += activity['distance']
-            weekly_data[week]['tss'] += activity['tss']
-            weekly_data[week]['duration'] += activity['duration']
-            weekly_data[week]['activities'] += 1
-
-        # Converter para lista ordenada por semana
-        result[modality] = []
-        for week in range(6):
-            if week in weekly_data:
-                result[modality].append(weekly_data[week])
-            else:
-                result[modality].append({
-                    'distance': 0,
-                    'tss': 0,
-                    'duration': 0,
-                    'activities': 0,
-                    'week_start': start_date + timedelta(days=week*7)
-                })
+    result = {modality: [] for modality in modalities}
+    for week in range(6):
+        week_start = start_date + timedelta(days=week * 7)
+        week_buckets = period_by_category(rollups, 'week', week_start)
+        for modality in modalities:
+            values = week_buckets.get(modality) or empty_totals()
+            result[modality].append({
+                'distance': values['distance'],
+                'tss': values['tss'],
+                'duration': values['duration'],
+                'activities': int(values['count']),
+                'week_start': week_start
+            })
 
     return result
 
-def create_modality_analysis_tabs():
+def create_modality_analysis_tabs(context=None):
     try:
-        workouts = enrich_workouts_with_tss(load_workouts())
-        config = load_config()
+        context = context or get_data_context()
+        workouts = context['workouts']
+        config = context['config']
         
         if not workouts:
             return html.Div("Nenhum dado de treino disponível para análise.", className="text-muted")
         
         # Calcular progresso por modalidade
-        modality_progress = calculate_modality_progress(workouts)
+        modality_progress = calculate_modality_progress(context['rollups'])
+        
+        # CTL/ATL/TSB por modalidade (série materializada junto com o total)
+        series = context['series']
+        modality_load = current_breakdown(series, 'by_category')
+        load_end = datetime.now().date()
+        load_start = load_end - timedelta(days=89)
         
         tabs = []
         
@@ -2841,7 +3053,21 @@ def create_modality_analysis_tabs():
                         html.Td(week_data['activities'])
                     ]))
                 
+                load = modality_load.get(modality_key, {'ctl': 0.0, 'atl': 0.0, 'tsb': 0.0})
                 tab_content = dbc.Container([
+                    # Carga de treino da modalidade
+                    dbc.Row([
+                        dbc.Col([
+                            dbc.Card([
+                                dbc.CardBody([
+                                    html.H6(label, className="card-title text-center"),
+                                    html.H4(f"{load[field]:.1f}", className="text-center", style={'color': modality_info['primary']})
+                                ])
+                            ], className="mb-3")
+                        ], md=4)
+                        for label, field in (("💪 Fitness (CTL)", 'ctl'), ("😓 Fadiga (ATL)", 'atl'), ("⚡ Forma (TSB)", 'tsb'))
+                    ]),
+                    
                     # Cards de métricas
                     dbc.Row([
                         dbc.Col([
@@ -2904,19 +3130,34 @@ def create_modality_analysis_tabs():
                         dbc.Col([
                             html.H5("📈 Evolução Semanal Completa", className="mb-3"),
                             dcc.Graph(
-                                figure=create_modality_subplot_chart(data, modality_info, modality_key),
+                                figure=create_modality_subplot_chart(data, modality_info, modality_key, data_version=context['version']),
                                 style={'height': '600px'},
                                 config={'displayModeBar': False}
                             )
                         ])
                     ]),
                     
+                    # CTL/ATL/TSB da modalidade (90 dias)
+                    dbc.Row([
+                        dbc.Col([
+                            html.H5("💪 Carga de Treino da Modalidade (90 dias)", className="mb-3"),
+                            dcc.Graph(
+                                figure=create_modality_load_chart(
+                                    breakdown_to_metrics(series, 'by_category', modality_key, load_start, load_end),
+                                    modality_info, data_version=context['version']
+                                ),
+                                style={'height': '350px'},
+                                config={'displayModeBar': False}
+                            )
+                        ])
+                    ]),
+                    
                     # Gráfico de tendência consolidada
                     dbc.Row([
                         dbc.Col([
                             html.H5("📊 Tendência Consolidada (42 dias)", className="mb-3"),
                             dcc.Graph(
-                                figure=create_modality_trend_chart(data, modality_info, modality_info['name']),
+                                figure=create_modality_trend_chart(data, modality_info, modality_info['name'], data_version=context['version']),
                                 style={'height': '400px'},
                                 config={'displayModeBar': False}
                             )
@@ -2934,30 +3175,22 @@ def create_modality_analysis_tabs():
         return html.Div("Erro ao carregar análise por modalidade.", className="text-danger")
 
 # Função para criar heatmap de TSS (últimos 90 dias)
-def create_tss_heatmap(workouts):
+@figure_cached('tss_heatmap')
+def create_tss_heatmap(context=None):
     """Cria heatmap visual de TSS por dia (últimos 90 dias)"""
     try:
-        # Organizar TSS por dia
-        daily_tss = {}
-        for workout in workouts:
-            try:
-                start_time = workout.get('startTimeLocal', workout.get('startTime', ''))
-                if not start_time:
-                    continue
+        context = context or get_data_context()
 
-                # Aceitar formatos comuns do Garmin (YYYY-MM-DDTHH:MM:SS, YYYY-MM-DD HH:MM:SS, etc)
-                if 'T' in start_time:
-                    date_part = start_time.split('T', 1)[0]
-                else:
-                    date_part = start_time.split(' ', 1)[0]
+        # Últimos 90 dias (alinhado em semanas seg-dom para não "deslocar" os dias)
+        today = datetime.now().date()
+
+        start_date = today - timedelta(days=89)
+        start_date = start_date - timedelta(days=start_date.weekday())
+        end_date = today + timedelta(days=(6 - today.weekday()))
+
+        # TSS por dia dos baldes diários dos rollups
+        daily_tss = daily_field(context['rollups'], start_date, end_date, 'tss')
 
-                activity_date = datetime.strptime(date_part, "%Y-%m-%d").date()
-                date_str = activity_date.strftime('%Y-%m-%d')
-                tss = float(workout.get('tss', 0) or 0)
-                daily_tss[date_str] = daily_tss.get(date_str, 0) + tss
-            except:
-                pass
-        
         if not daily_tss:
             fig = go.Figure()
             fig.update_layout(
@@ -2966,13 +3199,6 @@ def create_tss_heatmap(workouts):
                 font={'family': 'Inter, -apple-system, sans-serif'}
             )
             return fig
-        
-        # Últimos 90 dias (alinhado em semanas seg-dom para não "deslocar" os dias)
-        today = datetime.now().date()
-
-        start_date = today - timedelta(days=89)
-        start_date = start_date - timedelta(days=start_date.weekday())
-        end_date = today + timedelta(days=(6 - today.weekday()))
 
         week_starts = []
         d = start_date
@@ -3054,49 +3280,20 @@ def create_tss_heatmap(workouts):
         return fig
         return fig
 
-def _render_calendar_month_section(workouts, year: int, month: int, today: datetime):
-    # Organizar treinos por data
-    workouts_by_date = {}
+def _render_calendar_month_section(month_index: dict, rollups: dict, year: int, month: int, today: datetime):
+    # Partição do mês no índice do calendário (calendar_index): resumos por dia;
+    # estatísticas do mês lidas do balde mensal dos rollups
+    workouts_by_date = month_index.get('days', {})
+    month_by_category = period_by_category(rollups, 'month', datetime(year, month, 1).date())
+    month_totals = sum_totals(month_by_category)
     monthly_stats = {
-        'total_workouts': 0,
-        'total_tss': 0,
-        'total_distance': 0,
-        'total_duration': 0,
-        'by_category': {}
+        'total_workouts': month_totals['count'],
+        'total_tss': month_totals['tss'],
+        'total_distance': month_totals['distance'],
+        'total_duration': month_totals['duration'],
+        'by_category': month_by_category,
     }
 
-    for workout in workouts:
-        try:
-            start_time = workout.get('startTimeLocal', workout.get('startTime', ''))
-            if not start_time:
-                continue
-
-            if 'T' in start_time:
-                date_obj = datetime.strptime(start_time.split('T')[0], '%Y-%m-%d').date()
-            else:
-                date_obj = datetime.strptime(start_time.split(' ')[0], '%Y-%m-%d').date()
-
-            date_str = date_obj.strftime('%Y-%m-%d')
-            if date_str not in workouts_by_date:
-                workouts_by_date[date_str] = []
-            workouts_by_date[date_str].append(workout)
-
-            if date_obj.month == month and date_obj.year == year:
-                monthly_stats['total_workouts'] += 1
-                monthly_stats['total_tss'] += float(workout.get('tss', 0) or 0)
-                monthly_stats['total_distance'] += float(workout.get('distance', 0) or 0) / 1000
-                monthly_stats['total_duration'] += float(workout.get('duration', 0) or 0) / 3600
-
-                category = _activity_category(workout)
-                if category not in monthly_stats['by_category']:
-                    monthly_stats['by_category'][category] = {'count': 0, 'distance': 0, 'duration': 0, 'tss': 0}
-                monthly_stats['by_category'][category]['count'] += 1
-                monthly_stats['by_category'][category]['distance'] += float(workout.get('distance', 0) or 0) / 1000
-                monthly_stats['by_category'][category]['duration'] += float(workout.get('duration', 0) or 0) / 3600
-                monthly_stats['by_category'][category]['tss'] += float(workout.get('tss', 0) or 0)
-        except:
-            continue
-
     cal = calendar.monthcalendar(year, month)
 
     category_emoji = {
@@ -3140,13 +3337,13 @@ def _render_calendar_month_section(workouts, year: int, month: int, today: datet
                 date_str = date_obj.strftime('%Y-%m-%d')
 
                 day_workouts = workouts_by_date.get(date_str, [])
-                day_tss = sum(float(w.get('tss', 0) or 0) for w in day_workouts)
+                day_tss = sum(w['tss'] for w in day_workouts)
 
                 for w in day_workouts:
                     week_stats['workouts'] += 1
-                    week_stats['tss'] += float(w.get('tss', 0) or 0)
-                    week_stats['distance'] += float(w.get('distance', 0) or 0) / 1000
-                    week_stats['duration'] += float(w.get('duration', 0) or 0) / 3600
+                    week_stats['tss'] += w['tss']
+                    week_stats['distance'] += w['distance']
+                    week_stats['duration'] += w['duration']
 
                 is_today = date_obj == today.date()
 
@@ -3185,11 +3382,11 @@ def _render_calendar_month_section(workouts, year: int, month: int, today: datet
                     }
 
                     for w in day_workouts[:3]:
-                        cat = _activity_category(w)
+                        cat = w['category']
                         emoji = category_emoji.get(cat, '⚽')
-                        name = w.get('activityName', 'Treino')[:18]
-                        duration_h = float(w.get('duration', 0) or 0) / 3600
-                        tss = float(w.get('tss', 0) or 0)
+                        name = (w['name'] or 'Treino')[:18]
+                        duration_h = w['duration']
+                        tss = w['tss']
                         color = cat_colors.get(cat, '#95a5a6')
 
                         activity_item = html.Div([
@@ -3362,8 +3559,9 @@ def _render_calendar_month_section(workouts, year: int, month: int, today: datet
 
 
 def render_calendar():
-    workouts = enrich_workouts_with_tss(load_workouts())
-    config = load_config()
+    context = get_data_context()
+    workouts = context['workouts']
+    config = context['config']
     
     if not workouts:
         return dbc.Container([
@@ -3415,7 +3613,7 @@ def render_calendar():
                 dbc.Card([
                     dbc.CardBody([
                         dcc.Graph(
-                            figure=create_tss_heatmap(workouts),
+                            figure=create_tss_heatmap(context, data_version=context['version']),
                             config={'displayModeBar': False}
                         )
                     ])
@@ -3426,7 +3624,10 @@ def render_calendar():
         dcc.Store(id="calendar-month-store", data={"year": current_year, "month": current_month}),
         html.Div(
             id="calendar-month-content",
-            children=_render_calendar_month_section(workouts, current_year, current_month, now),
+            children=_render_calendar_month_section(
+                load_calendar_month(current_year, current_month), context['rollups'],
+                current_year, current_month, now
+            ),
         )
     ])
 
@@ -3456,21 +3657,192 @@ def calendar_change_month(prev_clicks, next_clicks, data):
 
 
 @app.callback(
-    Output("calendar-month-content", "children"),
-    Input("calendar-month-store", "data"),
+    Output("calendar-month-content", "children"),
+    Input("calendar-month-store", "data"),
+)
+def calendar_render_month(data):
+    year = int((data or {}).get('year', datetime.now().year))
+    month = int((data or {}).get('month', datetime.now().month))
+
+    # Garante o índice e os rollups da versão atual dos dados (reconstruídos
+    # junto com o contexto) e lê só a partição do mês
+    context = get_data_context()
+    now = datetime.now()
+    return _render_calendar_month_section(load_calendar_month(year, month), context['rollups'], year, month, now)
+
+ACTIVITY_CATEGORY_OPTIONS = [
+    {'label': '🚴 Ciclismo', 'value': 'cycling'},
+    {'label': '🏃 Corrida', 'value': 'running'},
+    {'label': '🏊 Natação', 'value': 'swimming'},
+    {'label': '💪 Força', 'value': 'strength'},
+    {'label': '⚽ Outros', 'value': 'other'},
+]
+
+ACTIVITY_SORT_OPTIONS = [
+    {'label': 'Data', 'value': 'start'},
+    {'label': 'Nome', 'value': 'name'},
+    {'label': 'Modalidade', 'value': 'category'},
+    {'label': 'Distância', 'value': 'distance'},
+    {'label': 'Duração', 'value': 'duration'},
+    {'label': 'TSS', 'value': 'tss'},
+]
+
+def _activities_page(context, search='', categories=None, start_date=None, end_date=None,
+                     distance_min=None, distance_max=None, duration_min=None, duration_max=None,
+                     sort_by='start', descending=True, page=1):
+    """Uma página do explorador: (tabela, resumo, total de páginas, página atual)"""
+    def _day(value):
+        return datetime.fromisoformat(str(value)[:10]).date() if value else None
+
+    def _hours(minutes):
+        return minutes / 60 if minutes is not None else None
+
+    result = query_activities(
+        context['activity_index'],
+        search=search or '',
+        categories=categories,
+        start_date=_day(start_date),
+        end_date=_day(end_date),
+        distance_range=(distance_min, distance_max),
+        duration_range=(_hours(duration_min), _hours(duration_max)),
+        sort_by=sort_by or 'start',
+        descending=descending,
+        page=page,
+    )
+    workouts = context['workouts']
+    entries = [(workouts[p], float(workouts[p].get('tss', 0) or 0)) for p in result['positions']]
+    if entries:
+        table = _activities_table(entries, show_date=True)
+    else:
+        table = html.Div("Nenhuma atividade encontrada com esses filtros.", className="text-muted text-center py-4")
+    summary = f"{result['total']} atividades · página {result['page']} de {result['pages']}"
+    return table, summary, result['pages'], result['page']
+
+def render_activities():
+    """Aba de exploração do histórico (busca, filtros, ordenação e paginação no servidor)"""
+    context = get_data_context()
+    
+    header = dbc.Row([
+        dbc.Col([
+            html.Div([
+                html.H1("🔎 Atividades", className="text-primary mb-2", style={'fontWeight': '700'}),
+                html.P("Busque e navegue por todo o histórico de treinos", className="text-muted mb-4", style={'fontSize': '1.1rem'})
+            ], className="text-center py-3")
+        ])
+    ], className="bg-light rounded-3 mb-4")
+    
+    if not context['workouts']:
+        return dbc.Container([
+            header,
+            dbc.Alert([
+                html.H5("⚠️ Nenhum treino disponível", className="alert-heading"),
+                html.P("Vá para 'Configuração' para sincronizar com Garmin Connect.")
+            ], color="warning")
+        ])
+    
+    table, summary, pages, page = _activities_page(context)
+    
+    return dbc.Container([
+        header,
+        
+        # Filtros
+        dbc.Card([
+            dbc.CardBody([
+                dbc.Row([
+                    dbc.Col([
+                        dbc.Label("Nome"),
+                        dbc.Input(id="activities-search", type="search", placeholder="ex.: intervalado, longão", debounce=True)
+                    ], md=4),
+                    dbc.Col([
+                        dbc.Label("Modalidades"),
+                        dcc.Dropdown(id="activities-categories", options=ACTIVITY_CATEGORY_OPTIONS, multi=True, placeholder="Todas")
+                    ], md=4),
+                    dbc.Col([
+                        dbc.Label("Período"),
+                        html.Div(dcc.DatePickerRange(id="activities-dates", display_format="DD/MM/YYYY", clearable=True))
+                    ], md=4),
+                ], className="g-3 mb-3"),
+                dbc.Row([
+                    dbc.Col([
+                        dbc.Label("Distância (km)"),
+                        dbc.InputGroup([
+                            dbc.Input(id="activities-distance-min", type="number", min=0, placeholder="mín", debounce=True),
+                            dbc.Input(id="activities-distance-max", type="number", min=0, placeholder="máx", debounce=True),
+                        ], size="sm")
+                    ], md=3),
+                    dbc.Col([
+                        dbc.Label("Duração (min)"),
+                        dbc.InputGroup([
+                            dbc.Input(id="activities-duration-min", type="number", min=0, placeholder="mín", debounce=True),
+                            dbc.Input(id="activities-duration-max", type="number", min=0, placeholder="máx", debounce=True),
+                        ], size="sm")
+                    ], md=3),
+                    dbc.Col([
+                        dbc.Label("Ordenar por"),
+                        dbc.Select(id="activities-sort", options=ACTIVITY_SORT_OPTIONS, value="start", size="sm")
+                    ], md=3),
+                    dbc.Col([
+                        dbc.Label("Ordem"),
+                        dbc.RadioItems(
+                            id="activities-sort-direction",
+                            options=[{'label': 'Decrescente', 'value': 'desc'}, {'label': 'Crescente', 'value': 'asc'}],
+                            value="desc",
+                            inline=True
+                        )
+                    ], md=3),
+                ], className="g-3"),
+            ])
+        ], className="shadow-sm border-0 mb-3", style={'borderRadius': '12px'}),
+        
+        html.Div(summary, id="activities-summary", className="text-muted small mb-2"),
+        dbc.Card([
+            dbc.CardBody(html.Div(table, id="activities-table"))
+        ], className="shadow-sm border-0", style={'borderRadius': '12px'}),
+        dbc.Pagination(
+            id="activities-pagination", max_value=pages, active_page=page,
+            fully_expanded=False, first_last=True, previous_next=True,
+            className="justify-content-center mt-3"
+        ),
+    ])
+
+
+@app.callback(
+    [Output("activities-table", "children"),
+     Output("activities-summary", "children"),
+     Output("activities-pagination", "max_value"),
+     Output("activities-pagination", "active_page")],
+    [Input("activities-search", "value"),
+     Input("activities-categories", "value"),
+     Input("activities-dates", "start_date"),
+     Input("activities-dates", "end_date"),
+     Input("activities-distance-min", "value"),
+     Input("activities-distance-max", "value"),
+     Input("activities-duration-min", "value"),
+     Input("activities-duration-max", "value"),
+     Input("activities-sort", "value"),
+     Input("activities-sort-direction", "value"),
+     Input("activities-pagination", "active_page")],
+    prevent_initial_call=True
 )
-def calendar_render_month(data):
-    year = int((data or {}).get('year', datetime.now().year))
-    month = int((data or {}).get('month', datetime.now().month))
-
-    workouts = enrich_workouts_with_tss(load_workouts())
-    now = datetime.now()
-    return _render_calendar_month_section(workouts, year, month, now)
+def update_activities_explorer(search, categories, start_date, end_date, distance_min, distance_max,
+                               duration_min, duration_max, sort_by, direction, active_page):
+    """Consulta o índice e devolve só a página pedida"""
+    ctx = dash.callback_context
+    triggered_id = ctx.triggered[0]['prop_id'].split('.')[0] if ctx.triggered else None
+    # Mudou filtro/ordenação: volta para a primeira página
+    page = active_page if triggered_id == "activities-pagination" else 1
+    
+    return _activities_page(
+        get_data_context(), search, categories, start_date, end_date,
+        distance_min, distance_max, duration_min, duration_max,
+        sort_by, direction != 'asc', page
+    )
 
 def render_goals():
-    workouts = enrich_workouts_with_tss(load_workouts())
-    config = load_config()
-    goals_progress = calculate_goals_progress(workouts, config)
+    context = get_data_context()
+    workouts = context['workouts']
+    config = context['config']
+    goals_progress = calculate_goals_progress(workouts, config, context)
     
     # Calcular períodos para exibição
     now = datetime.now()
@@ -3661,6 +4033,36 @@ def render_goals():
             ])
         ]),
         
+        # Previsão de forma (Monte Carlo) para a data da prova
+        dbc.Card([
+            dbc.CardHeader(html.H4("🔮 Previsão de Forma para a Prova", className="mb-0")),
+            dbc.CardBody([
+                html.P("Simula o plano de treino sugerido até a prova com a variabilidade diária do seu histórico "
+                       "e mostra as faixas prováveis de CTL, ATL e TSB.", className="text-muted mb-4"),
+                dbc.Row([
+                    dbc.Col([
+                        dbc.Label("Data da Prova"),
+                        dcc.DatePickerSingle(
+                            id="forecast-race-date",
+                            date=(datetime.now().date() + timedelta(days=56)).isoformat(),
+                            min_date_allowed=(datetime.now().date() + timedelta(days=1)).isoformat(),
+                            display_format="DD/MM/YYYY"
+                        )
+                    ], md=4),
+                    dbc.Col([
+                        dbc.Label("CTL Alvo"),
+                        dbc.Input(id="forecast-target-ctl", type="number", value=config.get('target_ctl', 50), min=1, max=200, step=1)
+                    ], md=4),
+                    dbc.Col([
+                        dbc.Label("Aderência ao Plano (%)"),
+                        dbc.Input(id="forecast-adherence", type="number", value=90, min=10, max=100, step=5)
+                    ], md=4)
+                ], className="mb-3"),
+                dbc.Button("📈 Simular Plano", id="forecast-btn", color="primary", size="lg", className="w-100 mb-3"),
+                html.Div(id="forecast-output")
+            ])
+        ], className="mb-4"),
+        
         # Predição de Tempo de Prova
         dbc.Card([
             dbc.CardHeader(html.H4("🏁 Predição de Tempo de Prova", className="mb-0")),
@@ -3779,10 +4181,34 @@ def render_config():
                                 dbc.Input(id="config-swim-pace-threshold", type="text", value=config.get("swim_pace_threshold", "2:01"))
                             ], md=4)
                         ], className="mt-3"),
+                        dbc.Row([
+                            dbc.Col([
+                                dbc.Label("Limiares válidos a partir de"),
+                                dcc.DatePickerSingle(
+                                    id="config-effective-date",
+                                    date=datetime.now().date().isoformat(),
+                                    display_format="DD/MM/YYYY"
+                                ),
+                                html.Small(" Atividades anteriores mantêm os limiares da época", className="text-muted")
+                            ], md=12)
+                        ], className="mt-3"),
                         dbc.Button("💾 Salvar Configurações", id="save-config-btn", color="success", className="mt-3")
                     ])
                 ], className="mb-4"),
                 
+                # Calibração dos fatores de TSS
+                dbc.Card([
+                    dbc.CardHeader("🧪 Calibração de TSS"),
+                    dbc.CardBody([
+                        html.P("Ajusta os fatores do hrTSS (natação, força, outras) e o TSS/hora usado sem dados "
+                               "de intensidade com base nas suas atividades com potência/pace e na carga de treino "
+                               "do Garmin.", className="text-muted small"),
+                        html.Div(create_tss_calibration_table(config), id="calibrate-tss-table"),
+                        dbc.Button("🧪 Calibrar com meu histórico", id="calibrate-tss-btn", color="primary", className="mt-2"),
+                        html.Div(id="calibrate-tss-output")
+                    ])
+                ], className="mb-4"),
+                
                 # Zonas de Treinamento
                 dbc.Card([
                     dbc.CardHeader("🎯 Zonas de Treinamento"),
@@ -3877,6 +4303,31 @@ def render_config():
         ])
     ])
 
+def _chat_welcome():
+    """Mensagem de boas-vindas (topo do histórico)"""
+    return html.Div("🤖 Olá! Sou seu assistente de fitness. Faça uma pergunta sobre seus treinos, métricas ou progresso!", 
+                    style={'fontStyle': 'italic', 'color': '#6c757d', 'marginBottom': '10px'})
+
+
+def _chat_message_div(message):
+    """Balão de uma mensagem do chat_store ('user' ou 'assistant')"""
+    if message['role'] == 'user':
+        return html.Div([
+            html.Strong("👤 Você: ", style={'color': '#007bff'}),
+            message['content']
+        ], style={'marginBottom': '10px', 'padding': '8px', 'backgroundColor': '#e3f2fd', 'borderRadius': '8px'})
+    return html.Div([
+        html.Strong("🤖 IA: ", style={'color': '#28a745'}),
+        html.Div(message['content'], style={'whiteSpace': 'pre-wrap', 'marginTop': '5px'})
+    ], style={'marginBottom': '15px', 'padding': '8px', 'backgroundColor': '#f8f9fa', 'borderRadius': '8px', 'borderLeft': '4px solid #28a745'})
+
+
+def _chat_page_items(page):
+    """Componentes de uma página do histórico (boas-vindas no topo da primeira página)"""
+    items = [] if page['has_more'] else [_chat_welcome()]
+    return items + [_chat_message_div(message) for message in page['messages']]
+
+
 def render_ai_chat():
     """Renderiza a interface de chat com IA"""
     try:
@@ -3893,7 +4344,13 @@ def render_ai_chat():
                     dbc.Card([
                         dbc.CardHeader("💬 Conversa com a IA"),
                         dbc.CardBody([
-                            # Histórico de mensagens
+                            # Sessão do chat (o histórico fica no servidor, em chat_store)
+                            dcc.Store(id="chat-session", storage_type="session", data=new_session_id()),
+                            dcc.Store(id="chat-oldest-id"),
+                            dbc.Button("⬆️ Mensagens anteriores", id="chat-load-older", color="link",
+                                       size="sm", className="mb-2", style={'display': 'none'}),
+
+                            # Histórico de mensagens (última página; novas mensagens entram via Patch)
                             html.Div(id="chat-history", style={
                                 'height': '400px',
                                 'overflowY': 'auto',
@@ -3902,10 +4359,7 @@ def render_ai_chat():
                                 'padding': '15px',
                                 'marginBottom': '15px',
                                 'backgroundColor': '#f8f9fa'
-                            }, children=[
-                                html.Div("🤖 Olá! Sou seu assistente de fitness. Faça uma pergunta sobre seus treinos, métricas ou progresso!", 
-                                        style={'fontStyle': 'italic', 'color': '#6c757d', 'marginBottom': '10px'})
-                            ]),
+                            }, children=[_chat_welcome()]),
                             
                             # Input de mensagem
                             dbc.Row([
@@ -3972,8 +4426,8 @@ def render_ai_chat():
         ])
 
 # Funções auxiliares
-def calculate_goals_progress(activities, config):
-    """Calcula progresso das metas baseado nas atividades"""
+def calculate_goals_progress(activities, config, context=None):
+    """Calcula progresso das metas (semana ISO e mês atuais) a partir dos rollups do contexto"""
     if not activities:
         return {
             'weekly': {'distance': 0, 'tss': 0, 'hours': 0, 'activities': 0},
@@ -3982,44 +4436,21 @@ def calculate_goals_progress(activities, config):
             'current_atl': 0
         }
 
-    now = datetime.now()
-    # Semana atual: segunda-feira da semana atual até domingo da semana atual
-    days_since_monday = now.isoweekday() - 1  # 0=segunda, 6=domingo
-    week_start = (now - timedelta(days=days_since_monday)).replace(hour=0, minute=0, second=0, microsecond=0)
-    week_end = week_start + timedelta(days=6, hours=23, minutes=59, seconds=59)
-    month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-
-    weekly_activities = []
-    monthly_activities = []
-
-    for activity in activities:
-        try:
-            start_time_raw = activity.get('startTimeLocal', activity.get('startTime', '1900-01-01'))
-            activity_date = datetime.strptime(start_time_raw, "%Y-%m-%d %H:%M:%S")
-
-            if week_start <= activity_date <= week_end:
-                weekly_activities.append(activity)
-            elif activity_date >= month_start:
-                monthly_activities.append(activity)
-        except Exception as e:
-            continue
+    context = context or get_data_context()
+    today = datetime.now().date()
 
-    def calculate_metrics(activity_list):
-        total_distance = sum(float(a.get('distance', 0) or 0) / 1000 for a in activity_list)
-        total_tss = sum(float(a.get('tss', 0) or 0) for a in activity_list)
-        total_hours = sum(float(a.get('duration', 0) or 0) / 3600 for a in activity_list)
-        total_activities = len(activity_list)
+    def calculate_metrics(totals):
         return {
-            'distance': total_distance,
-            'tss': total_tss,
-            'hours': total_hours,
-            'activities': total_activities
+            'distance': totals['distance'],
+            'tss': totals['tss'],
+            'hours': totals['duration'],
+            'activities': int(totals['count'])
         }
 
-    weekly_metrics = calculate_metrics(weekly_activities)
-    monthly_metrics = calculate_metrics(monthly_activities)
+    weekly_metrics = calculate_metrics(period_totals(context['rollups'], 'week', today))
+    monthly_metrics = calculate_metrics(period_totals(context['rollups'], 'month', today))
 
-    metrics = load_metrics()
+    metrics = context['metrics']
     current_ctl = metrics[-1]['ctl'] if metrics else 0
     current_atl = metrics[-1]['atl'] if metrics else 0
 
@@ -4031,6 +4462,10 @@ def calculate_goals_progress(activities, config):
     }
 
 # Funções auxiliares para buscar dados de saúde e training status
+
+# Janela (dias) verificada a cada sync no health_store; só dias ausentes/não finais são buscados
+HEALTH_SYNC_DAYS = 28
+
 def fetch_health_and_training_data(client, enhanced_client, config):
     """
     Busca dados de saúde e training status do Garmin.
@@ -4071,59 +4506,36 @@ def fetch_health_and_training_data(client, enhanced_client, config):
         end_date = datetime.now().date()
         start_date = end_date - timedelta(days=42)
         
-        # HRV - coletar últimos 7 dias (dados podem ser limitados)
-        hrv_data = {}
-        logger.info("[HEALTH] Iniciando coleta de HRV (7 dias)...")
-        for i in range(7):
-            date = end_date - timedelta(days=i)
-            try:
-                hrv = enhanced_client.get_heart_rate_variability(date)
-                if hrv:
-                    hrv_data[date.isoformat()] = hrv
-                    logger.info(f"[HEALTH] HRV {date.isoformat()}: OK")
-            except Exception as e:
-                logger.warning(f"[HEALTH] HRV {date.isoformat()}: {e}")
-        if hrv_data:
-            health_data['hrv'] = hrv_data
-            logger.info(f"[HEALTH] HRV: Salvo {len(hrv_data)} dias")
-        else:
-            logger.warning("[HEALTH] HRV: Nenhum dado coletado")
-        
-        # Stress Data - últimos 7 dias
-        stress_data = {}
-        logger.info("[HEALTH] Iniciando coleta de Stress (7 dias)...")
-        for i in range(7):
-            date = end_date - timedelta(days=i)
-            try:
-                stress = enhanced_client.get_stress_data(date)
-                if stress:
-                    stress_data[date.isoformat()] = stress
-                    logger.info(f"[HEALTH] Stress {date.isoformat()}: OK")
-            except Exception as e:
-                logger.warning(f"[HEALTH] Stress {date.isoformat()}: {e}")
-        if stress_data:
-            health_data['stress'] = stress_data
-            logger.info(f"[HEALTH] Stress: Salvo {len(stress_data)} dias")
-        else:
-            logger.warning("[HEALTH] Stress: Nenhum dado coletado")
-        
-        # Sleep Data - últimos 7 dias
-        sleep_data = {}
-        logger.info("[HEALTH] Iniciando coleta de Sleep (7 dias)...")
-        for i in range(7):
-            date = end_date - timedelta(days=i)
-            try:
-                sleep = enhanced_client.get_sleep_data(date)
-                if sleep:
-                    sleep_data[date.isoformat()] = sleep
-                    logger.info(f"[HEALTH] Sleep {date.isoformat()}: OK")
-            except Exception as e:
-                logger.warning(f"[HEALTH] Sleep {date.isoformat()}: {e}")
-        if sleep_data:
-            health_data['sleep'] = sleep_data
-            logger.info(f"[HEALTH] Sleep: Salvo {len(sleep_data)} dias")
-        else:
-            logger.warning("[HEALTH] Sleep: Nenhum dado coletado")
+        # HRV, Stress e Sleep: buscar apenas dias ausentes ou não finais no
+        # health_store (o histórico cresce a cada sync, sem rebuscar dias antigos)
+        sync_start = end_date - timedelta(days=HEALTH_SYNC_DAYS - 1)
+        series_labels = (('hrv', 'HRV'), ('stress', 'Stress'), ('sleep', 'Sleep'))
+        for metric, label in series_labels:
+            pending = health_store.days_to_fetch(metric, sync_start, end_date)
+            logger.info(f"[HEALTH] {label}: {len(pending)} dias pendentes em {HEALTH_SYNC_DAYS}")
+            fetched = {}
+            rhr_days = {}
+            for date in pending:
+                try:
+                    # Sem cache e sem engolir erros: só resposta vazia vira "dia sem dado"
+                    data = enhanced_client.fetch_health_day(metric, date)
+                    fetched[date.isoformat()] = data or None
+                    # FC de repouso vem junto com o sono (sem chamada extra)
+                    if metric == 'sleep' and isinstance(data, dict) and data.get('restingHeartRate'):
+                        rhr_days[date.isoformat()] = {'restingHeartRate': data.get('restingHeartRate')}
+                except Exception as e:
+                    # Falha não é gravada: o dia continua pendente para o próximo sync
+                    logger.warning(f"[HEALTH] {label} {date.isoformat()}: {e}")
+            health_store.save_days(metric, fetched)
+            health_store.save_days('rhr', rhr_days)
+
+            # Snapshot (health_metrics.json) mantém os últimos 7 dias, lidos do store
+            recent = health_store.load_range(metric, end_date - timedelta(days=6), end_date)
+            if recent:
+                health_data[metric] = recent
+                logger.info(f"[HEALTH] {label}: {sum(1 for v in fetched.values() if v)} novos, {len(recent)} dias no snapshot")
+            else:
+                logger.warning(f"[HEALTH] {label}: Nenhum dado coletado")
         
         # VO2 Max
         logger.info("[HEALTH] Iniciando coleta de VO2 Max...")
@@ -4195,7 +4607,7 @@ def fetch_health_and_training_data(client, enhanced_client, config):
         'training': training_data
     }
 
-def fetch_garmin_data(email=None, password=None, config=None, use_tokens=True):
+def fetch_garmin_data(email=None, password=None, config=None, use_tokens=True, client=None):
     """Busca dados do Garmin Connect com lógica inteligente de atualização
     
     Parâmetros:
@@ -4203,15 +4615,14 @@ def fetch_garmin_data(email=None, password=None, config=None, use_tokens=True):
     - password: senha do Garmin (opcional se usar tokens)
     - config: configurações de fitness
     - use_tokens: tentar usar tokens salvos primeiro (padrão: True)
+    - client: cliente já autenticado (ex.: FakeGarmin para benchmarks); pula o login
     """
     try:
         from garminconnect import Garmin
         from pathlib import Path
         
-        client = None
-        
         # Tentar login com tokens se disponível
-        if use_tokens:
+        if client is None and use_tokens:
             # Primeiro validar tokens localmente (sem conectar ao servidor)
             if validate_garmin_tokens_locally():
                 try:
@@ -4276,51 +4687,36 @@ def fetch_garmin_data(email=None, password=None, config=None, use_tokens=True):
         else:
             new_activities = []
 
-        # Unir atividades antigas com novas, sobrescrevendo duplicatas
-        # Usar activityId ou startTimeLocal como chave única
-        activities_dict = {}
-
-        # Primeiro, adicionar atividades antigas
-        for a in old_activities:
-            key = a.get('activityId') or a.get('activityUUID') or a.get('startTimeLocal') or a.get('startTime')
-            if key:
-                activities_dict[key] = a
-
-        # Depois, adicionar/sobrescrever com atividades novas
-        for a in new_activities:
-            key = a.get('activityId') or a.get('activityUUID') or a.get('startTimeLocal') or a.get('startTime')
-            if key:
-                activities_dict[key] = a
-
-        # Converter de volta para lista
-        all_activities = list(activities_dict.values())
-
-        # Salvar as atividades brutas do Garmin (TSS é calculado dinamicamente nas views)
-        save_workouts(all_activities)
-
-        # Para métricas do Dashboard, usar apenas os últimos 42 dias
-        dashboard_cutoff = end_date - timedelta(days=42)
-        dashboard_activities = []
-        for a in all_activities:
-            start_time = a.get('startTimeLocal', a.get('startTime', ''))
-            if start_time:
-                try:
-                    if 'T' in start_time:
-                        activity_date = datetime.strptime(start_time.split('T')[0], '%Y-%m-%d').date()
-                    else:
-                        activity_date = datetime.strptime(start_time.split(' ')[0], '%Y-%m-%d').date()
+        # Mesclar, salvar e recalcular sob o mesmo lock da ingestão push; recarrega o
+        # histórico porque um push pode ter gravado durante a busca no Garmin
+        with DATA_WRITE_LOCK:
+            old_activities = load_workouts()
 
-                    if activity_date >= dashboard_cutoff:
-                        dashboard_activities.append(a)
-                except:
-                    # Se não conseguir parsear, incluir na dúvida
-                    dashboard_activities.append(a)
+            # Unir atividades antigas com novas, sobrescrevendo duplicatas
+            # Usar activityId ou startTimeLocal como chave única
+            activities_dict = {}
+
+            # Primeiro, adicionar atividades antigas
+            for a in old_activities:
+                key = a.get('activityId') or a.get('activityUUID') or a.get('startTimeLocal') or a.get('startTime')
+                if key:
+                    activities_dict[key] = a
 
-        # Calcular métricas apenas com dados dos últimos 42 dias
-        # (enriquece com TSS uma vez e reaproveita)
-        dashboard_with_tss = enrich_workouts_with_tss(dashboard_activities, config)
-        metrics = calculate_fitness_metrics(dashboard_with_tss, config, dashboard_cutoff, end_date)
-        save_metrics(metrics)
+            # Depois, adicionar/sobrescrever com atividades novas
+            for a in new_activities:
+                key = a.get('activityId') or a.get('activityUUID') or a.get('startTimeLocal') or a.get('startTime')
+                if key:
+                    activities_dict[key] = a
+
+            # Converter de volta para lista
+            all_activities = list(activities_dict.values())
+
+            # Salvar as atividades brutas do Garmin (TSS é calculado dinamicamente nas views)
+            save_workouts(all_activities)
+
+            # Atualizar a série materializada (só a EMA a partir do dia alterado) e
+            # salvar o recorte dos últimos 42 dias
+            refresh_fitness_metrics(enrich_workouts_with_tss(all_activities, config))
 
         # Persistir timestamp real da última sincronização (não depende de refresh do browser)
         try:
@@ -4332,30 +4728,45 @@ def fetch_garmin_data(email=None, password=None, config=None, use_tokens=True):
             pass
 
         # ========== BUSCAR DADOS DE SAÚDE E TRAINING STATUS ==========
+        enhanced_client = GarminEnhanced(client)
         try:
-            enhanced_client = GarminEnhanced(client)
             health_training_data = fetch_health_and_training_data(client, enhanced_client, config)
             
             # Salvar dados de saúde
             from storage import save_health_metrics, save_training_status
-            save_health_metrics(health_training_data['health'])
+            with DATA_WRITE_LOCK:
+                save_health_metrics(health_training_data['health'])
             save_training_status(health_training_data['training'])
         except Exception as e:
             import logging
             logging.warning(f"Aviso: Falha ao buscar dados de saúde/training: {e}")
             # Não falhar sincronização se saúde falhar - atividades já foram atualizadas
 
+        # ========== EXERCÍCIOS DE FORÇA (apenas os ainda não salvos) ==========
+        try:
+            enhanced_client.get_all_exercises(all_activities)
+        except Exception as e:
+            import logging
+            logging.warning(f"Aviso: Falha ao buscar exercícios de força: {e}")
+
+        # ========== STREAMS POR SEGUNDO (TSS por NP/NGP/zonas reais) ==========
+        try:
+            enhanced_client.sync_activity_streams(all_activities)
+        except Exception as e:
+            import logging
+            logging.warning(f"Aviso: Falha ao buscar streams das atividades: {e}")
+
         new_count = len(new_activities)
         total_count = len(all_activities)
-        dashboard_count = len(dashboard_activities)
 
-        return True, f"✅ Dados atualizados! {new_count} novas atividades, {total_count} total armazenadas, {dashboard_count} para Dashboard (42 dias)."
+        return True, f"✅ Dados atualizados! {new_count} novas atividades, {total_count} total armazenadas."
 
     except ImportError:
         return False, "❌ Erro: garminconnect não instalado. Instale com: pip install garminconnect"
     except Exception as e:
         return False, f"❌ Erro ao buscar dados: {str(e)}"
 
+@figure_cached('modality_subplot', params=('modality_key',))
 def create_modality_subplot_chart(data, modality_info, modality_key):
     """Cria gráfico com subplots 2x2 para evolução semanal da modalidade"""
     
@@ -4466,6 +4877,7 @@ def create_modality_subplot_chart(data, modality_info, modality_key):
     
     return fig
 
+@figure_cached('modality_trend', params=('modality_name',))
 def create_modality_trend_chart(data, modality_info, modality_name):
     """Cria gráfico de tendência consolidada com eixo duplo"""
     
@@ -4556,6 +4968,292 @@ def create_modality_trend_chart(data, modality_info, modality_name):
     
     return fig
 
+@figure_cached('modality_load', params=('modality_info',))
+def create_modality_load_chart(metrics, modality_info):
+    """Cria gráfico de CTL/ATL/TSB de uma modalidade"""
+    primary = (modality_info or {}).get('primary') or '#666'
+    dates = [m['date'] for m in metrics]
+    
+    fig = go.Figure()
+    fig.add_trace(go.Bar(
+        x=dates, y=[m['tsb'] for m in metrics], name='Forma (TSB)',
+        marker_color=['rgba(40,167,69,0.35)' if m['tsb'] >= 0 else 'rgba(220,53,69,0.35)' for m in metrics],
+        hovertemplate='<b>TSB</b><br>%{x}<br>%{y:.1f}<extra></extra>'
+    ))
+    fig.add_trace(go.Scatter(
+        x=dates, y=[m['ctl'] for m in metrics], mode='lines', name='Fitness (CTL)',
+        line=dict(color=primary, width=3),
+        hovertemplate='<b>CTL</b><br>%{x}<br>%{y:.1f}<extra></extra>'
+    ))
+    fig.add_trace(go.Scatter(
+        x=dates, y=[m['atl'] for m in metrics], mode='lines', name='Fadiga (ATL)',
+        line=dict(color=primary, width=2, dash='dot'),
+        hovertemplate='<b>ATL</b><br>%{x}<br>%{y:.1f}<extra></extra>'
+    ))
+    fig.update_layout(
+        height=350,
+        font=dict(family='Inter, -apple-system, sans-serif', size=12),
+        plot_bgcolor='rgba(248,249,250,0.5)',
+        paper_bgcolor='white',
+        hovermode='x unified',
+        legend=dict(orientation='h', yanchor='bottom', y=1.02, xanchor='center', x=0.5),
+        margin=dict(l=50, r=30, t=40, b=40)
+    )
+    fig.update_xaxes(showgrid=False)
+    fig.update_yaxes(showgrid=True, gridcolor='rgba(0,0,0,0.1)')
+    return fig
+
+@figure_cached('load_indices', params=('days',))
+def create_load_indices_chart(series, days=90):
+    """Cria gráfico de ACWR (móvel e EWMA), monotonia/strain e rampa de CTL"""
+    try:
+        end_date = datetime.now().date()
+        indices = indices_range(series, end_date - timedelta(days=days - 1), end_date)
+        dates = indices['dates']
+        
+        fig = make_subplots(
+            rows=3, cols=1, shared_xaxes=True, vertical_spacing=0.07,
+            subplot_titles=('ACWR (agudo:crônico)', 'Monotonia e Strain', 'Rampa de CTL (7 dias)'),
+            specs=[[{}], [{"secondary_y": True}], [{}]]
+        )
+        
+        # Faixa ideal do ACWR
+        fig.add_hrect(y0=ACWR_SWEET_SPOT[0], y1=ACWR_SWEET_SPOT[1], fillcolor='rgba(40,167,69,0.12)',
+                      line_width=0, row=1, col=1)
+        fig.add_hline(y=ACWR_DANGER, line=dict(color='#dc3545', dash='dash', width=1), row=1, col=1)
+        fig.add_trace(scatter(
+            dates, indices['acwr_rolling'], mode='lines', name='ACWR móvel',
+            line=dict(color='#17a2b8', width=2),
+            hovertemplate='<b>ACWR móvel</b><br>%{x}<br>%{y:.2f}<extra></extra>'
+        ), row=1, col=1)
+        fig.add_trace(scatter(
+            dates, indices['acwr_ewma'], mode='lines', name='ACWR EWMA',
+            line=dict(color='#007bff', width=2.5),
+            hovertemplate='<b>ACWR EWMA</b><br>%{x}<br>%{y:.2f}<extra></extra>'
+        ), row=1, col=1)
+        
+        fig.add_trace(bar(
+            dates, indices['strain'], name='Strain',
+            marker_color='rgba(111,66,193,0.3)',
+            hovertemplate='<b>Strain</b><br>%{x}<br>%{y:.0f}<extra></extra>'
+        ), row=2, col=1, secondary_y=True)
+        fig.add_trace(scatter(
+            dates, indices['monotony'], mode='lines', name='Monotonia',
+            line=dict(color='#6f42c1', width=2),
+            hovertemplate='<b>Monotonia</b><br>%{x}<br>%{y:.2f}<extra></extra>'
+        ), row=2, col=1)
+        fig.add_hline(y=MONOTONY_HIGH, line=dict(color='#dc3545', dash='dash', width=1), row=2, col=1)
+        
+        fig.add_trace(bar(
+            dates, indices['ramp'], name='Rampa',
+            marker_color=['#dc3545' if (v or 0) > RAMP_HIGH else '#28a745' if (v or 0) >= 0 else '#adb5bd'
+                          for v in indices['ramp']],
+            hovertemplate='<b>Rampa</b><br>%{x}<br>%{y:+.1f} CTL/semana<extra></extra>'
+        ), row=3, col=1)
+        
+        fig.update_layout(
+            height=500,
+            font=dict(family='Inter, -apple-system, sans-serif', size=12),
+            plot_bgcolor='rgba(248,249,250,0.5)',
+            paper_bgcolor='white',
+            hovermode='x unified',
+            legend=dict(orientation='h', yanchor='bottom', y=1.04, xanchor='center', x=0.5),
+            margin=dict(l=50, r=50, t=80, b=40)
+        )
+        fig.update_xaxes(showgrid=False)
+        fig.update_yaxes(showgrid=True, gridcolor='rgba(0,0,0,0.1)')
+        fig.update_yaxes(showgrid=False, secondary_y=True, row=2, col=1)
+        return fig
+    except Exception:
+        fig = go.Figure()
+        fig.update_layout(title="Sem dados suficientes para índices de carga", height=500)
+        return fig
+
+def create_performance_model_section(series, performance_model, days=365):
+    """Parâmetros ajustados e gráfico marcadores x desempenho modelado, por marcador"""
+    if not performance_model:
+        return html.P(
+            "Modelo ainda não ajustado: são necessárias pelo menos 8 semanas com melhor esforço "
+            "de 20 min (potência no ciclismo ou velocidade na corrida).",
+            className="text-muted text-center mb-0"
+        )
+    
+    end_date = datetime.now().date()
+    start_date = end_date - timedelta(days=days - 1)
+    markers = load_performance_markers()
+    
+    sections = []
+    for kind, params in performance_model.items():
+        spec = PERFORMANCE_MARKERS.get(kind)
+        if not spec:
+            continue
+        dates, predicted = performance_curve(series, params, start_date, end_date)
+        marker_days, marker_values = weekly_best(markers, kind)
+        recent = [(d, v) for d, v in zip(marker_days, marker_values) if d >= start_date.isoformat()]
+        
+        fig = go.Figure()
+        fig.add_trace(scatter(
+            dates, predicted, mode='lines', name='Modelo',
+            line=dict(color='#6f42c1', width=2.5),
+            hovertemplate=f"<b>Modelo</b><br>%{{x}}<br>%{{y:.1f}} {spec['unit']}<extra></extra>"
+        ))
+        fig.add_trace(go.Scatter(
+            x=[d for d, _ in recent], y=[v for _, v in recent], mode='markers', name='Melhor da semana',
+            marker=dict(color='#fd7e14', size=8),
+            hovertemplate=f"<b>Melhor esforço</b><br>%{{x}}<br>%{{y:.1f}} {spec['unit']}<extra></extra>"
+        ))
+        fig.update_layout(
+            title=spec['label'],
+            height=320,
+            font=dict(family='Inter, -apple-system, sans-serif', size=12),
+            plot_bgcolor='rgba(248,249,250,0.5)',
+            paper_bgcolor='white',
+            hovermode='x unified',
+            legend=dict(orientation='h', yanchor='bottom', y=1.02, xanchor='center', x=0.5),
+            margin=dict(l=50, r=30, t=60, b=40)
+        )
+        fig.update_xaxes(showgrid=False)
+        fig.update_yaxes(showgrid=True, gridcolor='rgba(0,0,0,0.1)', title_text=spec['unit'])
+        
+        sections.append(dbc.Row([
+            dbc.Col([
+                html.Div([
+                    html.H6(spec['label'], className="text-primary mb-2"),
+                    html.P([
+                        f"τ fitness: {params['tau_fitness']:.0f} dias", html.Br(),
+                        f"τ fadiga: {params['tau_fatigue']:.0f} dias", html.Br(),
+                        f"k1 / k2: {params['k1']:.3f} / {params['k2']:.3f}", html.Br(),
+                        f"Hoje: {predicted[-1]:.1f} {spec['unit']}" if predicted else "", html.Br(),
+                        html.Small(f"R² {params['r2']:.2f} · erro {params['rmse']:.1f} {spec['unit']} · "
+                                   f"{params['n_markers']} semanas", className="text-muted")
+                    ], className="small mb-0")
+                ], className="p-3 border rounded h-100")
+            ], md=3),
+            dbc.Col([
+                dcc.Graph(figure=fig, config={'displayModeBar': False})
+            ], md=9)
+        ], className="mb-3"))
+    
+    return html.Div(sections)
+
+def fitness_history_range(series):
+    """Intervalo completo da série: primeiro dia até hoje"""
+    return datetime.strptime(series['start'], '%Y-%m-%d').date(), datetime.now().date()
+
+def fitness_history_traces(series, start_date, end_date, n_points):
+    """Traces (x, y) de CTL, ATL e TSB em [start_date, end_date], reduzidos a até n_points por LTTB"""
+    metrics = series_to_metrics(series, start_date, end_date)
+    dates = [m['date'] for m in metrics]
+    return [downsample_xy(dates, [m[key] for m in metrics], n_points) for key in ('ctl', 'atl', 'tsb')]
+
+@figure_cached('fitness_history')
+def create_fitness_history_chart(series):
+    """Cria gráfico de CTL/ATL/TSB do histórico completo (largura padrão; zoom reamostra)"""
+    try:
+        start_date, end_date = fitness_history_range(series)
+        traces = fitness_history_traces(series, start_date, end_date, target_points())
+        # Dias da série completa: o WebGL é decidido pelo tamanho antes do LTTB
+        source_points = (end_date - start_date).days + 1
+        
+        fig = go.Figure()
+        for (x, y), (label, color) in zip(traces, [
+            ('💪 CTL (Forma Física)', '#1976d2'),
+            ('😴 ATL (Fadiga)', '#d32f2f'),
+            ('⚖️ TSB (Equilíbrio)', '#388e3c'),
+        ]):
+            fig.add_trace(scatter(
+                x, y, source_points=source_points, mode='lines', name=label,
+                line=dict(color=color, width=2),
+                hovertemplate=f'<b>{label}</b><br>%{{x}}<br>%{{y:.1f}}<extra></extra>'
+            ))
+        fig.add_hline(y=0, line=dict(color='rgba(0,0,0,0.3)', width=1))
+        
+        fig.update_layout(
+            height=380,
+            uirevision='fitness_history',
+            font=dict(family='Inter, -apple-system, sans-serif', size=12),
+            plot_bgcolor='rgba(248,249,250,0.5)',
+            paper_bgcolor='white',
+            hovermode='x unified',
+            legend=dict(orientation='h', yanchor='bottom', y=1.02, xanchor='center', x=0.5),
+            margin=dict(l=50, r=30, t=40, b=40)
+        )
+        fig.update_xaxes(showgrid=False)
+        fig.update_yaxes(showgrid=True, gridcolor='rgba(0,0,0,0.1)')
+        return fig
+    except Exception:
+        fig = go.Figure()
+        fig.update_layout(title="Sem dados suficientes para o histórico de fitness", height=380)
+        return fig
+
+@figure_cached('load_breakdown', params=('days',))
+def create_load_breakdown_chart(series, days=90):
+    """Cria gráfico de CTL por modalidade e TSS diário por fonte (tss, rtss, hrtss...)"""
+    try:
+        end_date = datetime.now().date()
+        start_date = end_date - timedelta(days=days - 1)
+        
+        category_info = {
+            'cycling': ('🚴 Ciclismo', '#28a745'),
+            'running': ('🏃 Corrida', '#fd7e14'),
+            'swimming': ('🏊 Natação', '#007bff'),
+            'strength': ('💪 Força', '#6f42c1'),
+            'other': ('🏅 Outros', '#6c757d'),
+        }
+        source_info = {
+            'tss': ('TSS (potência)', '#28a745'),
+            'rtss': ('rTSS (pace)', '#fd7e14'),
+            'hrtss': ('hrTSS (FC)', '#dc3545'),
+            'ttss': ('tTSS (tempo)', '#17a2b8'),
+            'estimated': ('Estimado', '#adb5bd'),
+        }
+        
+        fig = make_subplots(
+            rows=2, cols=1, shared_xaxes=True, vertical_spacing=0.08,
+            row_heights=[0.6, 0.4],
+            subplot_titles=(f'Fitness (CTL) por Modalidade - {days} dias', 'TSS Diário por Fonte')
+        )
+        
+        for name in LOAD_BREAKDOWNS['by_category']:
+            if name not in series.get('by_category', {}):
+                continue
+            label, color = category_info[name]
+            metrics = breakdown_to_metrics(series, 'by_category', name, start_date, end_date)
+            fig.add_trace(scatter(
+                [m['date'] for m in metrics], [m['ctl'] for m in metrics],
+                mode='lines', name=label, line=dict(color=color, width=2.5),
+                hovertemplate=f'<b>{label}</b><br>%{{x}}<br>CTL %{{y:.1f}}<extra></extra>'
+            ), row=1, col=1)
+        
+        for name in LOAD_BREAKDOWNS['by_tss_type']:
+            if name not in series.get('by_tss_type', {}):
+                continue
+            label, color = source_info[name]
+            metrics = breakdown_to_metrics(series, 'by_tss_type', name, start_date, end_date)
+            fig.add_trace(bar(
+                [m['date'] for m in metrics], [m['daily_tss'] for m in metrics],
+                name=label, marker_color=color,
+                hovertemplate=f'<b>{label}</b><br>%{{x}}<br>%{{y:.0f}} TSS<extra></extra>'
+            ), row=2, col=1)
+        
+        fig.update_layout(
+            barmode='stack',
+            height=550,
+            font=dict(family='Inter, -apple-system, sans-serif', size=12),
+            plot_bgcolor='rgba(248,249,250,0.5)',
+            paper_bgcolor='white',
+            hovermode='x unified',
+            legend=dict(orientation='h', yanchor='bottom', y=1.05, xanchor='center', x=0.5),
+            margin=dict(l=50, r=30, t=90, b=40)
+        )
+        fig.update_xaxes(showgrid=False)
+        fig.update_yaxes(showgrid=True, gridcolor='rgba(0,0,0,0.1)')
+        return fig
+    except Exception:
+        fig = go.Figure()
+        fig.update_layout(title="Sem dados suficientes para carga por modalidade", height=550)
+        return fig
+
 # Callback para modo escuro com persistência
 @app.callback(
     [Output('dark-mode-store', 'data'),
@@ -4633,6 +5331,35 @@ def update_last_sync_badge(active_tab):
 # Callbacks para o chat de IA
 @app.callback(
     [Output("chat-history", "children"),
+     Output("chat-oldest-id", "data"),
+     Output("chat-load-older", "style")],
+    [Input("chat-session", "data"),
+     Input("chat-load-older", "n_clicks")],
+    State("chat-oldest-id", "data")
+)
+def load_chat_history(session_id, older_clicks, oldest_id):
+    """Carrega a última página do histórico da sessão ou insere a página anterior no topo"""
+    ctx = dash.callback_context
+    triggered_id = ctx.triggered[0]['prop_id'].split('.')[0] if ctx.triggered else None
+
+    if triggered_id == "chat-load-older":
+        if oldest_id is None:
+            raise PreventUpdate
+        page = load_page(session_id, before_id=oldest_id)
+        patched = Patch()
+        for item in reversed(_chat_page_items(page)):
+            patched.prepend(item)
+        children = patched
+    else:
+        page = load_page(session_id)
+        children = _chat_page_items(page)
+
+    older_style = {'display': 'inline-block' if page['has_more'] else 'none'}
+    return children, page['oldest_id'] or oldest_id, older_style
+
+
+@app.callback(
+    [Output("chat-history", "children", allow_duplicate=True),
      Output("chat-input", "value")],
     [Input("send-chat-btn", "n_clicks"),
      Input("suggestion-1", "n_clicks"),
@@ -4642,14 +5369,14 @@ def update_last_sync_badge(active_tab):
      Input("suggestion-5", "n_clicks"),
      Input("suggestion-6", "n_clicks")],
     [State("chat-input", "value"),
-     State("chat-history", "children")],
+     State("chat-session", "data")],
     prevent_initial_call=True
 )
-def handle_chat_message(send_clicks, s1, s2, s3, s4, s5, s6, input_value, current_history):
-    """Processa mensagens do chat de IA"""
+def handle_chat_message(send_clicks, s1, s2, s3, s4, s5, s6, input_value, session_id):
+    """Processa mensagens do chat de IA (grava no chat_store e envia só as novas mensagens)"""
     ctx = dash.callback_context
     if not ctx.triggered:
-        return current_history, input_value
+        return dash.no_update, input_value
     
     # Determinar qual botão foi clicado
     triggered_id = ctx.triggered[0]['prop_id'].split('.')[0]
@@ -4670,7 +5397,7 @@ def handle_chat_message(send_clicks, s1, s2, s3, s4, s5, s6, input_value, curren
     elif triggered_id == "suggestion-6":
         user_message = "Análise da distribuição de volume por modalidade"
     else:
-        return current_history, ""
+        return dash.no_update, ""
     
     try:
         # Inicializar AI
@@ -4684,30 +5411,23 @@ def handle_chat_message(send_clicks, s1, s2, s3, s4, s5, s6, input_value, curren
         # Gerar resposta da IA
         response = ai.answer_question(user_message, metrics, workouts, config)
         
-        # Adicionar mensagens ao histórico
-        new_history = list(current_history) if current_history else []
-        
-        # Adicionar mensagem do usuário
-        new_history.append(
-            html.Div([
-                html.Strong("👤 Você: ", style={'color': '#007bff'}),
-                user_message
-            ], style={'marginBottom': '10px', 'padding': '8px', 'backgroundColor': '#e3f2fd', 'borderRadius': '8px'})
-        )
+        # Gravar pergunta e resposta no histórico da sessão
+        new_messages = [
+            {'role': 'user', 'content': user_message},
+            {'role': 'assistant', 'content': response},
+        ]
+        append_messages(session_id, new_messages)
         
-        # Adicionar resposta da IA
-        new_history.append(
-            html.Div([
-                html.Strong("🤖 IA: ", style={'color': '#28a745'}),
-                html.Div(response, style={'whiteSpace': 'pre-wrap', 'marginTop': '5px'})
-            ], style={'marginBottom': '15px', 'padding': '8px', 'backgroundColor': '#f8f9fa', 'borderRadius': '8px', 'borderLeft': '4px solid #28a745'})
-        )
+        # Enviar só as mensagens novas (o histórico já está no navegador)
+        new_history = Patch()
+        for message in new_messages:
+            new_history.append(_chat_message_div(message))
         
         return new_history, ""
         
     except Exception as e:
         # Em caso de erro, mostrar mensagem de erro
-        error_history = list(current_history) if current_history else []
+        error_history = Patch()
         error_history.append(
             html.Div([
                 html.Strong("❌ Erro: ", style={'color': '#dc3545'}),
@@ -4774,9 +5494,11 @@ def refresh_tokens_callback(n_clicks):
     State("config-hr-threshold", "value"),
     State("config-pace-threshold", "value"),
     State("config-swim-pace-threshold", "value"),
+    State("config-effective-date", "date"),
     prevent_initial_call=True
 )
-def save_config_callback(n_clicks, age, ftp, hr_max, hr_rest, hr_threshold, pace_threshold, swim_pace_threshold):
+def save_config_callback(n_clicks, age, ftp, hr_max, hr_rest, hr_threshold, pace_threshold, swim_pace_threshold,
+                         effective_date=None):
     """Salva configurações de fitness"""
     if n_clicks:
         try:
@@ -4800,7 +5522,21 @@ def save_config_callback(n_clicks, age, ftp, hr_max, hr_rest, hr_threshold, pace
                 "target_atl_max": 80,
             }
             
+            # Calibração de TSS não faz parte do formulário: manter a atual
+            previous_config = load_config()
+            if previous_config.get('tss_calibration'):
+                config['tss_calibration'] = previous_config['tss_calibration']
+            
+            # Limiares versionados: só atividades a partir da data efetiva mudam de TSS
+            history = threshold_history_or_default(load_threshold_history(), previous_config)
+            history, _ = update_threshold_history(
+                history, config, effective_date or datetime.now().date().isoformat()
+            )
+            save_threshold_history(history)
             save_config(config)
+            # Memo de TSS só mantém os fingerprints ainda presentes no histórico
+            invalidate_tss_memo(keep_config_fps={tss_config_fingerprint({**config, **e}) for e in history})
+            invalidate_data_context()
             return html.Div("✅ Configurações salvas com sucesso!", className="alert alert-success mt-3")
         except Exception as e:
             return html.Div(f"❌ Erro ao salvar configurações: {str(e)}", className="alert alert-danger mt-3")
@@ -5223,6 +5959,172 @@ def calculate_race_prediction(n_clicks, race_type, elevation):
             f"Erro ao calcular predição: {str(e)}"
         ], className="alert alert-danger")
 
+def create_tss_calibration_table(config):
+    """Tabela com os fatores de TSS em uso (padrão ou calibrados)"""
+    factors, rates = tss_calibration_factors(config)
+    calibration = config.get('tss_calibration') or {}
+    samples = calibration.get('samples') or {}
+    labels = {'cycling': '🚴 Ciclismo', 'running': '🏃 Corrida', 'swimming': '🏊 Natação',
+              'strength': '💪 Força', 'other': '🏅 Outras'}
+    
+    rows = []
+    for name, label in labels.items():
+        factor = f"{factors[name]:.3f}" if name in factors else "—"
+        n_factor = samples.get(f'hrtss_{name}', {}).get('n')
+        n_rate = samples.get(f'estimated_{name}', {}).get('n')
+        rows.append(html.Tr([
+            html.Td(label),
+            html.Td(factor + (f" ({n_factor})" if n_factor else "")),
+            html.Td(f"{rates[name]:.1f}" + (f" ({n_rate})" if n_rate else ""))
+        ]))
+    
+    caption = (f"Calibrado em {calibration['calibrated_at']} (n = atividades usadas)"
+               if calibration.get('calibrated_at') else "Valores padrão (ainda não calibrado)")
+    return html.Div([
+        dbc.Table([
+            html.Thead(html.Tr([html.Th("Modalidade"), html.Th("Fator hrTSS"), html.Th("TSS/hora estimado")])),
+            html.Tbody(rows)
+        ], bordered=True, size="sm", className="mb-1"),
+        html.Small(caption, className="text-muted")
+    ])
+
+# Callback da calibração de fatores de TSS
+@app.callback(
+    [Output('calibrate-tss-output', 'children'),
+     Output('calibrate-tss-table', 'children')],
+    Input('calibrate-tss-btn', 'n_clicks'),
+    prevent_initial_call=True
+)
+def calibrate_tss_callback(n_clicks):
+    """Ajusta os fatores de TSS ao histórico do atleta e salva na config"""
+    if not n_clicks:
+        return dash.no_update, dash.no_update
+    try:
+        config = load_config()
+        history = load_threshold_history()
+        calibration = calibrate_tss_factors(load_workouts(), config, history)
+        if not calibration['samples']:
+            return dbc.Alert("Atividades de referência insuficientes para calibrar.", color="warning", className="mt-3"), \
+                dash.no_update
+        
+        config['tss_calibration'] = calibration
+        save_config(config)
+        # Fatores novos mudam o fingerprint: TSS de todas as atividades é refeito no lote
+        history = threshold_history_or_default(history, config)
+        invalidate_tss_memo(keep_config_fps={tss_config_fingerprint({**config, **e}) for e in history})
+        invalidate_data_context()
+        return dbc.Alert(f"✅ Fatores calibrados com {len(calibration['samples'])} ajustes.", color="success", className="mt-3"), \
+            create_tss_calibration_table(config)
+    except Exception as e:
+        return html.Div(f"❌ Erro ao calibrar: {str(e)}", className="alert alert-danger mt-3"), dash.no_update
+
+def create_forecast_chart(forecast, plan):
+    """Cria gráfico em leque (percentis) de CTL/ATL/TSB previstos até a prova"""
+    dates = forecast['dates']
+    p = {value: i for i, value in enumerate(forecast['percentiles'])}
+    
+    fig = make_subplots(specs=[[{"secondary_y": True}]])
+    fig.add_trace(go.Bar(
+        x=dates, y=plan['daily_tss'], name='TSS planejado',
+        marker_color='rgba(108,117,125,0.25)',
+        hovertemplate='<b>TSS planejado</b><br>%{x}<br>%{y:.0f}<extra></extra>'
+    ), secondary_y=True)
+    
+    for metric, label, color in (('ctl', 'CTL', '#007bff'), ('atl', 'ATL', '#dc3545'), ('tsb', 'TSB', '#28a745')):
+        bands = forecast[metric]
+        rgb = f"{int(color[1:3], 16)},{int(color[3:5], 16)},{int(color[5:7], 16)}"
+        fig.add_trace(go.Scatter(
+            x=dates, y=bands[p[90]], mode='lines', line=dict(width=0),
+            showlegend=False, hoverinfo='skip'
+        ))
+        fig.add_trace(go.Scatter(
+            x=dates, y=bands[p[10]], mode='lines', line=dict(width=0),
+            fill='tonexty', fillcolor=f'rgba({rgb},0.15)',
+            name=f'{label} P10–P90', hoverinfo='skip'
+        ))
+        fig.add_trace(go.Scatter(
+            x=dates, y=bands[p[50]], mode='lines', name=f'{label} (mediana)',
+            line=dict(color=color, width=2.5),
+            hovertemplate=f'<b>{label}</b><br>%{{x}}<br>%{{y:.1f}}<extra></extra>'
+        ))
+    
+    fig.update_layout(
+        height=450,
+        font=dict(family='Inter, -apple-system, sans-serif', size=12),
+        plot_bgcolor='rgba(248,249,250,0.5)',
+        paper_bgcolor='white',
+        hovermode='x unified',
+        legend=dict(orientation='h', yanchor='bottom', y=1.02, xanchor='center', x=0.5),
+        margin=dict(l=50, r=50, t=60, b=40)
+    )
+    fig.update_yaxes(title_text='CTL / ATL / TSB', showgrid=True, gridcolor='rgba(0,0,0,0.1)', secondary_y=False)
+    fig.update_yaxes(title_text='TSS', showgrid=False, secondary_y=True)
+    fig.update_xaxes(showgrid=False)
+    return fig
+
+# Callback da previsão Monte Carlo de forma para a prova
+@app.callback(
+    Output('forecast-output', 'children'),
+    Input('forecast-btn', 'n_clicks'),
+    [State('forecast-race-date', 'date'),
+     State('forecast-target-ctl', 'value'),
+     State('forecast-adherence', 'value')],
+    prevent_initial_call=True
+)
+def update_load_forecast(n_clicks, race_date, target_ctl, adherence):
+    """Simula o plano sugerido até a prova e mostra as faixas de CTL/ATL/TSB"""
+    if not n_clicks or not race_date:
+        return dash.no_update
+    
+    try:
+        series = get_data_context()['series']
+        ctl_values = series.get('ctl') or [0.0]
+        current_ctl = ctl_values[-1]
+        race_day = datetime.strptime(race_date[:10], '%Y-%m-%d')
+        # O plano começa no dia seguinte ao último da série (mesmas datas de forecast_from_series)
+        if series.get('start'):
+            start = datetime.strptime(series['start'], '%Y-%m-%d') + timedelta(days=len(ctl_values))
+        else:
+            start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+        if race_day < start:
+            return dbc.Alert("Escolha uma data de prova futura.", color="warning")
+        
+        plan = planned_tss_schedule(start, race_day, current_ctl, float(target_ctl or 50))
+        forecast = forecast_from_series(
+            series, plan['daily_tss'],
+            adherence=max(0.1, min(1.0, float(adherence or 100) / 100))
+        )
+        final = forecast['final']
+        
+        def _race_day_card(title, metric, color):
+            values = final[metric]
+            return dbc.Col([
+                html.Div([
+                    html.H6(title, className="text-center text-muted"),
+                    html.H3(f"{values[50]:.1f}", className="text-center", style={'color': color}),
+                    html.P(f"P10–P90: {values[10]:.1f} a {values[90]:.1f}", className="text-center small text-muted mb-0")
+                ], className="p-3 border rounded")
+            ], md=4)
+        
+        return html.Div([
+            dbc.Row([
+                _race_day_card("Fitness (CTL) no dia da prova", 'ctl', '#007bff'),
+                _race_day_card("Fadiga (ATL) no dia da prova", 'atl', '#dc3545'),
+                _race_day_card("Forma (TSB) no dia da prova", 'tsb', '#28a745'),
+            ], className="mb-3"),
+            dcc.Graph(figure=create_forecast_chart(forecast, plan), config={'displayModeBar': False}),
+            html.Small(
+                f"{len(plan['daily_tss'])} dias simulados a partir de CTL {current_ctl:.1f} "
+                f"(fases: {', '.join(dict.fromkeys(plan['phases']))}).",
+                className="text-muted"
+            )
+        ])
+    except Exception as e:
+        return html.Div([
+            html.I(className="fas fa-exclamation-triangle me-2"),
+            f"Erro ao simular previsão: {str(e)}"
+        ], className="alert alert-danger")
+
 if __name__ == '__main__':
     app.run(host='127.0.0.1', port=8050)
 
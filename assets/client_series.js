@@ -0,0 +1,91 @@
+// Explorador de carga no navegador: recorta e desenha a série diária compacta
+// (client_series.py) sem voltar ao servidor ao trocar período ou métricas.
+(function() {
+    var DAY_MS = 86400000;
+    var decoded = {version: null, arrays: {}};
+
+    // base64 float32 -> Float32Array (uma vez por versão dos dados)
+    function decode(payload) {
+        if (decoded.version === payload.version) {
+            return decoded.arrays;
+        }
+        var arrays = {};
+        Object.keys(payload.arrays).forEach(function(name) {
+            var binary = atob(payload.arrays[name]);
+            var bytes = new Uint8Array(binary.length);
+            for (var i = 0; i < binary.length; i++) {
+                bytes[i] = binary.charCodeAt(i);
+            }
+            arrays[name] = new Float32Array(bytes.buffer);
+        });
+        decoded = {version: payload.version, arrays: arrays};
+        return arrays;
+    }
+
+    var TRACES = {
+        tss: {name: '🔥 TSS diário', type: 'bar', color: 'rgba(255, 152, 0, 0.45)', yaxis: 'y'},
+        ctl: {name: '💪 CTL', type: 'scatter', color: '#1976d2', yaxis: 'y'},
+        atl: {name: '😴 ATL', type: 'scatter', color: '#d32f2f', yaxis: 'y'},
+        tsb: {name: '⚖️ TSB', type: 'scatter', color: '#388e3c', yaxis: 'y'},
+        hours_cycling: {name: '🚴 Horas ciclismo', type: 'bar', color: '#28a745', yaxis: 'y2'},
+        hours_running: {name: '🏃 Horas corrida', type: 'bar', color: '#fd7e14', yaxis: 'y2'},
+        hours_swimming: {name: '🏊 Horas natação', type: 'bar', color: '#007bff', yaxis: 'y2'},
+        hours_strength: {name: '💪 Horas força', type: 'bar', color: '#6f42c1', yaxis: 'y2'},
+        hours_other: {name: '🏅 Horas outros', type: 'bar', color: '#6c757d', yaxis: 'y2'}
+    };
+
+    function figure(payload, period, metrics) {
+        if (!payload || !payload.days) {
+            return {data: [], layout: {title: {text: 'Sem dados de carga'}, height: 420}};
+        }
+        var arrays = decode(payload);
+        var days = period === 'all' ? payload.days : Math.min(payload.days, parseInt(period, 10));
+        var first = payload.days - days;
+        var x = new Array(days);
+        for (var i = 0; i < days; i++) {
+            x[i] = payload.start_ms + (first + i) * DAY_MS;
+        }
+        var usesHours = false;
+        var data = (metrics || []).filter(function(name) {
+            return TRACES[name] && arrays[name];
+        }).map(function(name) {
+            var spec = TRACES[name];
+            var trace = {
+                x: x,
+                y: Array.from(arrays[name].subarray(first, first + days)),
+                name: spec.name,
+                type: spec.type,
+                yaxis: spec.yaxis,
+                hovertemplate: '<b>' + spec.name + '</b><br>%{x|%d/%m/%Y}<br>%{y:.1f}<extra></extra>'
+            };
+            if (spec.type === 'bar') {
+                trace.marker = {color: spec.color};
+            } else {
+                trace.mode = 'lines';
+                trace.line = {color: spec.color, width: 2};
+            }
+            usesHours = usesHours || spec.yaxis === 'y2';
+            return trace;
+        });
+        return {
+            data: data,
+            layout: {
+                height: 420,
+                barmode: 'stack',
+                hovermode: 'x unified',
+                font: {family: 'Inter, -apple-system, sans-serif', size: 12},
+                plot_bgcolor: 'rgba(248,249,250,0.5)',
+                paper_bgcolor: 'white',
+                legend: {orientation: 'h', yanchor: 'bottom', y: 1.02, xanchor: 'center', x: 0.5},
+                margin: {l: 50, r: 50, t: 40, b: 40},
+                xaxis: {type: 'date', showgrid: false},
+                yaxis: {title: {text: 'TSS / CTL / ATL / TSB'}, gridcolor: 'rgba(0,0,0,0.1)'},
+                yaxis2: {title: {text: 'Horas'}, overlaying: 'y', side: 'right', showgrid: false, visible: usesHours}
+            }
+        };
+    }
+
+    window.dash_clientside = Object.assign({}, window.dash_clientside, {
+        client_series: {figure: figure}
+    });
+})();
@@ -49,6 +49,17 @@ def _init_cache_db():
                 expires_at TIMESTAMP
             )
         """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS tss_memo (
+                activity_key TEXT NOT NULL,
+                config_fp TEXT NOT NULL,
+                activity_sig TEXT NOT NULL,
+                tss REAL NOT NULL,
+                tss_type TEXT NOT NULL,
+                category TEXT NOT NULL,
+                PRIMARY KEY (activity_key, config_fp)
+            )
+        """)
         conn.commit()
         conn.close()
     except Exception:
@@ -202,6 +213,83 @@ def clear_expired() -> int:
         return 0
 
 
+# =============================================================================
+# MEMO DE TSS (activity_key, fingerprint da config) -> TSS derivado
+# =============================================================================
+
+# Camada em memória: {config_fp: {activity_key: (activity_sig, tss, tss_type, category)}}
+_tss_memo_mem = {}
+
+
+def get_tss_memo(config_fp: str) -> dict:
+    """
+    Retorna o memo de TSS de uma configuração (carregado do SQLite uma vez
+    por processo e mantido em memória).
+    """
+    memo = _tss_memo_mem.get(config_fp)
+    if memo is not None:
+        return memo
+    
+    memo = {}
+    try:
+        conn = sqlite3.connect(CACHE_DB)
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT activity_key, activity_sig, tss, tss_type, category FROM tss_memo WHERE config_fp = ?",
+            (config_fp,)
+        )
+        for key, sig, tss, tss_type, category in cursor.fetchall():
+            memo[key] = (sig, tss, tss_type, category)
+        conn.close()
+    except Exception:
+        pass
+    _tss_memo_mem[config_fp] = memo
+    return memo
+
+
+def set_tss_memo(config_fp: str, rows: dict) -> bool:
+    """
+    Grava entradas no memo de TSS.
+    
+    Args:
+        config_fp: Fingerprint da configuração
+        rows: {activity_key: (activity_sig, tss, tss_type, category)}
+    """
+    if not rows:
+        return True
+    _tss_memo_mem.setdefault(config_fp, {}).update(rows)
+    try:
+        conn = sqlite3.connect(CACHE_DB)
+        cursor = conn.cursor()
+        cursor.executemany("""
+            INSERT OR REPLACE INTO tss_memo (activity_key, config_fp, activity_sig, tss, tss_type, category)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, [(key, config_fp, *values) for key, values in rows.items()])
+        conn.commit()
+        conn.close()
+        return True
+    except Exception:
+        return False
+
+
+def invalidate_tss_memo(keep_config_fps=()) -> bool:
+    """Remove o memo de TSS de todos os fingerprints exceto keep_config_fps"""
+    keep = set(keep_config_fps)
+    for fp in list(_tss_memo_mem):
+        if fp not in keep:
+            del _tss_memo_mem[fp]
+    try:
+        conn = sqlite3.connect(CACHE_DB)
+        cursor = conn.cursor()
+        placeholders = ','.join('?' * len(keep))
+        cursor.execute(f"DELETE FROM tss_memo WHERE config_fp NOT IN ({placeholders})", tuple(keep))
+        conn.commit()
+        conn.close()
+        return True
+    except Exception:
+        return False
+
+
 def get_cache_stats() -> dict:
     """Retorna estatísticas do cache"""
     try:
@@ -17,10 +17,16 @@ Fórmulas principais:
 - ATL = exponential moving average de 7 dias do TSS diário  
 - TSB = CTL - ATL
 """
+import hashlib
+import logging
 import math
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple, Any
 
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
 
 # =============================================================================
 # CONSTANTES
@@ -45,6 +51,48 @@ HR_ZONE_TSS_PER_HOUR = {
     6: 140,  # Zone 6 (Anaerobic): ~140 TSS/hour
 }
 
+# Fatores padrão do hrTSS por categoria (comparação com TrainingPeaks de um atleta);
+# config['tss_calibration'] substitui pelos fatores ajustados ao próprio atleta
+HRTSS_ADJUSTMENT_FACTORS = {'swimming': 0.54, 'strength': 1.17, 'other': 1.0}
+
+
+# Tipos de atividade (typeKey do Garmin) por categoria
+# Ciclismo
+CYCLING_TYPES = frozenset({
+    'cycling', 'road_cycling', 'mountain_biking', 'indoor_cycling', 
+    'gravel_cycling', 'virtual_cycling', 'virtual_ride', 'indoor_biking', 
+    'bike', 'biking', 'e_bike_ride', 'e_mountain_bike_ride',
+    'commute_cycling', 'touring_cycling', 'recumbent_cycling', 'cyclocross', 
+    'road_biking', 'gravel_biking', 'tandem_cycling', 'bmx', 'fat_bike', 
+    'track_cycling', 'spin_bike'
+})
+
+# Corrida
+RUNNING_TYPES = frozenset({
+    'running', 'treadmill_running', 'track_running', 'trail_running', 
+    'indoor_running', 'virtual_running'
+})
+
+# Natação
+SWIMMING_TYPES = frozenset({
+    'swimming', 'pool_swimming', 'open_water_swimming', 
+    'indoor_swimming', 'lap_swimming'
+})
+
+# Força/HIIT
+STRENGTH_TYPES = frozenset({
+    'strength_training', 'weight_training', 'functional_strength_training', 
+    'gym_strength_training', 'crossfit', 'hiit'
+})
+
+# typeKey -> categoria (consulta única em _activity_category)
+_TYPE_KEY_CATEGORY = {
+    **{t: 'cycling' for t in CYCLING_TYPES},
+    **{t: 'running' for t in RUNNING_TYPES},
+    **{t: 'swimming' for t in SWIMMING_TYPES},
+    **{t: 'strength' for t in STRENGTH_TYPES},
+}
+
 
 # =============================================================================
 # FUNÇÕES AUXILIARES
@@ -66,43 +114,7 @@ def _activity_category(activity: dict) -> str:
     else:
         type_key = str(activity_type).lower()
 
-    # Ciclismo
-    cycling_types = {
-        'cycling', 'road_cycling', 'mountain_biking', 'indoor_cycling', 
-        'gravel_cycling', 'virtual_cycling', 'virtual_ride', 'indoor_biking', 
-        'bike', 'biking', 'e_bike_ride', 'e_mountain_bike_ride',
-        'commute_cycling', 'touring_cycling', 'recumbent_cycling', 'cyclocross', 
-        'road_biking', 'gravel_biking', 'tandem_cycling', 'bmx', 'fat_bike', 
-        'track_cycling', 'spin_bike'
-    }
-    
-    # Corrida
-    running_types = {
-        'running', 'treadmill_running', 'track_running', 'trail_running', 
-        'indoor_running', 'virtual_running'
-    }
-    
-    # Natação
-    swimming_types = {
-        'swimming', 'pool_swimming', 'open_water_swimming', 
-        'indoor_swimming', 'lap_swimming'
-    }
-    
-    # Força/HIIT
-    strength_types = {
-        'strength_training', 'weight_training', 'functional_strength_training', 
-        'gym_strength_training', 'crossfit', 'hiit'
-    }
-
-    if type_key in cycling_types:
-        return 'cycling'
-    if type_key in running_types:
-        return 'running'
-    if type_key in swimming_types:
-        return 'swimming'
-    if type_key in strength_types:
-        return 'strength'
-    return 'other'
+    return _TYPE_KEY_CATEGORY.get(type_key, 'other')
 
 
 def _parse_mmss_to_seconds(value: str, default_seconds: int = 300) -> int:
@@ -346,7 +358,8 @@ def calculate_hrtss(
     lthr: float,
     hr_max: float = None,
     hr_rest: float = None,
-    activity_type: str = 'other'
+    activity_type: str = 'other',
+    adjustment: Optional[float] = None
 ) -> float:
     """
     Calcula hrTSS (heart rate based TSS) alinhado com TrainingPeaks.
@@ -366,6 +379,8 @@ def calculate_hrtss(
         hr_max: FC máxima (não usado nesta implementação)
         hr_rest: FC de repouso (não usado nesta implementação)
         activity_type: Tipo da atividade ('swimming', 'strength_training', 'other')
+        adjustment: Fator calibrado para o atleta (calibrate_tss_factors);
+            None usa os fatores padrão abaixo
     
     Returns:
         float: hrTSS calculado
@@ -377,16 +392,18 @@ def calculate_hrtss(
     hr_intensity_factor = avg_hr / lthr
     base_tss = duration_hours * (hr_intensity_factor ** 2) * 100
     
-    # Ajustes específicos por tipo de atividade (calibrados com TrainingPeaks)
-    if activity_type == 'swimming':
-        # Natação: fator médio 0.54 (range 0.52-0.56)
-        adjustment = 0.54
-    elif activity_type == 'strength_training':
-        # Musculação: fator médio 1.17 (range 1.13-1.20)
-        adjustment = 1.17
-    else:
-        # Outras atividades: fórmula padrão
-        adjustment = 1.0
+    # Ajustes específicos por tipo de atividade (calibrados com TrainingPeaks);
+    # um fator calibrado para o atleta tem precedência
+    if adjustment is None:
+        if activity_type == 'swimming':
+            # Natação: fator médio 0.54 (range 0.52-0.56)
+            adjustment = HRTSS_ADJUSTMENT_FACTORS['swimming']
+        elif activity_type == 'strength_training':
+            # Musculação: fator médio 1.17 (range 1.13-1.20)
+            adjustment = HRTSS_ADJUSTMENT_FACTORS['strength']
+        else:
+            # Outras atividades: fórmula padrão
+            adjustment = HRTSS_ADJUSTMENT_FACTORS['other']
     
     hrtss = base_tss * adjustment
     
@@ -497,7 +514,7 @@ def calculate_ttss(
 # FUNÇÃO PRINCIPAL DE CÁLCULO DE TSS
 # =============================================================================
 
-def compute_tss_variants(activity: dict, config: dict) -> dict:
+def compute_tss_variants(activity: dict, config: dict, stream: Optional[dict] = None) -> dict:
     """
     Calcula TSS padronizado para cada modalidade.
     
@@ -509,9 +526,13 @@ def compute_tss_variants(activity: dict, config: dict) -> dict:
     
     Fallback: Se dados específicos não disponíveis, usa estimativa de 50 TSS/hora
     
+    Com stream por segundo (stream), usa NP/NGP/tempo em zonas reais
+    (compute_stream_tss) e só cai no cálculo por resumo se o stream não servir.
+    
     Args:
         activity: Dicionário com dados da atividade
         config: Configurações do usuário (ftp, lthr, thresholds, etc)
+        stream: Streams por segundo da atividade (opcional)
     
     Returns:
         dict: {
@@ -521,6 +542,11 @@ def compute_tss_variants(activity: dict, config: dict) -> dict:
             'breakdown': dict     # Detalhes dos cálculos
         }
     """
+    if stream:
+        stream_result = compute_stream_tss(activity, stream, config)
+        if stream_result is not None:
+            return stream_result
+    
     category = _activity_category(activity)
     duration_sec = _safe_float(activity.get('duration', 0))
     
@@ -542,6 +568,8 @@ def compute_tss_variants(activity: dict, config: dict) -> dict:
     
     pace_threshold_sec = _parse_mmss_to_seconds(pace_threshold_str, 300)
     swim_pace_threshold_sec = _parse_mmss_to_seconds(swim_pace_threshold_str, 120)
+    hrtss_factors, estimated_rates = tss_calibration_factors(config)
+    estimated_rate = estimated_rates[category]
     
     # Extrair dados da atividade
     avg_hr = _get_avg_hr(activity)
@@ -570,9 +598,9 @@ def compute_tss_variants(activity: dict, config: dict) -> dict:
         else:
             # Sem dados de potência, usar estimativa básica
             duration_hours = duration_sec / 3600
-            tss_value = duration_hours * 50
+            tss_value = duration_hours * estimated_rate
             tss_type = 'estimated'
-            breakdown['estimated'] = {'value': tss_value, 'rate_per_hour': 50}
+            breakdown['estimated'] = {'value': tss_value, 'rate_per_hour': estimated_rate}
     
     # ==========================================================================
     # CORRIDA - SEMPRE rTSS (pace-based)
@@ -592,16 +620,17 @@ def compute_tss_variants(activity: dict, config: dict) -> dict:
         else:
             # Sem dados de pace, usar estimativa básica
             duration_hours = duration_sec / 3600
-            tss_value = duration_hours * 50
+            tss_value = duration_hours * estimated_rate
             tss_type = 'estimated'
-            breakdown['estimated'] = {'value': tss_value, 'rate_per_hour': 50}
+            breakdown['estimated'] = {'value': tss_value, 'rate_per_hour': estimated_rate}
     
     # ==========================================================================
     # NATAÇÃO - SEMPRE hrTSS (heart rate based)
     # ==========================================================================
     elif category == 'swimming':
         if avg_hr > 0 and lthr > 0:
-            tss_value = calculate_hrtss(duration_sec, avg_hr, lthr, hr_max, hr_rest, activity_type='swimming')
+            tss_value = calculate_hrtss(duration_sec, avg_hr, lthr, hr_max, hr_rest, activity_type='swimming',
+                                        adjustment=hrtss_factors['swimming'])
             tss_type = 'hrtss'
             breakdown['hrtss'] = {'value': tss_value, 'avg_hr': avg_hr, 'lthr': lthr}
         elif avg_hr > 0:
@@ -611,9 +640,9 @@ def compute_tss_variants(activity: dict, config: dict) -> dict:
         else:
             # Sem dados de FC, usar estimativa básica
             duration_hours = duration_sec / 3600
-            tss_value = duration_hours * 50
+            tss_value = duration_hours * estimated_rate
             tss_type = 'estimated'
-            breakdown['estimated'] = {'value': tss_value, 'rate_per_hour': 50}
+            breakdown['estimated'] = {'value': tss_value, 'rate_per_hour': estimated_rate}
     
     # ==========================================================================
     # FORÇA E OUTRAS - SEMPRE hrTSS (heart rate based)
@@ -622,7 +651,8 @@ def compute_tss_variants(activity: dict, config: dict) -> dict:
         if avg_hr > 0 and lthr > 0:
             # Força/Musculação usa fator específico
             activity_type = 'strength_training' if category == 'strength' else 'other'
-            tss_value = calculate_hrtss(duration_sec, avg_hr, lthr, hr_max, hr_rest, activity_type=activity_type)
+            tss_value = calculate_hrtss(duration_sec, avg_hr, lthr, hr_max, hr_rest, activity_type=activity_type,
+                                        adjustment=hrtss_factors[category])
             tss_type = 'hrtss'
             breakdown['hrtss'] = {'value': tss_value, 'avg_hr': avg_hr, 'lthr': lthr}
         elif avg_hr > 0:
@@ -630,11 +660,282 @@ def compute_tss_variants(activity: dict, config: dict) -> dict:
             tss_type = 'ttss'
             breakdown['ttss'] = {'value': tss_value, 'avg_hr': avg_hr}
         else:
-            # Estimativa básica: ~50 TSS por hora de atividade moderada
+            # Estimativa básica: ~50 TSS por hora de atividade moderada (ou taxa calibrada)
             duration_hours = duration_sec / 3600
-            tss_value = duration_hours * 50
+            tss_value = duration_hours * estimated_rate
             tss_type = 'estimated'
-            breakdown['estimated'] = {'value': tss_value, 'rate_per_hour': 50}
+            breakdown['estimated'] = {'value': tss_value, 'rate_per_hour': estimated_rate}
+    
+    return {
+        'tss': round(tss_value, 1),
+        'tss_type': tss_type,
+        'category': category,
+        'breakdown': breakdown
+    }
+
+
+# =============================================================================
+# TSS A PARTIR DE STREAMS (dados por segundo)
+# =============================================================================
+
+# Janela da média móvel de NP/NGP (segundos)
+NP_ROLLING_WINDOW = 30
+
+# Intervalos maiores que isso (pausas) não contam tempo de zona/esforço
+STREAM_MAX_GAP_SECONDS = 30
+
+# Limites de % do LTHR entre as zonas 1..6 (mesmos de _get_hr_zone)
+HR_ZONE_BOUNDS_PCT = (81, 90, 94, 100, 106)
+
+# Mínimo de amostras válidas para usar o stream no lugar do resumo
+MIN_STREAM_SECONDS = 60
+
+
+def _resample_1hz(time: np.ndarray, values: np.ndarray) -> List[np.ndarray]:
+    """
+    Reamostra um stream (tempo em segundos) para grade de 1 Hz por interpolação.
+    Amostras com tempo não finito (lacunas do activity details) são descartadas.
+    
+    Intervalos maiores que STREAM_MAX_GAP_SECONDS (auto-pause, perda de sinal)
+    não são interpolados: o stream é dividido em trechos contínuos, para que a
+    média móvel/janela de esforço não atravesse a pausa.
+    
+    Returns:
+        Lista de trechos a 1 Hz (em ordem)
+    """
+    finite = np.isfinite(time)
+    time, values = time[finite], values[finite]
+    if len(time) < 2:
+        return [values]
+    breaks = np.flatnonzero(np.diff(time) > STREAM_MAX_GAP_SECONDS) + 1
+    segments = []
+    for seg_time, seg_values in zip(np.split(time, breaks), np.split(values, breaks)):
+        grid = np.arange(seg_time[0], seg_time[-1] + 1, 1.0)
+        segments.append(np.interp(grid, seg_time, seg_values))
+    return segments
+
+
+def _stream_samples(stream: dict, name: str) -> Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """
+    Amostras válidas de uma coluna do stream: linhas com tempo e valor finitos.
+    
+    Returns:
+        (valores, tempo em s desde a primeira amostra, máscara das linhas
+        mantidas) ou None se sobram menos de MIN_STREAM_SECONDS amostras ou a
+        coluna é toda zero. Sem coluna de tempo assume 1 Hz.
+    """
+    values = stream.get(name)
+    if values is None or len(values) < MIN_STREAM_SECONDS:
+        return None
+    values = np.asarray(values, dtype=np.float64)
+    time = stream.get('time')
+    if time is None or len(time) != len(values):
+        time = np.arange(len(values), dtype=np.float64)
+    else:
+        time = np.asarray(time, dtype=np.float64)
+    keep = np.isfinite(time) & np.isfinite(values)
+    if np.count_nonzero(keep) < MIN_STREAM_SECONDS:
+        return None
+    values, time = values[keep], time[keep]
+    if np.max(values) <= 0:
+        return None
+    return values, time - time[0], keep
+
+
+def _masked_column(stream: dict, name: str, keep: np.ndarray) -> Optional[np.ndarray]:
+    """Coluna auxiliar (altitude, distância) nas mesmas linhas de _stream_samples"""
+    values = stream.get(name)
+    if values is None or len(values) != len(keep):
+        return None
+    return np.asarray(values, dtype=np.float64)[keep]
+
+
+def _rolling_means(values_1hz: np.ndarray, window: int) -> np.ndarray:
+    """Médias móveis de `window` s de um trecho contínuo a 1 Hz (cumsum)"""
+    if len(values_1hz) < window:
+        return np.empty(0)
+    csum = np.cumsum(np.insert(values_1hz, 0, 0.0))
+    return (csum[window:] - csum[:-window]) / window
+
+
+def _rolling_fourth_power_mean(segments: List[np.ndarray], window: int = NP_ROLLING_WINDOW) -> float:
+    """Média móvel de `window` s em cada trecho, média da 4ª potência e raiz 4ª"""
+    rolling = np.concatenate([_rolling_means(segment, window) for segment in segments])
+    if len(rolling) == 0:
+        return 0.0
+    return float(np.mean(rolling ** 4) ** 0.25)
+
+
+def normalized_power_stream(power: np.ndarray, time: Optional[np.ndarray] = None) -> float:
+    """
+    Normalized Power a partir do stream de potência.
+    
+    Equivalente vetorizado de power_pace_analysis.calculate_normalized_power,
+    com reamostragem para 1 Hz quando o stream é irregular.
+    """
+    power = np.nan_to_num(np.asarray(power, dtype=np.float64), nan=0.0)
+    segments = [power]
+    if time is not None and len(power) > 1:
+        segments = _resample_1hz(np.asarray(time, dtype=np.float64), power)
+    return _rolling_fourth_power_mean(segments)
+
+
+def _grade_cost_factor(grade: np.ndarray) -> np.ndarray:
+    """
+    Custo energético relativo da corrida em rampa (Minetti et al., 2002),
+    normalizado para 1.0 no plano: C(i) / C(0).
+    """
+    i = np.clip(grade, -0.45, 0.45)
+    cost = 155.4 * i**5 - 30.4 * i**4 - 43.3 * i**3 + 46.3 * i**2 + 19.5 * i + 3.6
+    return cost / 3.6
+
+
+def normalized_graded_speed_stream(
+    speed: np.ndarray,
+    time: Optional[np.ndarray] = None,
+    altitude: Optional[np.ndarray] = None,
+    distance: Optional[np.ndarray] = None
+) -> float:
+    """
+    Velocidade normalizada ajustada por rampa (base do NGP) em m/s.
+    
+    A velocidade de cada segundo é multiplicada pelo custo relativo da rampa
+    (altitude/distância) e depois normalizada como o NP (média móvel de 30 s,
+    4ª potência). NGP (s/km) = 1000 / resultado.
+    """
+    speed = np.nan_to_num(np.asarray(speed, dtype=np.float64), nan=0.0)
+    n = len(speed)
+    time = np.arange(n, dtype=np.float64) if time is None else np.asarray(time, dtype=np.float64)
+    
+    if altitude is not None and len(altitude) == n and n > 1:
+        altitude = np.asarray(altitude, dtype=np.float64)
+        if distance is not None and len(distance) == n:
+            dist = np.asarray(distance, dtype=np.float64)
+        else:
+            dist = np.concatenate(([0.0], np.cumsum(speed[1:] * np.diff(time))))
+        # Rampa em janelas de ~10 m para reduzir ruído do altímetro
+        d_dist = np.gradient(dist)
+        d_alt = np.gradient(altitude)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            grade = np.where(d_dist > 0.5, d_alt / d_dist, 0.0)
+        kernel = np.ones(10) / 10
+        grade = np.convolve(np.nan_to_num(grade), kernel, mode='same')
+        speed = speed * _grade_cost_factor(grade)
+    
+    segments = _resample_1hz(time, speed) if n > 1 else [speed]
+    return _rolling_fourth_power_mean(segments)
+
+
+def hr_zone_seconds(hr: np.ndarray, time: Optional[np.ndarray], lthr: float) -> np.ndarray:
+    """
+    Segundos em cada zona de FC (1-6), pelas fronteiras de _get_hr_zone.
+    
+    Returns:
+        array de 7 posições (índice = zona; posição 0 não usada)
+    """
+    hr = np.asarray(hr, dtype=np.float64)
+    n = len(hr)
+    time = np.arange(n, dtype=np.float64) if time is None else np.asarray(time, dtype=np.float64)
+    dt = np.diff(time, append=time[-1] + 1.0 if n else 0.0)
+    dt = np.where((dt > 0) & (dt <= STREAM_MAX_GAP_SECONDS), dt, 0.0)
+    valid = hr > 0
+    pct = hr[valid] / lthr * 100
+    zones = np.digitize(pct, HR_ZONE_BOUNDS_PCT) + 1
+    return np.bincount(zones, weights=dt[valid], minlength=7)
+
+
+def hrtss_from_zones(hr: np.ndarray, time: Optional[np.ndarray], lthr: float) -> float:
+    """hrTSS pelo tempo real em cada zona × HR_ZONE_TSS_PER_HOUR"""
+    if lthr <= 0 or hr is None or len(hr) == 0:
+        return 0.0
+    seconds = hr_zone_seconds(hr, time, lthr)
+    rates = np.array([0.0] + [HR_ZONE_TSS_PER_HOUR[z] for z in range(1, 7)])
+    return float(np.dot(seconds / 3600.0, rates))
+
+
+def compute_stream_tss(activity: dict, stream: Optional[dict], config: dict) -> Optional[dict]:
+    """
+    Calcula TSS a partir dos streams por segundo, quando existem.
+    
+    - Ciclismo: NP real (média móvel de 30 s) → TSS
+    - Corrida: NGP (velocidade × custo da rampa) → rTSS
+    - Natação/Força/Outras: tempo em cada zona de FC → hrTSS
+    
+    Args:
+        activity: Atividade (resumo)
+        stream: {'time', 'power', 'heart_rate', 'speed', 'altitude', 'distance'} (arrays)
+        config: Configuração (limiares vigentes na data da atividade)
+    
+    Returns:
+        Mesmo formato de compute_tss_variants, ou None se o stream não
+        permite o cálculo (o chamador usa o caminho por resumo)
+    """
+    if not stream:
+        return None
+    try:
+        return _compute_stream_tss(activity, stream, config)
+    except (ValueError, TypeError, IndexError, FloatingPointError) as e:
+        logger.warning(f"Stream inválido para {activity.get('activityId')}, usando resumo: {e}")
+        return None
+
+
+def _compute_stream_tss(activity: dict, stream: dict, config: dict) -> Optional[dict]:
+    """Corpo de compute_stream_tss (erros numéricos tratados pelo chamador)"""
+    
+    category = _activity_category(activity)
+    duration_sec = _safe_float(activity.get('duration', 0))
+    if duration_sec <= 0:
+        return None
+    
+    ftp = _safe_float(config.get('ftp', 0))
+    lthr = _safe_float(config.get('hr_threshold', 0)) or _safe_float(config.get('lthr', 0))
+    pace_threshold_sec = _parse_mmss_to_seconds(config.get('pace_threshold', '5:00'), 300)
+    
+    tss_value = None
+    tss_type = None
+    breakdown = {}
+    
+    if category == 'cycling':
+        samples = _stream_samples(stream, 'power')
+        if samples is not None and ftp > 0:
+            power, time, _ = samples
+            np_value = normalized_power_stream(power, time)
+            if np_value > 0:
+                tss_value = calculate_tss_cycling(duration_sec, np_value, ftp, True)
+                tss_type = 'tss'
+                breakdown['tss'] = {'value': tss_value, 'power': np_value, 'ftp': ftp,
+                                    'if': np_value / ftp, 'duration_h': duration_sec / 3600, 'source': 'stream'}
+    
+    elif category == 'running':
+        samples = _stream_samples(stream, 'speed')
+        if samples is not None and pace_threshold_sec > 0:
+            speed, time, keep = samples
+            ngs = normalized_graded_speed_stream(
+                speed, time, _masked_column(stream, 'altitude', keep), _masked_column(stream, 'distance', keep)
+            )
+            if ngs > 0:
+                tss_value = calculate_rtss_running(duration_sec, ngs, pace_threshold_sec)
+                tss_type = 'rtss'
+                breakdown['rtss'] = {'value': tss_value, 'ngp_sec_km': 1000 / ngs,
+                                     'threshold_pace_sec_km': pace_threshold_sec,
+                                     'if': pace_threshold_sec / (1000 / ngs), 'source': 'stream'}
+    
+    if tss_value is None and category not in ('cycling', 'running'):
+        samples = _stream_samples(stream, 'heart_rate')
+        if samples is not None and lthr > 0:
+            hr, time, _ = samples
+            # Mesmo fator por modalidade (e calibração do atleta) do hrTSS por resumo
+            hrtss_factors, _ = tss_calibration_factors(config)
+            adjustment = hrtss_factors.get(category, hrtss_factors['other'])
+            tss_value = hrtss_from_zones(hr, time, lthr) * adjustment
+            if tss_value > 0:
+                tss_type = 'hrtss'
+                breakdown['hrtss'] = {'value': tss_value, 'lthr': lthr, 'adjustment': adjustment, 'source': 'stream'}
+            else:
+                tss_value = None
+    
+    if tss_value is None:
+        return None
     
     return {
         'tss': round(tss_value, 1),
@@ -644,10 +945,487 @@ def compute_tss_variants(activity: dict, config: dict) -> dict:
     }
 
 
+def best_effort_stream(values: np.ndarray, time: Optional[np.ndarray] = None, window: int = 1200) -> float:
+    """Maior média de `window` segundos contínuos do stream (ex.: melhor potência de 20 min)"""
+    values = np.nan_to_num(np.asarray(values, dtype=np.float64), nan=0.0)
+    segments = [values]
+    if time is not None and len(values) > 1:
+        segments = _resample_1hz(np.asarray(time, dtype=np.float64), values)
+    # A janela precisa caber num trecho contínuo (não atravessa pausas)
+    rolling = np.concatenate([_rolling_means(segment, window) for segment in segments])
+    return float(np.max(rolling)) if len(rolling) else 0.0
+
+
+# =============================================================================
+# CÁLCULO DE TSS EM LOTE (VETORIZADO)
+# =============================================================================
+
+# Códigos inteiros das categorias nas colunas do lote
+CATEGORY_CODES = {'cycling': 0, 'running': 1, 'swimming': 2, 'strength': 3, 'other': 4}
+CATEGORY_NAMES = np.array(list(CATEGORY_CODES), dtype=object)
+
+# Fontes de TSS possíveis (campo 'tss_type' das atividades enriquecidas)
+TSS_SOURCE_TYPES = ('tss', 'rtss', 'hrtss', 'ttss', 'estimated')
+
+# Taxa da estimativa básica (TSS/hora) quando não há dados de intensidade
+ESTIMATED_TSS_PER_HOUR = 50
+
+
+def tss_calibration_factors(config: dict) -> Tuple[Dict[str, float], Dict[str, float]]:
+    """
+    Fatores do hrTSS e taxas da estimativa básica por categoria, já com a
+    calibração do atleta (config['tss_calibration']) sobre os padrões.
+    
+    Returns:
+        (fatores hrTSS {swimming, strength, other}, TSS/hora estimado por categoria)
+    """
+    calibration = config.get('tss_calibration') or {}
+    factors = dict(HRTSS_ADJUSTMENT_FACTORS)
+    for key, value in (calibration.get('hrtss_factors') or {}).items():
+        if key in factors and _safe_float(value, 0.0) > 0:
+            factors[key] = float(value)
+    rates = {category: float(ESTIMATED_TSS_PER_HOUR) for category in CATEGORY_CODES}
+    for key, value in (calibration.get('estimated_tss_per_hour') or {}).items():
+        if key in rates and _safe_float(value, 0.0) > 0:
+            rates[key] = float(value)
+    return factors, rates
+
+
+def extract_tss_columns(activities: list) -> Dict[str, np.ndarray]:
+    """
+    Extrai das atividades as colunas usadas pelo cálculo de TSS em lote.
+    
+    Faz a sondagem de campos (FC, potência) uma única vez por atividade,
+    com as mesmas regras de _get_avg_hr/_get_power.
+    
+    Returns:
+        dict de arrays NumPy: category (códigos), duration, power, is_np,
+        avg_speed, distance, avg_hr
+    """
+    n = len(activities)
+    category = np.empty(n, dtype=np.int8)
+    duration = np.empty(n, dtype=np.float64)
+    power = np.empty(n, dtype=np.float64)
+    is_np = np.empty(n, dtype=bool)
+    avg_speed = np.empty(n, dtype=np.float64)
+    distance = np.empty(n, dtype=np.float64)
+    avg_hr = np.empty(n, dtype=np.float64)
+    
+    for i, activity in enumerate(activities):
+        category[i] = CATEGORY_CODES[_activity_category(activity)]
+        duration[i] = _safe_float(activity.get('duration', 0))
+        power[i], is_np[i] = _get_power(activity)
+        avg_speed[i] = _safe_float(activity.get('averageSpeed', 0))
+        distance[i] = _safe_float(activity.get('distance', 0))
+        avg_hr[i] = _get_avg_hr(activity)
+    
+    return {
+        'category': category,
+        'duration': duration,
+        'power': power,
+        'is_np': is_np,
+        'avg_speed': avg_speed,
+        'distance': distance,
+        'avg_hr': avg_hr,
+    }
+
+
+# Campos de config que afetam o TSS (mudou um deles -> TSS precisa ser recalculado)
+TSS_CONFIG_FIELDS = (
+    'ftp', 'hr_threshold', 'lthr', 'pace_threshold', 'swim_pace_threshold', 'hr_max', 'hr_rest',
+    'tss_calibration',
+)
+
+# Campos da atividade lidos por compute_tss_variants
+TSS_ACTIVITY_FIELDS = (
+    'duration', 'averageSpeed', 'distance',
+    'normalizedPower', 'normPower', 'np', 'averagePower', 'avgPower', 'power',
+    'averageHR', 'avgHR', 'avgHr', 'averageHeartRate', 'avgHeartRate',
+)
+
+
+def tss_config_fingerprint(config: dict) -> str:
+    """Hash estável dos campos de config que influenciam o TSS"""
+    raw = repr([(k, config.get(k)) for k in TSS_CONFIG_FIELDS])
+    return hashlib.md5(raw.encode()).hexdigest()[:16]
+
+
+def tss_activity_signature(activity: dict) -> str:
+    """Hash estável dos campos da atividade que influenciam o TSS"""
+    activity_type = activity.get('activityType', {})
+    type_key = activity_type.get('typeKey', '') if isinstance(activity_type, dict) else activity_type
+    raw = repr((type_key, [activity.get(k) for k in TSS_ACTIVITY_FIELDS]))
+    return hashlib.md5(raw.encode()).hexdigest()[:16]
+
+
+# =============================================================================
+# HISTÓRICO DE LIMIARES (thresholds vigentes em cada data)
+# =============================================================================
+
+# Limiares versionados por data (cada atividade usa os vigentes no seu dia)
+THRESHOLD_FIELDS = (
+    'ftp', 'hr_threshold', 'pace_threshold', 'swim_pace_threshold',
+    'swim_css', 'hr_max', 'hr_rest', 'weight',
+)
+
+# Data efetiva da primeira entrada criada a partir da config atual
+THRESHOLD_HISTORY_ORIGIN = '1970-01-01'
+
+
+def threshold_history_or_default(history: list, config: dict) -> list:
+    """Histórico de limiares; sem histórico, a config atual vale desde sempre"""
+    if history:
+        return sorted(history, key=lambda e: e['effective_date'])
+    entry = {k: config[k] for k in THRESHOLD_FIELDS if k in config}
+    return [{'effective_date': THRESHOLD_HISTORY_ORIGIN, **entry}]
+
+
+def update_threshold_history(history: list, config: dict, effective_date) -> Tuple[list, bool]:
+    """
+    Registra os limiares de config a partir de effective_date.
+    
+    Args:
+        history: Histórico atual (ordenado por effective_date)
+        config: Configuração com os novos limiares
+        effective_date: Data a partir da qual os limiares valem (date ou 'YYYY-MM-DD')
+    
+    Returns:
+        (novo histórico, True se algum limiar mudou)
+    """
+    day = effective_date.isoformat() if hasattr(effective_date, 'isoformat') else str(effective_date)[:10]
+    fields = {k: config[k] for k in THRESHOLD_FIELDS if k in config}
+    history = [dict(e) for e in history]
+    
+    current = None
+    for entry in history:
+        if entry['effective_date'] <= day:
+            current = entry
+    if current is not None and all(current.get(k) == v for k, v in fields.items()):
+        return history, False
+    
+    if current is not None and current['effective_date'] == day:
+        current.update(fields)
+    else:
+        history.append({'effective_date': day, **fields})
+        history.sort(key=lambda e: e['effective_date'])
+    return history, True
+
+
+def activity_dates(activities: list) -> np.ndarray:
+    """Data local de cada atividade como datetime64[D] (NaT se ausente)"""
+    days = []
+    for activity in activities:
+        start = activity.get('startTimeLocal') or activity.get('startTime') or activity.get('startTimeGMT') or ''
+        days.append(str(start)[:10] or 'NaT')
+    try:
+        return np.array(days, dtype='datetime64[D]')
+    except ValueError:
+        result = np.empty(len(days), dtype='datetime64[D]')
+        for i, day in enumerate(days):
+            try:
+                result[i] = np.datetime64(day, 'D')
+            except ValueError:
+                result[i] = np.datetime64('NaT')
+        return result
+
+
+def threshold_index(history: list, dates: np.ndarray) -> np.ndarray:
+    """
+    Índice da entrada do histórico vigente em cada data (busca binária).
+    
+    Datas anteriores à primeira entrada usam a primeira; datas ausentes (NaT)
+    usam a mais recente.
+    """
+    effective = np.array([e['effective_date'] for e in history], dtype='datetime64[D]')
+    index = np.searchsorted(effective, dates, side='right') - 1
+    index[np.isnat(dates)] = len(history) - 1
+    return np.clip(index, 0, len(history) - 1)
+
+
+def config_as_of(config: dict, history: list, index: np.ndarray) -> dict:
+    """
+    Config com os limiares substituídos por arrays por atividade (as-of),
+    no formato aceito por compute_tss_batch.
+    """
+    merged = [{**config, **entry} for entry in history]
+    defaults = {'hr_max': 191, 'hr_rest': 50}
+    result = dict(config)
+    for key in ('ftp', 'hr_threshold', 'lthr', 'hr_max', 'hr_rest'):
+        values = np.array([_safe_float(m.get(key, defaults.get(key, 0)), 0.0) for m in merged])
+        result[key] = values[index]
+    pace = np.array([float(_parse_mmss_to_seconds(m.get('pace_threshold', '5:00'), 300)) for m in merged])
+    result['pace_threshold'] = pace[index]
+    return result
+
+
+def compute_tss_as_of(activities: list, config: dict, history: list) -> Dict[str, np.ndarray]:
+    """TSS em lote usando, para cada atividade, os limiares vigentes na sua data"""
+    history = threshold_history_or_default(history, config)
+    index = threshold_index(history, activity_dates(activities))
+    return compute_tss_batch(extract_tss_columns(activities), config_as_of(config, history, index))
+
+
+# =============================================================================
+# CALIBRAÇÃO DE FATORES DE TSS POR ATLETA
+# =============================================================================
+
+# Mínimo de atividades de referência para ajustar um fator
+CALIBRATION_MIN_SAMPLES = 5
+
+# Limites de plausibilidade dos valores ajustados
+HRTSS_FACTOR_RANGE = (0.3, 2.0)
+ESTIMATED_RATE_RANGE = (20.0, 120.0)
+
+
+def _lstsq_through_origin(x: np.ndarray, y: np.ndarray) -> Optional[float]:
+    """Coeficiente c de y ≈ c·x por mínimos quadrados (None sem amostras suficientes)"""
+    if len(x) < CALIBRATION_MIN_SAMPLES:
+        return None
+    denominator = float(x @ x)
+    return float(x @ y) / denominator if denominator > 0 else None
+
+
+def calibrate_tss_factors(activities: list, config: dict, history: Optional[list] = None) -> dict:
+    """
+    Ajusta ao atleta os fatores do hrTSS e as taxas da estimativa básica.
+    
+    Referências, todas do próprio histórico:
+    - TSS medido (potência no ciclismo, pace na corrida)
+    - Carga de treino do Garmin (activityTrainingLoad), convertida para a
+      escala de TSS pela relação com o TSS medido nas mesmas atividades
+    
+    Ajustes (mínimos quadrados pela origem, em lote):
+    - natação/força/outras: hrTSS base (sem fator) × fator ≈ carga Garmin em TSS;
+      'outras' cai para a relação hrTSS base × TSS medido no ciclismo/corrida
+    - TSS/hora estimado por categoria: TSS de referência ≈ taxa × horas
+    
+    Returns:
+        dict no formato de config['tss_calibration'] (fatores sem amostras
+        suficientes mantêm o valor padrão)
+    """
+    base_config = {k: v for k, v in config.items() if k != 'tss_calibration'}
+    history = threshold_history_or_default(history or [], base_config)
+    index = threshold_index(history, activity_dates(activities))
+    columns = extract_tss_columns(activities)
+    as_of = config_as_of(base_config, history, index)
+    result = compute_tss_batch(columns, as_of)
+    
+    category = np.asarray(columns['category'])
+    hours = np.asarray(columns['duration'], dtype=np.float64) / 3600.0
+    avg_hr = np.asarray(columns['avg_hr'], dtype=np.float64)
+    lthr = np.asarray(as_of['hr_threshold'], dtype=np.float64)
+    lthr = np.where(lthr > 0, lthr, np.asarray(as_of['lthr'], dtype=np.float64))
+    tss = np.asarray(result['tss'], dtype=np.float64)
+    garmin_load = np.array([_safe_float(a.get('activityTrainingLoad'), 0.0) for a in activities])
+    
+    measured = np.isin(result['tss_type'], ('tss', 'rtss')) & (tss > 0) & (hours > 0)
+    base_hrtss = np.zeros(len(activities))
+    has_hr = (avg_hr > 0) & (lthr > 0) & (hours > 0)
+    base_hrtss[has_hr] = hours[has_hr] * (avg_hr[has_hr] / lthr[has_hr]) ** 2 * 100
+    
+    # Escala carga Garmin -> TSS aprendida onde há TSS medido
+    m = measured & (garmin_load > 0)
+    load_scale = _lstsq_through_origin(garmin_load[m], tss[m])
+    
+    factors, rates = tss_calibration_factors({})
+    samples = {}
+    for name in HRTSS_ADJUSTMENT_FACTORS:
+        rows = (category == CATEGORY_CODES[name]) & (base_hrtss > 0) & (garmin_load > 0)
+        fitted = None
+        if load_scale:
+            fitted = _lstsq_through_origin(base_hrtss[rows], load_scale * garmin_load[rows])
+            source = 'garmin_load'
+        if fitted is None and name == 'other':
+            rows = measured & (base_hrtss > 0)
+            fitted = _lstsq_through_origin(base_hrtss[rows], tss[rows])
+            source = 'measured_tss'
+        if fitted is not None:
+            factors[name] = round(float(np.clip(fitted, *HRTSS_FACTOR_RANGE)), 3)
+            samples[f'hrtss_{name}'] = {'n': int(rows.sum()), 'source': source}
+    
+    # TSS de referência por atividade: medido ou hrTSS com os fatores novos
+    reference = np.where(measured, tss, 0.0)
+    for name, factor in factors.items():
+        rows = ~measured & (category == CATEGORY_CODES[name]) & (base_hrtss > 0)
+        reference[rows] = base_hrtss[rows] * factor
+    for name, code in CATEGORY_CODES.items():
+        rows = (category == code) & (reference > 0) & (hours > 0)
+        fitted = _lstsq_through_origin(hours[rows], reference[rows])
+        if fitted is not None:
+            rates[name] = round(float(np.clip(fitted, *ESTIMATED_RATE_RANGE)), 1)
+            samples[f'estimated_{name}'] = {'n': int(rows.sum()), 'source': 'reference_tss'}
+    
+    return {
+        'hrtss_factors': factors,
+        'estimated_tss_per_hour': rates,
+        'garmin_load_scale': round(load_scale, 4) if load_scale else None,
+        'samples': samples,
+        'calibrated_at': datetime.now().date().isoformat(),
+    }
+
+
+def _config_column(config: dict, key: str, default: float, n: int) -> np.ndarray:
+    """Valor de config como array de n linhas (aceita escalar ou array por atividade)"""
+    value = config.get(key, default)
+    if np.ndim(value) == 0:
+        return np.full(n, _safe_float(value, 0.0))
+    if isinstance(value, np.ndarray) and value.dtype.kind == 'f':
+        return value
+    return np.asarray([_safe_float(v, 0.0) for v in value], dtype=np.float64)
+
+
+def _pace_column(config: dict, key: str, default_str: str, default_sec: int, n: int) -> np.ndarray:
+    """Pace threshold (mm:ss ou segundos) como array de segundos"""
+    value = config.get(key, default_str)
+    if np.ndim(value) == 0:
+        return np.full(n, float(_parse_mmss_to_seconds(value, default_sec)))
+    if isinstance(value, np.ndarray) and value.dtype.kind == 'f':
+        return value
+    return np.asarray([
+        float(_parse_mmss_to_seconds(v, default_sec)) if isinstance(v, str) else _safe_float(v, default_sec)
+        for v in value
+    ], dtype=np.float64)
+
+
+def _round_like_python(values: np.ndarray, ndigits: int = 1) -> np.ndarray:
+    """
+    Arredonda como round() do Python.
+    
+    np.round (escala × 10^n) pode divergir de round() em valores muito
+    próximos de ...5; esses casos são refeitos com round() escalar.
+    """
+    rounded = np.round(values, ndigits)
+    scaled = values * (10 ** ndigits)
+    frac = np.abs(scaled - np.floor(scaled) - 0.5)
+    for i in np.flatnonzero(frac < 1e-6):
+        rounded[i] = round(float(values[i]), ndigits)
+    return rounded
+
+
+def compute_tss_batch(columns: Dict[str, np.ndarray], config: dict) -> Dict[str, np.ndarray]:
+    """
+    Calcula TSS para várias atividades de uma vez (equivalente a
+    compute_tss_variants aplicado a cada atividade, com resultados idênticos).
+    
+    Usa máscaras NumPy por categoria, na mesma ordem de operações do caminho
+    escalar para reproduzir os mesmos floats. O tTSS (só usado sem LTHR)
+    chama calculate_ttss por linha para manter math.exp.
+    
+    Args:
+        columns: Saída de extract_tss_columns
+        config: Configurações do usuário; ftp/lthr/hr_* e pace thresholds
+            podem ser escalares ou arrays por atividade
+    
+    Returns:
+        dict de arrays: tss (arredondado em 1 casa), tss_type, category, if
+    """
+    category = np.asarray(columns['category'])
+    duration = np.asarray(columns['duration'], dtype=np.float64)
+    power = np.asarray(columns['power'], dtype=np.float64)
+    avg_speed = np.asarray(columns['avg_speed'], dtype=np.float64)
+    avg_hr = np.asarray(columns['avg_hr'], dtype=np.float64)
+    n = len(duration)
+    
+    ftp = _config_column(config, 'ftp', 0, n)
+    lthr = _config_column(config, 'hr_threshold', 0, n)
+    lthr = np.where(lthr != 0, lthr, _config_column(config, 'lthr', 0, n))
+    hr_max = _config_column(config, 'hr_max', 191, n)
+    hr_rest = _config_column(config, 'hr_rest', 50, n)
+    pace_threshold = _pace_column(config, 'pace_threshold', '5:00', 300, n)
+    
+    # Fatores por código de categoria (ciclismo/corrida não usam hrTSS)
+    hrtss_factors, estimated_rates = tss_calibration_factors(config)
+    hrtss_by_code = np.array([
+        hrtss_factors.get(name, hrtss_factors['other']) for name in CATEGORY_CODES
+    ])
+    estimated_by_code = np.array([estimated_rates[name] for name in CATEGORY_CODES])
+    
+    tss = np.zeros(n)
+    intensity = np.zeros(n)
+    tss_type = np.full(n, 'none', dtype=object)
+    
+    valid = ~(duration <= 0)
+    duration_hours = duration / 3600.0
+    
+    is_cycling = valid & (category == CATEGORY_CODES['cycling'])
+    is_running = valid & (category == CATEGORY_CODES['running'])
+    is_hr_based = valid & ~is_cycling & ~is_running
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Ciclismo: TSS = IF² × horas × 100
+        m = is_cycling & (power > 0) & (ftp > 0)
+        if_cycling = power[m] / ftp[m]
+        tss[m] = (if_cycling ** 2) * duration_hours[m] * 100.0
+        intensity[m] = if_cycling
+        tss_type[m] = 'tss'
+        
+        # Corrida: rTSS com IF = threshold / pace atual
+        m = is_running & (avg_speed > 0) & (pace_threshold > 0)
+        actual_pace = 1000.0 / avg_speed[m]
+        if_running = pace_threshold[m] / actual_pace
+        tss[m] = (if_running ** 2) * duration_hours[m] * 100.0
+        intensity[m] = if_running
+        tss_type[m] = 'rtss'
+        
+        # Natação/Força/Outras: hrTSS com fator por tipo
+        m = is_hr_based & (avg_hr > 0) & (lthr > 0)
+        if_hr = avg_hr[m] / lthr[m]
+        base_tss = duration_hours[m] * (if_hr ** 2) * 100
+        adjustment = hrtss_by_code[category[m]]
+        tss[m] = base_tss * adjustment
+        intensity[m] = if_hr
+        tss_type[m] = 'hrtss'
+    
+    # FC sem LTHR: tTSS (TRIMP) linha a linha
+    for i in np.flatnonzero(is_hr_based & (avg_hr > 0) & ~(lthr > 0)):
+        tss[i] = calculate_ttss(float(duration[i]), float(avg_hr[i]), float(hr_max[i]), float(hr_rest[i]), float(lthr[i]))
+        tss_type[i] = 'ttss'
+    
+    # Sem dados de intensidade: estimativa básica
+    m = valid & (tss_type == 'none')
+    tss[m] = duration_hours[m] * estimated_by_code[category[m]]
+    tss_type[m] = 'estimated'
+    
+    return {
+        'tss': _round_like_python(tss, 1),
+        'tss_type': tss_type,
+        'category': CATEGORY_NAMES[category],
+        'if': intensity,
+    }
+
+
 # =============================================================================
 # CÁLCULO DE MÉTRICAS DE FITNESS (CTL, ATL, TSB)
 # =============================================================================
 
+def _activity_day(activity: dict):
+    """
+    Dia (datetime.date) de uma atividade, ou None se não houver horário.
+    
+    Aceita "YYYY-MM-DD HH:MM:SS", ISO (com ou sem Z) e startTimeInSeconds.
+    Levanta ValueError/TypeError para horários inválidos.
+    """
+    start_time = (
+        activity.get('startTimeLocal')
+        or activity.get('startTime')
+        or activity.get('startTimeGMT')
+        or activity.get('startTimeUtc')
+        or ''
+    )
+    start_seconds = activity.get('startTimeInSeconds') or activity.get('startTimeInSecondsGMT')
+
+    if start_time:
+        # Normalizar formato de data (aceita "YYYY-MM-DD HH:MM:SS" e ISO)
+        if 'T' not in start_time:
+            start_time = start_time.replace(' ', 'T')
+        if start_time.endswith('Z'):
+            return datetime.fromisoformat(start_time.replace('Z', '+00:00')).date()
+        return datetime.fromisoformat(start_time).date()
+    if start_seconds:
+        return datetime.utcfromtimestamp(float(start_seconds)).date()
+    return None
+
+
 def calculate_fitness_metrics(
     activities: list, 
     config: dict, 
@@ -691,27 +1469,9 @@ def calculate_fitness_metrics(
     daily_tss = {}
     
     for activity in activities:
-        start_time = (
-            activity.get('startTimeLocal')
-            or activity.get('startTime')
-            or activity.get('startTimeGMT')
-            or activity.get('startTimeUtc')
-            or ''
-        )
-        start_seconds = activity.get('startTimeInSeconds') or activity.get('startTimeInSecondsGMT')
-
         try:
-            if start_time:
-                # Normalizar formato de data (aceita "YYYY-MM-DD HH:MM:SS" e ISO)
-                if 'T' not in start_time:
-                    start_time = start_time.replace(' ', 'T')
-                if start_time.endswith('Z'):
-                    date = datetime.fromisoformat(start_time.replace('Z', '+00:00')).date()
-                else:
-                    date = datetime.fromisoformat(start_time).date()
-            elif start_seconds:
-                date = datetime.utcfromtimestamp(float(start_seconds)).date()
-            else:
+            date = _activity_day(activity)
+            if date is None:
                 continue
 
             # Reutilizar TSS pré-calculado (quando o app já enriqueceu dinamicamente)
@@ -733,19 +1493,17 @@ def calculate_fitness_metrics(
         days.append(current_date)
         current_date += timedelta(days=1)
     
-    # Calcular métricas usando EMA
-    metrics = []
-    ctl = initial_ctl
-    atl = initial_atl
+    # Calcular métricas usando EMA (motor vetorizado, uma linha por constante)
+    # CTL = CTL_prev + (TSS - CTL_prev) / τ
+    tss_by_day = [daily_tss.get(day, 0.0) for day in days]
+    ema = ema_load_matrix(
+        tss_by_day,
+        (CTL_TIME_CONSTANT, ATL_TIME_CONSTANT),
+        initial=(initial_ctl, initial_atl)
+    )
     
-    for day in days:
-        tss_today = daily_tss.get(day, 0.0)
-        
-        # EMA update
-        # CTL = CTL_prev + (TSS - CTL_prev) / τ
-        ctl = ctl + (tss_today - ctl) / CTL_TIME_CONSTANT
-        atl = atl + (tss_today - atl) / ATL_TIME_CONSTANT
-        
+    metrics = []
+    for day, tss_today, ctl, atl in zip(days, tss_by_day, ema[0].tolist(), ema[1].tolist()):
         # TSB (Form) = CTL (Fitness) - ATL (Fatigue)
         tsb = ctl - atl
         
@@ -762,6 +1520,278 @@ def calculate_fitness_metrics(
     return metrics
 
 
+# =============================================================================
+# MOTOR DE EMA VETORIZADO (modelos de carga)
+# =============================================================================
+
+# Variantes de decaimento: 'linear' = TrainingPeaks (x/τ), 'exp' = exata (1 - e^(-1/τ))
+EMA_DECAY_VARIANTS = ('linear', 'exp')
+
+# Faixa máxima de a^-k dentro de um bloco (~1e12) para manter a precisão do cumsum
+_EMA_CHUNK_LOG_RANGE = 12 * math.log(10)
+
+
+def ema_decay_factor(time_constant: float, decay: str = 'linear') -> float:
+    """Fator de retenção diário `a` da EMA y_t = a·y_(t-1) + (1-a)·x_t"""
+    if decay == 'exp':
+        return math.exp(-1.0 / time_constant)
+    if decay == 'linear':
+        return 1.0 - 1.0 / time_constant
+    raise ValueError(f"decay deve ser um de {EMA_DECAY_VARIANTS}")
+
+
+def ema_load_matrix(
+    daily_tss,
+    time_constants=(CTL_TIME_CONSTANT, ATL_TIME_CONSTANT),
+    decay: str = 'linear',
+    initial=0.0
+) -> np.ndarray:
+    """
+    EMA de carga para várias constantes de tempo de uma vez.
+    
+    Usa a forma fechada por blocos: dentro de um bloco de L dias,
+    y_j = a^j · (y_0 + (1-a) · Σ_{i≤j} x_i · a^-i), calculada com cumsum.
+    L é limitado para a^-L não passar de ~1e12 (sem overflow/perda de precisão).
+    
+    Args:
+        daily_tss: TSS diário, shape (dias,) ou (séries, dias)
+        time_constants: Constantes τ em dias (ex.: (7, 28, 42, 60))
+        decay: 'linear' (TrainingPeaks: y += (x - y)/τ) ou 'exp' (e^(-1/τ))
+        initial: Valor inicial; escalar, um por constante, ou (constantes, séries)
+    
+    Returns:
+        Matriz (constantes, dias) — ou (constantes, séries, dias) para entrada 2D
+    """
+    x = np.asarray(daily_tss, dtype=np.float64)
+    one_dim = x.ndim == 1
+    if one_dim:
+        x = x[None, :]
+    n_series, n_days = x.shape
+    taus = np.atleast_1d(np.asarray(time_constants, dtype=np.float64))
+    
+    init = np.asarray(initial, dtype=np.float64)
+    if init.ndim == 1 and init.shape[0] == len(taus):
+        init = init[:, None]
+    init = np.broadcast_to(init, (len(taus), n_series))
+    
+    out = np.empty((len(taus), n_series, n_days))
+    for k, tau in enumerate(taus):
+        a = ema_decay_factor(tau, decay)
+        b = 1.0 - a
+        if n_days == 0:
+            continue
+        if a <= 0.0:
+            out[k] = x
+            continue
+        chunk = max(1, min(n_days, int(_EMA_CHUNK_LOG_RANGE / -math.log(a))))
+        steps = np.arange(1, chunk + 1)
+        powers = a ** steps
+        inverse = a ** -steps.astype(np.float64)
+        y_prev = init[k].copy()
+        for c0 in range(0, n_days, chunk):
+            block = x[:, c0:c0 + chunk]
+            m = block.shape[1]
+            acc = np.cumsum(block * inverse[:m], axis=1)
+            y = powers[:m] * (y_prev[:, None] + b * acc)
+            out[k, :, c0:c0 + m] = y
+            y_prev = y[:, -1]
+    
+    return out[:, 0, :] if one_dim else out
+
+
+def ema_fitness_forward(
+    daily_tss,
+    initial_ctl: float = 0.0,
+    initial_atl: float = 0.0
+) -> Tuple[list, list]:
+    """
+    CTL/ATL dia a dia a partir de uma série de TSS diário (mesma EMA de
+    calculate_fitness_metrics, sem arredondamento).
+    
+    Returns:
+        (lista de CTL, lista de ATL), uma posição por dia
+    """
+    if len(daily_tss) == 0:
+        return [], []
+    ema = ema_load_matrix(daily_tss, (CTL_TIME_CONSTANT, ATL_TIME_CONSTANT), initial=(initial_ctl, initial_atl))
+    return ema[0].tolist(), ema[1].tolist()
+
+
+def grouped_daily_load(day_offsets, tss, group_codes, n_groups: int, n_days: int) -> np.ndarray:
+    """
+    TSS diário somado por grupo em uma única passada (np.add.at).
+    
+    Args:
+        day_offsets: Dia de cada contribuição (índice 0..n_days-1; fora da faixa é ignorado)
+        tss: TSS de cada contribuição
+        group_codes: Grupo de cada contribuição (0..n_groups-1); a mesma
+            atividade pode aparecer em vários grupos repetindo o dia/TSS
+    
+    Returns:
+        Matriz (grupos, dias)
+    """
+    day_offsets = np.asarray(day_offsets, dtype=np.int64)
+    group_codes = np.asarray(group_codes, dtype=np.int64)
+    tss = np.asarray(tss, dtype=np.float64)
+    load = np.zeros((n_groups, max(n_days, 0)))
+    inside = (day_offsets >= 0) & (day_offsets < n_days)
+    np.add.at(load, (group_codes[inside], day_offsets[inside]), tss[inside])
+    return load
+
+
+def grouped_fitness_series(
+    day_offsets,
+    tss,
+    group_codes,
+    n_groups: int,
+    n_days: int,
+    initial_ctl=0.0,
+    initial_atl=0.0
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    CTL/ATL de vários grupos (modalidade, fonte de TSS, total...) de uma vez:
+    agrupa a carga diária e roda a EMA sobre a matriz inteira.
+    
+    Args:
+        initial_ctl / initial_atl: Escalar ou um valor por grupo
+    
+    Returns:
+        (carga diária, CTL, ATL), cada um com shape (grupos, dias)
+    """
+    load = grouped_daily_load(day_offsets, tss, group_codes, n_groups, n_days)
+    initial = np.stack([
+        np.broadcast_to(np.asarray(initial_ctl, dtype=np.float64), (n_groups,)),
+        np.broadcast_to(np.asarray(initial_atl, dtype=np.float64), (n_groups,)),
+    ])
+    ema = ema_load_matrix(load, (CTL_TIME_CONSTANT, ATL_TIME_CONSTANT), initial=initial)
+    return load, ema[0], ema[1]
+
+
+# =============================================================================
+# MODELO DE DESEMPENHO DE BANISTER (fitness-fadiga)
+# =============================================================================
+
+# p(t) = p0 + k1·g(t) - k2·h(t), com g/h = Σ_{s<t} TSS(s)·e^(-(t-s)/τ)
+BANISTER_TAU_FITNESS_GRID = tuple(float(t) for t in range(15, 61))
+BANISTER_TAU_FATIGUE_GRID = tuple(float(t) for t in range(2, 21))
+
+# Mínimo de marcadores de desempenho para ajustar os 5 parâmetros
+BANISTER_MIN_MARKERS = 8
+
+# Respostas ao impulso já calculadas: (hash da carga, τs) -> matriz
+_banister_kernel_cache: Dict[Tuple[str, Tuple[float, ...]], np.ndarray] = {}
+_BANISTER_CACHE_SIZE = 8
+
+
+def banister_responses(daily_tss, time_constants) -> np.ndarray:
+    """
+    Resposta ao impulso Σ_{s<t} TSS(s)·e^(-(t-s)/τ) para cada τ (uma linha por τ).
+    
+    Reaproveita o motor EMA (decaimento exato): y_t = a·y_(t-1) + (1-a)·x_t
+    => resposta(t) = a·y_(t-1) / (1-a). Resultados ficam em cache pela carga + τs.
+    """
+    x = np.asarray(daily_tss, dtype=np.float64)
+    taus = tuple(float(t) for t in np.atleast_1d(time_constants))
+    key = (hashlib.md5(x.tobytes()).hexdigest(), taus)
+    cached = _banister_kernel_cache.get(key)
+    if cached is not None:
+        return cached
+    
+    responses = np.zeros((len(taus), x.size))
+    if x.size > 1:
+        ema = ema_load_matrix(x, taus, decay='exp')
+        a = np.exp(-1.0 / np.asarray(taus))[:, None]
+        responses[:, 1:] = a * ema[:, :-1] / (1.0 - a)
+    
+    if len(_banister_kernel_cache) >= _BANISTER_CACHE_SIZE:
+        _banister_kernel_cache.pop(next(iter(_banister_kernel_cache)))
+    _banister_kernel_cache[key] = responses
+    return responses
+
+
+def banister_performance(daily_tss, params: dict) -> np.ndarray:
+    """Desempenho modelado p(t) para todos os dias da carga"""
+    responses = banister_responses(daily_tss, (params['tau_fitness'], params['tau_fatigue']))
+    return params['p0'] + params['k1'] * responses[0] - params['k2'] * responses[1]
+
+
+def fit_banister(
+    daily_tss,
+    marker_days,
+    marker_values,
+    tau_fitness_grid=BANISTER_TAU_FITNESS_GRID,
+    tau_fatigue_grid=BANISTER_TAU_FATIGUE_GRID
+) -> Optional[dict]:
+    """
+    Ajusta (p0, k1, k2, τ1, τ2) por mínimos quadrados aos marcadores de desempenho.
+    
+    Para cada par (τ1, τ2) da grade, p0/k1/k2 saem das equações normais 3x3;
+    todos os pares são resolvidos de uma vez (np.linalg.solve em lote) e o
+    de menor erro com k1, k2 > 0 e τ1 > τ2 é escolhido.
+    
+    Args:
+        daily_tss: TSS diário (série completa)
+        marker_days: Índice do dia de cada marcador na série
+        marker_values: Valor do marcador (ex.: melhor potência de 20 min)
+    
+    Returns:
+        dict com p0, k1, k2, tau_fitness, tau_fatigue, rmse, r2, n_markers
+        (None se houver menos de BANISTER_MIN_MARKERS marcadores)
+    """
+    days = np.asarray(marker_days, dtype=np.int64)
+    y = np.asarray(marker_values, dtype=np.float64)
+    n_days = len(daily_tss)
+    valid = (days >= 0) & (days < n_days) & np.isfinite(y)
+    days, y = days[valid], y[valid]
+    m = len(y)
+    if m < BANISTER_MIN_MARKERS:
+        return None
+    
+    tau1 = np.asarray(tau_fitness_grid, dtype=np.float64)
+    tau2 = np.asarray(tau_fatigue_grid, dtype=np.float64)
+    g = banister_responses(daily_tss, tuple(tau1))[:, days]      # (T1, m)
+    h = -banister_responses(daily_tss, tuple(tau2))[:, days]     # (T2, m), sinal de -k2
+    
+    # Equações normais de X = [1, g_i, h_j] para todos os pares (i, j)
+    shape = (len(tau1), len(tau2))
+    gs, hs = g.sum(axis=1), h.sum(axis=1)
+    a = np.empty(shape + (3, 3))
+    a[..., 0, 0] = m
+    a[..., 0, 1] = a[..., 1, 0] = gs[:, None]
+    a[..., 0, 2] = a[..., 2, 0] = hs[None, :]
+    a[..., 1, 1] = (g * g).sum(axis=1)[:, None]
+    a[..., 1, 2] = a[..., 2, 1] = g @ h.T
+    a[..., 2, 2] = (h * h).sum(axis=1)[None, :]
+    b = np.empty(shape + (3,))
+    b[..., 0] = y.sum()
+    b[..., 1] = (g @ y)[:, None]
+    b[..., 2] = (h @ y)[None, :]
+    
+    # Regularização mínima (relativa à diagonal) para pares quase colineares
+    a[..., [0, 1, 2], [0, 1, 2]] *= 1 + 1e-10
+    beta = np.linalg.solve(a, b[..., None])[..., 0]
+    sse = (y @ y) - 2 * np.einsum('...k,...k', beta, b) + np.einsum('...k,...kl,...l', beta, a, beta)
+    
+    feasible = (beta[..., 1] > 0) & (beta[..., 2] > 0) & (tau1[:, None] > tau2[None, :])
+    if not feasible.any():
+        return None
+    sse = np.where(feasible, sse, np.inf)
+    i, j = np.unravel_index(np.argmin(sse), shape)
+    
+    best_sse = max(float(sse[i, j]), 0.0)
+    total = float(((y - y.mean()) ** 2).sum())
+    return {
+        'p0': float(beta[i, j, 0]),
+        'k1': float(beta[i, j, 1]),
+        'k2': float(beta[i, j, 2]),
+        'tau_fitness': float(tau1[i]),
+        'tau_fatigue': float(tau2[j]),
+        'rmse': math.sqrt(best_sse / m),
+        'r2': 1 - best_sse / total if total > 0 else 0.0,
+        'n_markers': m,
+    }
+
+
 def calculate_ramp_rate(metrics: list, days: int = 7) -> float:
     """
     Calcula a taxa de rampa do CTL (variação de fitness por semana).
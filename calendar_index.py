@@ -0,0 +1,112 @@
+"""
+Índice do calendário particionado por mês.
+
+Cada clique em mês anterior/próximo percorria todo o histórico para agrupar
+atividades por dia. Aqui o agrupamento é feito uma vez por versão dos dados
+(na reconstrução do data_context, ou seja, após sync, ingestão ou mudança de
+limiares) e salvo em uma partição por mês (calendar/<AAAA-MM>.json):
+    {'version', 'month', 'days': {'AAAA-MM-DD': [resumo da atividade, ...]}}
+
+Resumo da atividade: {'name', 'category', 'tss', 'distance' (km), 'duration' (h)}.
+O manifesto guarda o hash de cada mês: só partições alteradas são regravadas.
+Navegar entre meses lê uma única partição. Os totais do mês vêm dos rollups.
+"""
+import hashlib
+import json
+import logging
+from datetime import date
+from typing import Dict, List, Optional
+
+from calculations import _activity_category, _safe_float
+from storage import (
+    delete_calendar_partition, load_calendar_manifest, load_calendar_partition,
+    save_calendar_manifest, save_calendar_partition
+)
+
+logger = logging.getLogger(__name__)
+
+
+CALENDAR_INDEX_VERSION = 2
+
+
+def month_key(year: int, month: int) -> str:
+    return f"{year:04d}-{month:02d}"
+
+
+def _activity_date(activity: dict) -> Optional[date]:
+    """Dia local da atividade ('AAAA-MM-DD HH:MM:SS' ou ISO com 'T')"""
+    start_time = activity.get('startTimeLocal', activity.get('startTime', ''))
+    if not start_time:
+        return None
+    try:
+        return date.fromisoformat(str(start_time)[:10])
+    except ValueError:
+        return None
+
+
+def _activity_summary(activity: dict) -> dict:
+    return {
+        'name': activity.get('activityName', 'Treino'),
+        'category': _activity_category(activity),
+        'tss': _safe_float(activity.get('tss')),
+        'distance': _safe_float(activity.get('distance')) / 1000,
+        'duration': _safe_float(activity.get('duration')) / 3600,
+    }
+
+
+def build_month_partitions(workouts_with_tss: List[dict]) -> Dict[str, dict]:
+    """Agrupa as atividades (com TSS) em partições por mês, na ordem da lista"""
+    months: Dict[str, Dict[str, List[dict]]] = {}
+    for activity in workouts_with_tss:
+        day = _activity_date(activity)
+        if day is None:
+            continue
+        days = months.setdefault(month_key(day.year, day.month), {})
+        days.setdefault(day.isoformat(), []).append(_activity_summary(activity))
+
+    return {
+        key: {'version': CALENDAR_INDEX_VERSION, 'month': key, 'days': days}
+        for key, days in months.items()
+    }
+
+
+def _partition_hash(partition: dict) -> str:
+    payload = json.dumps(partition, sort_keys=True)
+    return hashlib.md5(payload.encode()).hexdigest()[:16]
+
+
+def update_calendar_index(workouts_with_tss: List[dict]) -> int:
+    """
+    Reagrupa o histórico e regrava só as partições que mudaram (e remove meses
+    que ficaram vazios).
+
+    Returns:
+        Quantidade de partições gravadas ou removidas
+    """
+    partitions = build_month_partitions(workouts_with_tss)
+    manifest = load_calendar_manifest()
+    known = manifest.get('months', {}) if manifest.get('version') == CALENDAR_INDEX_VERSION else {}
+
+    hashes = {}
+    changed = 0
+    for key, partition in partitions.items():
+        hashes[key] = _partition_hash(partition)
+        if known.get(key) != hashes[key]:
+            save_calendar_partition(key, partition)
+            changed += 1
+    for key in set(known) - set(partitions):
+        delete_calendar_partition(key)
+        changed += 1
+
+    if changed or not manifest:
+        save_calendar_manifest({'version': CALENDAR_INDEX_VERSION, 'months': hashes})
+        logger.info(f"[CALENDAR] {changed} partições atualizadas ({len(partitions)} meses)")
+    return changed
+
+
+def load_calendar_month(year: int, month: int) -> dict:
+    """Partição de um mês (dias sem atividade ausentes)"""
+    partition = load_calendar_partition(month_key(year, month))
+    if partition.get('version') != CALENDAR_INDEX_VERSION:
+        return {'version': CALENDAR_INDEX_VERSION, 'month': month_key(year, month), 'days': {}}
+    return partition
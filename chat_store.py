@@ -0,0 +1,147 @@
+"""
+Histórico do chat de IA no servidor (SQLite), por sessão do navegador.
+
+Antes o callback do chat recebia a árvore inteira de componentes de
+`chat-history` como State e devolvia tudo de volta com duas mensagens a mais:
+o payload crescia a cada pergunta. Aqui cada mensagem é uma linha
+(sessão, id, papel, texto) e o navegador só guarda o id da sessão:
+- O callback grava e envia apenas as mensagens novas (Patch.append)
+- O histórico é lido em páginas de CHAT_PAGE_SIZE (as mais recentes primeiro)
+- Cada sessão guarda no máximo CHAT_MAX_MESSAGES mensagens (as mais antigas saem)
+- Mensagens com mais de CHAT_RETENTION_DAYS dias são apagadas
+"""
+import sqlite3
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from storage import DATA_DIR, _try_secure_file
+
+
+CHAT_STORE_DB = DATA_DIR / "chat_history.db"
+
+# Papéis das mensagens
+CHAT_ROLES = ('user', 'assistant')
+
+# Mensagens por página ao abrir o chat / carregar anteriores
+CHAT_PAGE_SIZE = 20
+
+# Limite de mensagens guardadas por sessão
+CHAT_MAX_MESSAGES = 200
+
+# Mensagens mais antigas que isso são removidas
+CHAT_RETENTION_DAYS = 30
+
+
+def _connect() -> sqlite3.Connection:
+    """Abre a conexão e garante o schema"""
+    conn = sqlite3.connect(CHAT_STORE_DB)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS chat_messages (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_id TEXT NOT NULL,
+            role TEXT NOT NULL,
+            content TEXT NOT NULL,
+            created_at TIMESTAMP NOT NULL
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_chat_session ON chat_messages (session_id, id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_chat_created ON chat_messages (created_at)")
+    return conn
+
+
+def new_session_id() -> str:
+    """Identificador aleatório de sessão de chat"""
+    return uuid.uuid4().hex
+
+
+def append_messages(session_id: str, messages: List[Dict]) -> List[Dict]:
+    """
+    Grava mensagens no fim do histórico da sessão.
+
+    Args:
+        session_id: Sessão (dcc.Store do navegador)
+        messages: [{'role': 'user' | 'assistant', 'content': texto}]
+
+    Returns:
+        As mensagens gravadas, com 'id' e 'created_at'
+    """
+    if not session_id or not messages:
+        return []
+    now = datetime.now()
+    created_at = now.isoformat()
+
+    conn = _connect()
+    try:
+        saved = []
+        for message in messages:
+            role = message.get('role')
+            if role not in CHAT_ROLES:
+                raise ValueError(f"Papel de mensagem inválido: {role}")
+            cursor = conn.execute(
+                "INSERT INTO chat_messages (session_id, role, content, created_at) VALUES (?, ?, ?, ?)",
+                (session_id, role, str(message.get('content', '')), created_at)
+            )
+            saved.append({'id': cursor.lastrowid, 'role': role,
+                          'content': str(message.get('content', '')), 'created_at': created_at})
+
+        # Limite por sessão: mantém só as CHAT_MAX_MESSAGES mais recentes
+        conn.execute("""
+            DELETE FROM chat_messages WHERE session_id = ? AND id <= (
+                SELECT id FROM chat_messages WHERE session_id = ?
+                ORDER BY id DESC LIMIT 1 OFFSET ?
+            )
+        """, (session_id, session_id, CHAT_MAX_MESSAGES))
+
+        cutoff = (now - timedelta(days=CHAT_RETENTION_DAYS)).isoformat()
+        conn.execute("DELETE FROM chat_messages WHERE created_at < ?", (cutoff,))
+        conn.commit()
+    finally:
+        conn.close()
+    _try_secure_file(CHAT_STORE_DB)
+    return saved
+
+
+def load_page(session_id: str, before_id: Optional[int] = None, limit: int = CHAT_PAGE_SIZE) -> Dict:
+    """
+    Lê uma página do histórico, da mais recente para trás.
+
+    Args:
+        session_id: Sessão
+        before_id: Só mensagens com id menor (None = a partir da última)
+        limit: Tamanho da página
+
+    Returns:
+        {'messages': [...] em ordem cronológica, 'oldest_id': id ou None,
+         'has_more': se ainda há mensagens anteriores}
+    """
+    empty = {'messages': [], 'oldest_id': None, 'has_more': False}
+    if not session_id or not CHAT_STORE_DB.exists():
+        return empty
+    conn = _connect()
+    try:
+        query = "SELECT id, role, content, created_at FROM chat_messages WHERE session_id = ?"
+        params = [session_id]
+        if before_id is not None:
+            query += " AND id < ?"
+            params.append(int(before_id))
+        # Uma linha a mais indica se existe página anterior
+        query += " ORDER BY id DESC LIMIT ?"
+        params.append(int(limit) + 1)
+        rows = conn.execute(query, params).fetchall()
+    finally:
+        conn.close()
+
+    if not rows:
+        return empty
+    has_more = len(rows) > limit
+    rows = rows[:limit][::-1]
+    return {
+        'messages': [
+            {'id': row[0], 'role': row[1], 'content': row[2], 'created_at': row[3]}
+            for row in rows
+        ],
+        'oldest_id': rows[0][0],
+        'has_more': has_more,
+    }
+
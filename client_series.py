@@ -0,0 +1,83 @@
+"""
+Série diária compacta enviada ao navegador (dcc.Store) uma vez por versão dos dados.
+
+Trocar o período ou ligar/desligar uma métrica voltava ao Python para refazer
+a figura. Aqui o servidor monta um payload tipado com o histórico completo e
+o callback clientside (assets/client_series.js) recorta e desenha:
+- Dias contíguos: ordinal do primeiro dia + quantidade (ordinal do dia i =
+  'start_ordinal' + i); 'start_ms' é o mesmo dia em ms UTC para o eixo de datas
+- Valores em float32 little-endian codificados em base64 (4 bytes por dia e
+  campo, em vez do número em texto do JSON)
+- Campos: TSS diário, CTL, ATL, TSB e horas por modalidade
+
+O payload é reaproveitado enquanto a versão do data_context não muda.
+"""
+import base64
+import hashlib
+import threading
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+from calculations import CATEGORY_CODES
+
+CLIENT_SERIES_FIELDS = ('tss', 'ctl', 'atl', 'tsb') + tuple(f'hours_{c}' for c in CATEGORY_CODES)
+
+_payload_lock = threading.Lock()
+_payload_cache: dict = {}
+
+
+def _pack(values) -> str:
+    return base64.b64encode(np.asarray(values, dtype='<f4').tobytes()).decode('ascii')
+
+
+def build_client_series(context: dict) -> dict:
+    """
+    Payload {'version', 'start', 'start_ordinal', 'start_ms', 'days', 'dtype',
+    'arrays': {campo: base64 float32}} da série completa do contexto.
+    """
+    series = context['series']
+    version = hashlib.md5(repr(context['version']).encode()).hexdigest()[:12]
+    if not series or not series.get('start') or not series.get('ctl'):
+        return {'version': version, 'days': 0, 'arrays': {}}
+
+    start = datetime.strptime(series['start'], '%Y-%m-%d').date()
+    days = len(series['ctl'])
+    ctl = np.asarray(series['ctl'], dtype=float)
+    atl = np.asarray(series['atl'], dtype=float)
+    arrays = {
+        'tss': np.asarray(series['daily_tss'][:days], dtype=float),
+        'ctl': ctl,
+        'atl': atl,
+        'tsb': ctl - atl,
+    }
+
+    day_buckets = (context.get('rollups') or {}).get('day', {})
+    hours = {category: np.zeros(days) for category in CATEGORY_CODES}
+    for offset in range(days):
+        bucket = day_buckets.get((start + timedelta(days=offset)).isoformat())
+        if not bucket:
+            continue
+        for category, values in bucket.items():
+            if category in hours:
+                hours[category][offset] = values.get('duration', 0)
+    arrays.update({f'hours_{category}': values for category, values in hours.items()})
+
+    return {
+        'version': version,
+        'start': start.isoformat(),
+        'start_ordinal': start.toordinal(),
+        'start_ms': (start - date(1970, 1, 1)).days * 86400000,
+        'days': days,
+        'dtype': 'float32',
+        'arrays': {field: _pack(arrays[field]) for field in CLIENT_SERIES_FIELDS},
+    }
+
+
+def client_series_payload(context: dict) -> dict:
+    """Payload da versão atual dos dados (montado uma vez por versão)"""
+    with _payload_lock:
+        if _payload_cache.get('version') != context['version']:
+            _payload_cache['version'] = context['version']
+            _payload_cache['payload'] = build_client_series(context)
+        return _payload_cache['payload']
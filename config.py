@@ -23,3 +23,7 @@ if not GROQ_API_KEY:
 if GROQ_API_KEY and len(GROQ_API_KEY) < 10:
     logger.error("❌ GROQ_API_KEY parece inválida (muito curta)")
     GROQ_API_KEY = ""
+
+# Token para o endpoint de ingestão push (/api/ingest/*)
+# Sem token configurado, o endpoint aceita apenas requisições locais (127.0.0.1)
+INGEST_TOKEN = os.getenv("INGEST_TOKEN", "").strip()
@@ -0,0 +1,111 @@
+"""
+Contexto de dados compartilhado pelas views (um por versão dos dados).
+
+Antes, cada builder do dashboard (resumo semanal, gráficos da semana,
+distribuição, atividades recentes, modalidades, metas) recarregava os workouts
+e refazia enrich_workouts_with_tss, além de chamadas repetidas a load_config e
+load_metrics. Aqui tudo é montado uma vez e reaproveitado enquanto
+storage.data_version() e o dia não mudam:
+- 'config': configuração do usuário
+- 'workouts': atividades com TSS (enrich_workouts_with_tss)
+- 'start_times': datetime de início de cada atividade (None se inválido)
+- 'series': série materializada (fitness_series.json)
+- 'metrics': janela de CTL/ATL/TSB salva em fitness_metrics.json
+- 'rollups': totais por dia/semana/mês e modalidade (rollups.json)
+- 'activity_index': colunas, ordens e índice de nomes do explorador de atividades
+
+Na reconstrução também é atualizado o índice do calendário por mês
+(calendar_index), que só regrava os meses alterados. A reconstrução grava
+arquivos derivados (série, fitness_metrics.json, calendário, rollups), por isso
+roda sob storage.DATA_WRITE_LOCK, o mesmo lock do sync do Garmin e da ingestão
+push: nunca lê workouts.json no meio de uma gravação nem grava junto com ela.
+
+O contexto é somente leitura: builders não devem alterar as listas/dicts.
+"""
+import logging
+import threading
+from datetime import date, datetime
+from typing import List, Optional
+
+from activity_index import build_activity_index
+from calendar_index import update_calendar_index
+from fitness_series import metrics_window, update_fitness_series
+from rollups import update_rollups
+from storage import DATA_WRITE_LOCK, data_version, load_config, load_workouts
+from tss_enrichment import enrich_workouts_with_tss
+
+logger = logging.getLogger(__name__)
+
+
+_context_lock = threading.Lock()
+_current_context: dict = {}
+# Incrementado por invalidate_data_context (mudanças que não alteram os arquivos)
+_generation = 0
+
+
+def activity_start_time(activity: dict) -> Optional[datetime]:
+    """Início da atividade (startTimeLocal/startTime) ou None se ausente/inválido"""
+    start_time = activity.get('startTimeLocal', activity.get('startTime', ''))
+    if not start_time:
+        return None
+    try:
+        return datetime.strptime(start_time, "%Y-%m-%d %H:%M:%S")
+    except (TypeError, ValueError):
+        return None
+
+
+def current_data_version() -> tuple:
+    """
+    Versão atual dos dados derivados: arquivos de entrada (storage.data_version),
+    dia de hoje (janelas "semana atual", "últimos N dias") e invalidações explícitas.
+    """
+    return data_version(), date.today().isoformat(), _generation
+
+
+def build_data_context() -> dict:
+    """Carrega e enriquece os dados do zero (sem reaproveitar o contexto atual)"""
+    with DATA_WRITE_LOCK:
+        version = current_data_version()
+        config = load_config()
+        workouts = enrich_workouts_with_tss(load_workouts(), config)
+        series = update_fitness_series(workouts)
+        update_calendar_index(workouts)
+        metrics = metrics_window(series)
+        rollups = update_rollups(workouts)
+    return {
+        'version': version,
+        'config': config,
+        'workouts': workouts,
+        'start_times': [activity_start_time(w) for w in workouts],
+        'series': series,
+        'metrics': metrics,
+        'rollups': rollups,
+        'activity_index': build_activity_index(workouts),
+    }
+
+
+def get_data_context() -> dict:
+    """Contexto da versão atual dos dados (reconstruído só quando algo mudou)"""
+    global _current_context
+    version = current_data_version()
+    with _context_lock:
+        if _current_context.get('version') != version:
+            _current_context = build_data_context()
+            logger.debug(f"[CONTEXT] reconstruído ({len(_current_context['workouts'])} atividades)")
+        return _current_context
+
+
+def invalidate_data_context() -> None:
+    """Força reconstrução na próxima leitura (ex.: memo de TSS invalidado)"""
+    global _current_context, _generation
+    with _context_lock:
+        _current_context = {}
+        _generation += 1
+
+
+def activities_between(context: dict, start: datetime, end: datetime) -> List[dict]:
+    """Atividades do contexto com início em [start, end] (datas já convertidas)"""
+    return [
+        w for w, start_time in zip(context['workouts'], context['start_times'])
+        if start_time is not None and start <= start_time <= end
+    ]
@@ -0,0 +1,131 @@
+"""
+Redução de pontos (downsampling) de séries temporais longas no servidor.
+
+Com anos de histórico (CTL/ATL/TSB, séries de saúde) cada trace levava
+milhares de pontos no payload do Dash, mais do que a largura do gráfico
+consegue mostrar. Aqui as séries passam pelo LTTB (Largest-Triangle-Three-
+Buckets), que mantém picos e vales:
+- O número de pontos segue a largura do gráfico (LTTB_POINTS_PER_PX),
+  limitado por LTTB_MAX_POINTS: o payload não cresce com o histórico
+- Em cada balde fica o ponto que forma o maior triângulo com o ponto
+  escolhido no balde anterior e a média do balde seguinte (áreas calculadas
+  com numpy; médias dos baldes por soma acumulada)
+- Gráficos criados com lttb_graph reamostram o intervalo visível ao dar zoom
+  (relayout -> store 'lttb-view' -> callback com Patch em app.py)
+"""
+from datetime import date, timedelta
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+from dash import dcc, html
+
+# Pontos por pixel de largura do gráfico (~1 ponto a cada 2 px)
+LTTB_POINTS_PER_PX = 0.5
+# Largura assumida antes de o navegador informar a largura real (container lg)
+LTTB_DEFAULT_WIDTH_PX = 1100
+LTTB_MIN_POINTS = 50
+LTTB_MAX_POINTS = 2000
+
+
+def target_points(width_px: Optional[float] = None) -> int:
+    """Quantidade de pontos por trace para um gráfico de `width_px` pixels"""
+    try:
+        width = float(width_px) if width_px else LTTB_DEFAULT_WIDTH_PX
+    except (TypeError, ValueError):
+        width = LTTB_DEFAULT_WIDTH_PX
+    return int(min(LTTB_MAX_POINTS, max(LTTB_MIN_POINTS, width * LTTB_POINTS_PER_PX)))
+
+
+def lttb_indices(x: Sequence[float], y: Sequence[float], n_out: int) -> np.ndarray:
+    """
+    Índices dos pontos escolhidos pelo LTTB (primeiro e último sempre incluídos).
+
+    Args:
+        x: Abscissas crescentes (ex.: ordinal do dia)
+        y: Valores (sem NaN)
+        n_out: Pontos desejados; com n_out >= len(x) todos os índices voltam
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+
+    # n_out - 2 baldes internos em [1, n - 1) (todos com pelo menos um ponto)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    starts, ends = edges[:-1], edges[1:]
+
+    # Média de cada balde por soma acumulada; o "seguinte" do último balde é o último ponto
+    cum_x = np.concatenate(([0.0], np.cumsum(x)))
+    cum_y = np.concatenate(([0.0], np.cumsum(y)))
+    sizes = ends - starts
+    avg_x = (cum_x[ends] - cum_x[starts]) / sizes
+    avg_y = (cum_y[ends] - cum_y[starts]) / sizes
+    next_x = np.append(avg_x[1:], x[-1])
+    next_y = np.append(avg_y[1:], y[-1])
+
+    selected = np.empty(n_out, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for bucket in range(n_out - 2):
+        start, end = starts[bucket], ends[bucket]
+        ax, ay = x[previous], y[previous]
+        areas = np.abs(
+            (ax - next_x[bucket]) * (y[start:end] - ay)
+            - (ax - x[start:end]) * (next_y[bucket] - ay)
+        )
+        previous = start + int(np.argmax(areas))
+        selected[bucket + 1] = previous
+    return selected
+
+
+def downsample_xy(dates: Sequence[str], values: Sequence[Optional[float]],
+                  n_out: int) -> Tuple[List[str], List[float]]:
+    """
+    Reduz uma série diária ({'AAAA-MM-DD'}, valores) a até `n_out` pontos.
+    Pontos sem valor (None/NaN) são descartados antes.
+    """
+    pairs = [(d, float(v)) for d, v in zip(dates, values) if v is not None and np.isfinite(v)]
+    if len(pairs) <= n_out:
+        return [d for d, _ in pairs], [v for _, v in pairs]
+    x = [date.fromisoformat(d[:10]).toordinal() for d, _ in pairs]
+    y = [v for _, v in pairs]
+    indices = lttb_indices(x, y, n_out)
+    return [pairs[i][0] for i in indices], [pairs[i][1] for i in indices]
+
+
+def visible_range(view: dict) -> Tuple[date, date]:
+    """
+    Intervalo de dias a reamostrar: o zoom atual ('range', com um dia de folga
+    em cada lado) limitado ao intervalo completo do gráfico ('start'/'end').
+    """
+    full_start = date.fromisoformat(view['start'])
+    full_end = date.fromisoformat(view['end'])
+    x_range = view.get('range')
+    if not x_range:
+        return full_start, full_end
+    try:
+        start = date.fromisoformat(str(x_range[0])[:10]) - timedelta(days=1)
+        end = date.fromisoformat(str(x_range[1])[:10]) + timedelta(days=1)
+    except (TypeError, ValueError, IndexError):
+        return full_start, full_end
+    start, end = max(start, full_start), min(end, full_end)
+    if start > end:
+        return full_start, full_end
+    return start, end
+
+
+def lttb_graph(chart: str, figure, start: date, end: date, **graph_kwargs):
+    """
+    dcc.Graph reamostrado ao dar zoom: guarda o intervalo completo em um store
+    {'type': 'lttb-view', 'chart'} que o callback de relayout atualiza.
+
+    Os traces da figura devem estar na ordem devolvida pela fonte do gráfico
+    (LTTB_CHART_SOURCES em app.py) e o layout deve ter 'uirevision' fixo para
+    o zoom ser mantido quando os traces são trocados.
+    """
+    view = {'start': start.isoformat(), 'end': end.isoformat(), 'range': None, 'width': None}
+    return html.Div([
+        dcc.Store(id={'type': 'lttb-view', 'chart': chart}, data=view),
+        dcc.Graph(id={'type': 'lttb-graph', 'chart': chart}, figure=figure, **graph_kwargs),
+    ])
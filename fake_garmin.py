@@ -0,0 +1,389 @@
+"""
+Cliente Garmin falso (record/replay) para benchmarks e testes de carga offline.
+
+Expõe os mesmos métodos de ``garminconnect.Garmin`` que o app chama
+(``get_activities_by_date``, ``get_hrv_data``, ``get_sleep_data``,
+``get_stress_data``, ``get_training_status``, ...) e responde a partir de
+fixtures gravadas (``RecordingGarmin``) ou sintéticas (``synthetic_fixtures``).
+
+Condições simuladas:
+- Latência por chamada (com jitter opcional)
+- Taxa de erro aleatória (GarminConnectConnectionError)
+- Throttling estilo HTTP 429 (GarminConnectTooManyRequestsError)
+
+Uso típico:
+    fake = FakeGarmin(synthetic_fixtures(days=365), latency=0.05, error_rate=0.02)
+    fetch_garmin_data(config=config, client=fake)
+    print(fake.call_counts)
+"""
+import json
+import random
+import threading
+import time
+from collections import Counter
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from garminconnect import GarminConnectConnectionError, GarminConnectTooManyRequestsError
+
+
+# Métodos respondidos por data (fixture: {metodo: {YYYY-MM-DD: payload}})
+DATED_METHODS = (
+    'get_hrv_data',
+    'get_sleep_data',
+    'get_stress_data',
+    'get_training_status',
+    'get_daily_training_status',
+    'get_body_composition',
+)
+
+# Métodos respondidos por activity_id (fixture: {metodo: {activity_id: payload}})
+ACTIVITY_METHODS = (
+    'get_workout_details',
+    'get_activity_details',
+)
+
+# Métodos sem argumento (fixture: {metodo: payload})
+STATIC_METHODS = (
+    'get_vo2_max',
+    'get_performance_metrics',
+)
+
+
+class _FakeGarth:
+    """Substituto mínimo de ``client.garth`` (tokens não existem offline)."""
+
+    def load(self, path: str) -> None:
+        return None
+
+    def dump(self, path: str) -> None:
+        Path(path).mkdir(parents=True, exist_ok=True)
+
+
+class FakeGarmin:
+    """Cliente Garmin offline com latência, erros e throttling configuráveis"""
+
+    def __init__(
+        self,
+        fixtures: Optional[Dict[str, Any]] = None,
+        latency: float = 0.0,
+        latency_jitter: float = 0.0,
+        error_rate: float = 0.0,
+        max_calls_per_second: Optional[float] = None,
+        seed: Optional[int] = None,
+    ):
+        """
+        Args:
+            fixtures: Respostas gravadas/sintéticas (ver ``synthetic_fixtures``)
+            latency: Latência base por chamada em segundos
+            latency_jitter: Variação máxima (±) somada à latência
+            error_rate: Probabilidade (0-1) de uma chamada falhar
+            max_calls_per_second: Limite de chamadas/s antes de responder 429
+            seed: Semente para reprodutibilidade dos erros/jitter
+        """
+        self.fixtures = fixtures or {}
+        self.latency = max(0.0, float(latency))
+        self.latency_jitter = max(0.0, float(latency_jitter))
+        self.error_rate = max(0.0, min(1.0, float(error_rate)))
+        self.max_calls_per_second = max_calls_per_second
+        self.garth = _FakeGarth()
+
+        self.call_counts = Counter()
+        self.error_counts = Counter()
+        self.throttled_counts = Counter()
+
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._call_times: List[float] = []
+
+    @classmethod
+    def from_fixture_file(cls, path, **kwargs) -> "FakeGarmin":
+        """Cria cliente a partir de um arquivo JSON gravado por ``RecordingGarmin``"""
+        with open(path, "r") as f:
+            return cls(json.load(f), **kwargs)
+
+    # ========== LOGIN (no-op) ==========
+
+    def login(self, *args, **kwargs):
+        return None, None
+
+    # ========== SIMULAÇÃO DE REDE ==========
+
+    def _simulate(self, method: str) -> None:
+        """Aplica throttling, erros aleatórios e latência a uma chamada"""
+        with self._lock:
+            self.call_counts[method] += 1
+            now = time.monotonic()
+
+            if self.max_calls_per_second:
+                # Janela deslizante de 1s
+                self._call_times = [t for t in self._call_times if now - t < 1.0]
+                if len(self._call_times) >= self.max_calls_per_second:
+                    self.throttled_counts[method] += 1
+                    raise GarminConnectTooManyRequestsError("429 Too Many Requests (simulado)")
+                self._call_times.append(now)
+
+            fail = self.error_rate > 0 and self._rng.random() < self.error_rate
+            delay = self.latency
+            if self.latency_jitter:
+                delay += self._rng.uniform(-self.latency_jitter, self.latency_jitter)
+
+        if delay > 0:
+            time.sleep(delay)
+
+        if fail:
+            with self._lock:
+                self.error_counts[method] += 1
+            raise GarminConnectConnectionError(f"Erro de conexão simulado em {method}")
+
+    def _dated(self, method: str, cdate) -> Any:
+        self._simulate(method)
+        key = cdate.isoformat() if isinstance(cdate, date) else str(cdate)[:10]
+        return self.fixtures.get(method, {}).get(key)
+
+    def _by_activity(self, method: str, activity_id) -> Any:
+        self._simulate(method)
+        return self.fixtures.get(method, {}).get(str(activity_id))
+
+    # ========== ATIVIDADES ==========
+
+    def get_activities_by_date(self, startdate, enddate=None, activitytype=None, sortorder=None) -> List[Dict]:
+        """Retorna atividades do pool cuja data local está no intervalo"""
+        self._simulate('get_activities_by_date')
+        start = str(startdate)[:10]
+        end = str(enddate)[:10] if enddate else date.today().isoformat()
+
+        result = []
+        for activity in self.fixtures.get('activities', []):
+            day = str(activity.get('startTimeLocal', ''))[:10]
+            if not (start <= day <= end):
+                continue
+            if activitytype:
+                type_key = (activity.get('activityType') or {}).get('typeKey', '')
+                if activitytype not in type_key:
+                    continue
+            result.append(dict(activity))
+
+        result.sort(key=lambda a: a.get('startTimeLocal', ''), reverse=(sortorder != 'asc'))
+        return result
+
+    # ========== SAÚDE / TRAINING STATUS ==========
+
+    def get_hrv_data(self, cdate):
+        return self._dated('get_hrv_data', cdate)
+
+    def get_sleep_data(self, cdate):
+        return self._dated('get_sleep_data', cdate)
+
+    def get_stress_data(self, cdate):
+        return self._dated('get_stress_data', cdate)
+
+    def get_training_status(self, cdate):
+        return self._dated('get_training_status', cdate)
+
+    def get_daily_training_status(self, cdate):
+        return self._dated('get_daily_training_status', cdate)
+
+    def get_body_composition(self, startdate, enddate=None):
+        return self._dated('get_body_composition', startdate)
+
+    def get_vo2_max(self):
+        self._simulate('get_vo2_max')
+        return self.fixtures.get('get_vo2_max')
+
+    def get_performance_metrics(self):
+        self._simulate('get_performance_metrics')
+        return self.fixtures.get('get_performance_metrics')
+
+    # ========== DETALHES DE ATIVIDADE ==========
+
+    def get_workout_details(self, activity_id):
+        return self._by_activity('get_workout_details', activity_id)
+
+    def get_activity_details(self, activity_id, maxchart: int = 2000, maxpoly: int = 4000):
+        return self._by_activity('get_activity_details', activity_id)
+
+    # ========== ESTATÍSTICAS ==========
+
+    def reset_counters(self) -> None:
+        with self._lock:
+            self.call_counts.clear()
+            self.error_counts.clear()
+            self.throttled_counts.clear()
+            self._call_times = []
+
+    def stats(self) -> Dict[str, Any]:
+        """Resumo de chamadas, erros e throttling por método"""
+        return {
+            'total_calls': sum(self.call_counts.values()),
+            'total_errors': sum(self.error_counts.values()),
+            'total_throttled': sum(self.throttled_counts.values()),
+            'by_method': dict(self.call_counts),
+            'errors_by_method': dict(self.error_counts),
+            'throttled_by_method': dict(self.throttled_counts),
+        }
+
+
+class RecordingGarmin:
+    """
+    Proxy que grava as respostas de um cliente Garmin real em formato de fixture.
+
+    Uso:
+        rec = RecordingGarmin(Garmin(email, password))
+        rec.login()
+        fetch_garmin_data(config=config, client=rec)
+        rec.save("fixtures/garmin_sync.json")
+    """
+
+    def __init__(self, client):
+        self._client = client
+        self.fixtures: Dict[str, Any] = {'activities': []}
+        self._activity_ids = set()
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if not callable(attr) or name in ('login',):
+            return attr
+
+        def _recorded(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            self._record(name, args, kwargs, result)
+            return result
+
+        return _recorded
+
+    def _record(self, name: str, args, kwargs, result) -> None:
+        if name == 'get_activities_by_date':
+            for activity in result or []:
+                key = activity.get('activityId') or activity.get('startTimeLocal')
+                if key not in self._activity_ids:
+                    self._activity_ids.add(key)
+                    self.fixtures['activities'].append(activity)
+        elif name in DATED_METHODS or name in ACTIVITY_METHODS:
+            first = args[0] if args else next(iter(kwargs.values()), '')
+            key = first.isoformat() if isinstance(first, date) else str(first)
+            if name in DATED_METHODS:
+                key = key[:10]
+            self.fixtures.setdefault(name, {})[key] = result
+        elif name in STATIC_METHODS:
+            self.fixtures[name] = result
+
+    def save(self, path) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(self.fixtures, f, indent=2, default=str)
+
+
+# =============================================================================
+# FIXTURES SINTÉTICAS
+# =============================================================================
+
+_SYNTHETIC_SPORTS = [
+    # (typeKey, nome, duração min/max em minutos, velocidade m/s, potência média)
+    ('running', 'Corrida', 30, 90, 3.2, 0),
+    ('road_biking', 'Pedal', 60, 180, 8.5, 190),
+    ('lap_swimming', 'Natação', 30, 60, 0.85, 0),
+    ('strength_training', 'Musculação', 40, 70, 0.0, 0),
+]
+
+
+def synthetic_fixtures(
+    days: int = 365,
+    end_date: Optional[date] = None,
+    activities_per_week: int = 8,
+    seed: int = 42,
+) -> Dict[str, Any]:
+    """
+    Gera fixtures realistas no formato retornado pelo Garmin Connect.
+
+    Args:
+        days: Quantidade de dias de histórico
+        end_date: Último dia (padrão: hoje)
+        activities_per_week: Média de atividades por semana
+        seed: Semente do gerador
+
+    Returns:
+        Dict pronto para ``FakeGarmin(fixtures)``
+    """
+    rng = random.Random(seed)
+    end_date = end_date or date.today()
+    start_date = end_date - timedelta(days=days - 1)
+
+    fixtures: Dict[str, Any] = {
+        'activities': [],
+        'get_hrv_data': {},
+        'get_sleep_data': {},
+        'get_stress_data': {},
+        'get_training_status': {},
+        'get_daily_training_status': {},
+        'get_body_composition': {},
+        'get_workout_details': {},
+        'get_vo2_max': {'vo2Max': 52.0},
+        'get_performance_metrics': {'enduranceScore': 6800},
+    }
+
+    activity_id = 10_000_000_000
+    prob_per_day = min(1.0, activities_per_week / 7.0)
+
+    for offset in range(days):
+        day = start_date + timedelta(days=offset)
+        day_str = day.isoformat()
+
+        sessions = 1 if rng.random() < prob_per_day else 0
+        if sessions and rng.random() < 0.15:
+            sessions = 2
+
+        for s in range(sessions):
+            type_key, label, dmin, dmax, speed, power = rng.choice(_SYNTHETIC_SPORTS)
+            duration = rng.uniform(dmin, dmax) * 60
+            activity_id += 1
+            start_dt = datetime(day.year, day.month, day.day, 6 + s * 10, rng.randint(0, 59), 0)
+
+            activity = {
+                'activityId': activity_id,
+                'activityName': f"{label} {day.strftime('%d/%m')}",
+                'activityType': {'typeKey': type_key},
+                'startTimeLocal': start_dt.strftime('%Y-%m-%d %H:%M:%S'),
+                'startTimeGMT': (start_dt + timedelta(hours=3)).strftime('%Y-%m-%d %H:%M:%S'),
+                'duration': round(duration, 1),
+                'distance': round(speed * duration * rng.uniform(0.9, 1.1), 1) if speed else 0.0,
+                'averageSpeed': round(speed * rng.uniform(0.9, 1.1), 3) if speed else 0.0,
+                'averageHR': rng.randint(115, 165),
+                'maxHR': rng.randint(165, 185),
+                'calories': round(duration / 60 * rng.uniform(8, 12), 0),
+            }
+            if power:
+                activity['averagePower'] = round(power * rng.uniform(0.85, 1.15), 0)
+                activity['normalizedPower'] = round(activity['averagePower'] * rng.uniform(1.02, 1.1), 0)
+            fixtures['activities'].append(activity)
+
+            if type_key == 'strength_training':
+                exercises = [
+                    {'name': name, 'sets': rng.randint(3, 5), 'reps': rng.randint(24, 50)}
+                    for name in rng.sample(['SQUAT', 'DEADLIFT', 'BENCH_PRESS', 'ROW', 'LUNGE', 'PLANK'], 3)
+                ]
+                fixtures['get_workout_details'][str(activity_id)] = {'exercises': exercises}
+
+        fixtures['get_hrv_data'][day_str] = {
+            'hrvSummary': {'calendarDate': day_str, 'lastNightAverage': rng.randint(45, 85)}
+        }
+        fixtures['get_sleep_data'][day_str] = {
+            'dailySleepDTO': {
+                'calendarDate': day_str,
+                'sleepTimeSeconds': rng.randint(5 * 3600, 9 * 3600),
+                'deepSleepSeconds': rng.randint(3600, 2 * 3600),
+                'remSleepSeconds': rng.randint(3600, 2 * 3600),
+            }
+        }
+        fixtures['get_stress_data'][day_str] = {
+            'calendarDate': day_str,
+            'avgStressLevel': rng.randint(15, 45),
+            'maxStressLevel': rng.randint(60, 99),
+        }
+        fixtures['get_training_status'][day_str] = {'trainingPeakLoadFormatted': 'Productive'}
+        fixtures['get_daily_training_status'][day_str] = {'calendarDate': day_str}
+        fixtures['get_body_composition'][day_str] = {'weight': 72000 + rng.randint(-800, 800)}
+
+    return fixtures
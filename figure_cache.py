@@ -0,0 +1,125 @@
+"""
+Cache LRU em memória das figuras Plotly já serializadas.
+
+Trocar de aba reconstruía todos os gráficos (go.Figure + validação do Plotly)
+mesmo sem nenhum sync desde a última vez. Aqui cada builder decorado com
+@figure_cached guarda o JSON da figura por:
+- builder
+- versão dos dados (`data_version`, obrigatório na chamada: o
+  context['version'] do contexto de onde vieram os argumentos)
+- tema (template padrão do Plotly)
+- parâmetros declarados do builder (ex.: modalidade, dias)
+
+Argumentos de dados (contexto, métricas, workouts) não entram na chave: são
+derivados do contexto daquela versão. A versão é a dos dados recebidos, não a
+lida no momento da chamada: um contexto montado antes de uma gravação nunca
+fica guardado sob a versão nova. Uma gravação em storage muda a versão e as
+entradas antigas deixam de ser usadas e saem pelo LRU.
+
+Memória limitada por FIGURE_CACHE_MAX_BYTES (tamanho do JSON) e
+FIGURE_CACHE_MAX_ENTRIES. O builder passa a devolver o dict da figura
+(aceito diretamente por dcc.Graph).
+"""
+import functools
+import hashlib
+import inspect
+import json
+import logging
+import threading
+from collections import OrderedDict
+from typing import Callable, Iterable
+
+import plotly.io as pio
+
+logger = logging.getLogger(__name__)
+
+
+FIGURE_CACHE_MAX_BYTES = 32 * 1024 * 1024
+FIGURE_CACHE_MAX_ENTRIES = 256
+
+_figure_lock = threading.Lock()
+_figures: "OrderedDict[tuple, str]" = OrderedDict()
+_figure_bytes = 0
+_figure_stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+
+def _params_key(values: dict) -> str:
+    payload = json.dumps(values, sort_keys=True, default=str)
+    return hashlib.md5(payload.encode()).hexdigest()[:16]
+
+
+def _store(key: tuple, figure_json: str) -> None:
+    global _figure_bytes
+    with _figure_lock:
+        if key in _figures:
+            _figure_bytes -= len(_figures.pop(key))
+        _figures[key] = figure_json
+        _figure_bytes += len(figure_json)
+        while _figures and (_figure_bytes > FIGURE_CACHE_MAX_BYTES or len(_figures) > FIGURE_CACHE_MAX_ENTRIES):
+            _, evicted = _figures.popitem(last=False)
+            _figure_bytes -= len(evicted)
+            _figure_stats['evictions'] += 1
+
+
+def _lookup(key: tuple):
+    with _figure_lock:
+        figure_json = _figures.get(key)
+        if figure_json is None:
+            _figure_stats['misses'] += 1
+            return None
+        _figures.move_to_end(key)
+        _figure_stats['hits'] += 1
+        return figure_json
+
+
+def figure_cached(name: str, params: Iterable[str] = ()) -> Callable:
+    """
+    Decorador de builder de figura.
+
+    Args:
+        name: Nome do builder na chave do cache
+        params: Nomes dos argumentos que são parâmetros (entram na chave);
+                os demais são dados da versão `data_version`
+
+    O builder decorado passa a exigir o argumento nomeado `data_version`
+    (versão do contexto dos dados; não é repassado ao builder).
+    """
+    params = tuple(params)
+
+    def decorator(builder: Callable) -> Callable:
+        signature = inspect.signature(builder)
+
+        @functools.wraps(builder)
+        def wrapper(*args, data_version, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            key = (
+                name,
+                data_version,
+                pio.templates.default,
+                _params_key({p: bound.arguments.get(p) for p in params}),
+            )
+            figure_json = _lookup(key)
+            if figure_json is None:
+                figure = builder(*args, **kwargs)
+                figure_json = pio.to_json(figure, validate=False)
+                _store(key, figure_json)
+            return json.loads(figure_json)
+
+        return wrapper
+
+    return decorator
+
+
+def invalidate_figure_cache() -> None:
+    """Descarta todas as figuras em cache"""
+    global _figure_bytes
+    with _figure_lock:
+        _figures.clear()
+        _figure_bytes = 0
+
+
+def figure_cache_stats() -> dict:
+    """Entradas, bytes e contadores de acerto/erro/remoção"""
+    with _figure_lock:
+        return {'entries': len(_figures), 'bytes': _figure_bytes, **_figure_stats}
@@ -0,0 +1,47 @@
+"""
+Traces Plotly para séries longas: arrays tipados e WebGL acima de um limiar.
+
+Os builders passavam listas Python em go.Scatter/go.Bar, serializadas como
+arrays de números em texto no JSON (lento para codificar e para o navegador
+ler). Aqui os valores viram numpy float32, que o Plotly serializa na forma
+binária ({'dtype': 'f4', 'bdata': base64}) e o plotly.js lê direto em
+Float32Array; com WEBGL_MIN_POINTS pontos ou mais a linha usa Scattergl.
+
+Séries reduzidas por LTTB (downsampling.py) chegam com ~550 pontos (no máximo
+LTTB_MAX_POINTS), então o limiar é aplicado ao tamanho da série original
+(`source_points`): o zoom só troca x/y, e o tipo do trace definido na criação
+precisa servir também para os trechos reamostrados em resolução maior.
+
+Datas (eixo x) continuam como texto; valores ausentes (None) viram NaN
+(lacuna na linha, como antes).
+"""
+from typing import Iterable, Optional
+
+import numpy as np
+import plotly.graph_objects as go
+
+# A partir de quantos pontos uma linha é desenhada com WebGL (Scattergl)
+WEBGL_MIN_POINTS = 1000
+
+
+def float_array(values: Iterable[Optional[float]]) -> np.ndarray:
+    """Valores em float32 (None -> NaN)"""
+    return np.array([np.nan if v is None else v for v in values], dtype=np.float32)
+
+
+def scatter(x, y, source_points: Optional[int] = None, **kwargs):
+    """
+    go.Scatter com y float32; go.Scattergl com WEBGL_MIN_POINTS pontos ou mais.
+    
+    Args:
+        source_points: Pontos da série antes do LTTB (padrão: len(y))
+    """
+    y = float_array(y)
+    points = len(y) if source_points is None else source_points
+    trace_class = go.Scattergl if points >= WEBGL_MIN_POINTS else go.Scatter
+    return trace_class(x=x, y=y, **kwargs)
+
+
+def bar(x, y, **kwargs):
+    """go.Bar com y float32"""
+    return go.Bar(x=x, y=float_array(y), **kwargs)
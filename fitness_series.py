@@ -0,0 +1,293 @@
+"""
+Série materializada de carga diária e CTL/ATL/TSB sobre o histórico completo.
+
+Antes, dashboard e sync recalculavam CTL/ATL só nos últimos 42 dias partindo
+de CTL=ATL=0 (fitness sempre subestimado). Aqui a série começa na primeira
+atividade e é mantida incrementalmente:
+- Guarda a contribuição de TSS de cada atividade (chave -> dia, TSS)
+- Ao mudar/entrar/sair uma atividade do dia D, só a EMA de D em diante é refeita
+- Dias novos (passagem do tempo) apenas estendem a série
+- Leituras do dashboard viram um recorte da série
+- Na mesma passada (agrupada) saem as séries por modalidade e por fonte de TSS
+
+Formato salvo (fitness_series.json):
+    {'version', 'start', 'daily_tss': [...], 'ctl': [...], 'atl': [...],
+     'by_category': {modalidade: {'daily_tss', 'ctl', 'atl'}},
+     'by_tss_type': {fonte: {'daily_tss', 'ctl', 'atl'}},
+     'indices': {índice: [...]}  (load_indices: ACWR, monotonia, strain, rampa)
+     'contributions': {chave: [dia, tss, modalidade, fonte]}}
+"""
+import logging
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from calculations import (
+    CATEGORY_CODES, TSS_SOURCE_TYPES, _activity_day, _safe_float,
+    ema_fitness_forward, grouped_fitness_series
+)
+from load_indices import compute_load_indices, indices_for_storage
+from storage import load_fitness_series, save_fitness_series, save_metrics
+
+logger = logging.getLogger(__name__)
+
+
+SERIES_VERSION = 3
+
+# Janela padrão de fitness_metrics.json (compatibilidade com o restante do app)
+METRICS_WINDOW_DAYS = 42
+
+# Quebras materializadas junto com o total: nome -> grupos possíveis
+LOAD_BREAKDOWNS = {
+    'by_category': tuple(CATEGORY_CODES),
+    'by_tss_type': TSS_SOURCE_TYPES,
+}
+
+
+def _activity_key(activity: dict, position: int) -> str:
+    key = (
+        activity.get('activityId') or activity.get('activityUUID')
+        or activity.get('startTimeLocal') or activity.get('startTime')
+    )
+    return str(key) if key else f"#{position}"
+
+
+def _contributions(workouts_with_tss: List[dict]) -> Dict[str, Tuple[str, float, str, str]]:
+    """Contribuição (dia, tss, modalidade, fonte) por atividade, a partir de workouts enriquecidos"""
+    contributions = {}
+    for position, activity in enumerate(workouts_with_tss):
+        tss = _safe_float(activity.get('tss', 0.0), 0.0)
+        if tss <= 0:
+            continue
+        try:
+            day = _activity_day(activity)
+        except (ValueError, TypeError, AttributeError):
+            continue
+        if day is None:
+            continue
+        category = activity.get('category')
+        if category not in CATEGORY_CODES:
+            category = 'other'
+        tss_type = activity.get('tss_type')
+        if tss_type not in TSS_SOURCE_TYPES:
+            tss_type = 'estimated'
+        key = _activity_key(activity, position)
+        if key in contributions:
+            # Mesma chave duas vezes: somar no mesmo dia (como calculate_fitness_metrics)
+            prev_day, prev_tss, prev_category, prev_type = contributions[key]
+            if (prev_day, prev_category, prev_type) == (day.isoformat(), category, tss_type):
+                contributions[key] = (prev_day, prev_tss + tss, category, tss_type)
+                continue
+            key = f"{key}#{position}"
+        contributions[key] = (day.isoformat(), tss, category, tss_type)
+    return contributions
+
+
+def _changed_from(old: dict, new: dict) -> Optional[str]:
+    """Dia mais antigo afetado por diferenças entre contribuições (None se iguais)"""
+    changed = []
+    for key, value in new.items():
+        previous = old.get(key)
+        if previous is None or tuple(previous) != tuple(value):
+            changed.append(value[0])
+            if previous is not None:
+                changed.append(previous[0])
+    for key, value in old.items():
+        if key not in new:
+            changed.append(value[0])
+    return min(changed) if changed else None
+
+
+def update_fitness_series(workouts_with_tss: List[dict], today: Optional[date] = None) -> dict:
+    """
+    Atualiza (e salva) a série materializada com as atividades atuais.
+
+    Args:
+        workouts_with_tss: Atividades já com 'tss' (enrich_workouts_with_tss)
+        today: Último dia da série (padrão: hoje)
+
+    Returns:
+        Série atualizada (mesmo formato salvo)
+    """
+    today = today or date.today()
+    series = load_fitness_series()
+    new_contrib = _contributions(workouts_with_tss)
+
+    if not new_contrib:
+        series = {'version': SERIES_VERSION, 'start': today.isoformat(),
+                  'daily_tss': [0.0], 'ctl': [0.0], 'atl': [0.0], 'contributions': {}}
+        series['indices'] = indices_for_storage(compute_load_indices(series['daily_tss'], series['ctl']))
+        for breakdown in LOAD_BREAKDOWNS:
+            series[breakdown] = {}
+        save_fitness_series(series)
+        return series
+
+    first_day = datetime.strptime(min(value[0] for value in new_contrib.values()), '%Y-%m-%d').date()
+    valid = (
+        series.get('version') == SERIES_VERSION
+        and series.get('start')
+        and len(series.get('ctl', [])) == len(series.get('daily_tss', [])) > 0
+    )
+    if valid:
+        start = datetime.strptime(series['start'], '%Y-%m-%d').date()
+        changed = _changed_from(series.get('contributions', {}), new_contrib)
+        last_day = start + timedelta(days=len(series['daily_tss']) - 1)
+        if first_day < start:
+            # Atividade anterior ao início da série: reconstrução completa
+            valid = False
+        elif changed is not None:
+            # Também cobre dias ainda não materializados entre o fim da série e D
+            from_day = min(datetime.strptime(changed, '%Y-%m-%d').date(), last_day + timedelta(days=1))
+        elif last_day < today:
+            from_day = last_day + timedelta(days=1)
+        elif last_day == today:
+            return series
+        else:
+            # Série à frente de "hoje" (relógio/fuso): refazer
+            valid = False
+
+    if not valid:
+        start = first_day
+        from_day = first_day
+
+    offset = (from_day - start).days
+    n_days = max((today - from_day).days + 1, 0)
+    keep = offset if valid and offset > 0 else 0
+
+    # Linhas: 0 = total, depois uma por grupo de cada quebra
+    rows = [('total', None)]
+    for breakdown, names in LOAD_BREAKDOWNS.items():
+        rows.extend((breakdown, name) for name in names)
+    row_index = {row: i for i, row in enumerate(rows)}
+
+    values = list(new_contrib.values())
+    day_offsets = (
+        np.array([value[0] for value in values], dtype='datetime64[D]') - np.datetime64(from_day)
+    ).astype(np.int64)
+    tss = np.array([value[1] for value in values], dtype=np.float64)
+    category_rows = np.array([row_index[('by_category', value[2])] for value in values], dtype=np.int64)
+    type_rows = np.array([row_index[('by_tss_type', value[3])] for value in values], dtype=np.int64)
+
+    # Estado inicial de cada linha = último dia mantido da série anterior
+    initial_ctl = np.zeros(len(rows))
+    initial_atl = np.zeros(len(rows))
+    if keep:
+        for i, (breakdown, name) in enumerate(rows):
+            source = series if breakdown == 'total' else series.get(breakdown, {}).get(name)
+            if source and len(source.get('ctl', [])) >= keep:
+                initial_ctl[i] = source['ctl'][keep - 1]
+                initial_atl[i] = source['atl'][keep - 1]
+
+    # Uma passada agrupada: cada contribuição entra no total, na modalidade e na fonte
+    load, ctl_tail, atl_tail = grouped_fitness_series(
+        np.concatenate([day_offsets, day_offsets, day_offsets]),
+        np.concatenate([tss, tss, tss]),
+        np.concatenate([np.zeros(len(values), dtype=np.int64), category_rows, type_rows]),
+        len(rows), n_days, initial_ctl, initial_atl
+    )
+
+    updated = {
+        'version': SERIES_VERSION,
+        'start': start.isoformat(),
+        'daily_tss': series['daily_tss'][:keep] + load[0].tolist() if keep else load[0].tolist(),
+        'ctl': series['ctl'][:keep] + ctl_tail[0].tolist() if keep else ctl_tail[0].tolist(),
+        'atl': series['atl'][:keep] + atl_tail[0].tolist() if keep else atl_tail[0].tolist(),
+    }
+    for breakdown in LOAD_BREAKDOWNS:
+        updated[breakdown] = {}
+    for i, (breakdown, name) in enumerate(rows[1:], start=1):
+        previous = series.get(breakdown, {}).get(name) if keep else None
+        has_load = bool(load[i].any()) or (previous is not None)
+        if not has_load:
+            # Grupo sem nenhuma atividade no histórico: não salvar zeros
+            continue
+        group = {}
+        for field, tail in (('daily_tss', load[i]), ('ctl', ctl_tail[i]), ('atl', atl_tail[i])):
+            head = list(previous[field][:keep]) if previous else [0.0] * keep
+            group[field] = head + tail.tolist()
+        updated[breakdown][name] = group
+    # Índices de risco dependem de janelas para trás: recalculados inteiros (vetorizado)
+    updated['indices'] = indices_for_storage(compute_load_indices(updated['daily_tss'], updated['ctl']))
+    updated['contributions'] = {key: list(value) for key, value in new_contrib.items()}
+
+    save_fitness_series(updated)
+    logger.info(f"[SERIES] CTL/ATL recalculados de {from_day.isoformat()} ({n_days} dias, {len(rows)} séries)")
+    return updated
+
+
+def series_to_metrics(series: dict, start_date: date, end_date: date) -> List[dict]:
+    """
+    Recorte [start_date, end_date] da série no formato de calculate_fitness_metrics
+    (dias antes do início da série têm CTL/ATL 0).
+    """
+    if not series or not series.get('start'):
+        return []
+    series_start = datetime.strptime(series['start'], '%Y-%m-%d').date()
+    daily_tss = series['daily_tss']
+    ctl_values = series['ctl']
+    atl_values = series['atl']
+
+    metrics = []
+    current = start_date
+    while current <= end_date:
+        index = (current - series_start).days
+        if 0 <= index < len(ctl_values):
+            tss_today, ctl, atl = daily_tss[index], ctl_values[index], atl_values[index]
+        elif index >= len(ctl_values) and ctl_values:
+            # Além do fim da série: decaimento sem treino a partir do último dia
+            gap = index - len(ctl_values) + 1
+            ctl_tail, atl_tail = ema_fitness_forward([0.0] * gap, ctl_values[-1], atl_values[-1])
+            tss_today, ctl, atl = 0.0, ctl_tail[-1], atl_tail[-1]
+        else:
+            tss_today, ctl, atl = 0.0, 0.0, 0.0
+        metrics.append({
+            'date': current.isoformat(),
+            'ctl': round(ctl, 1),
+            'atl': round(atl, 1),
+            'tsb': round(ctl - atl, 1),
+            'daily_tss': round(tss_today, 1),
+            # Compatibilidade com versões antigas do app/UI
+            'daily_load': round(tss_today, 1)
+        })
+        current += timedelta(days=1)
+    return metrics
+
+
+def breakdown_to_metrics(series: dict, breakdown: str, name: str, start_date: date, end_date: date) -> List[dict]:
+    """
+    Recorte de uma série da quebra (ex.: 'by_category'/'running' ou
+    'by_tss_type'/'hrtss') no formato de calculate_fitness_metrics.
+    Grupos sem atividades retornam CTL/ATL 0.
+    """
+    if not series or not series.get('start'):
+        return []
+    group = (series.get(breakdown) or {}).get(name) or {'daily_tss': [], 'ctl': [], 'atl': []}
+    return series_to_metrics({'start': series['start'], **group}, start_date, end_date)
+
+
+def current_breakdown(series: dict, breakdown: str) -> Dict[str, dict]:
+    """CTL/ATL/TSB do último dia de cada grupo da quebra ({nome: {'ctl', 'atl', 'tsb'}})"""
+    result = {}
+    for name, group in (series or {}).get(breakdown, {}).items():
+        if not group.get('ctl'):
+            continue
+        ctl, atl = group['ctl'][-1], group['atl'][-1]
+        result[name] = {'ctl': round(ctl, 1), 'atl': round(atl, 1), 'tsb': round(ctl - atl, 1)}
+    return result
+
+
+def metrics_window(series: dict, days: int = METRICS_WINDOW_DAYS) -> List[dict]:
+    """Salva o recorte dos últimos `days` dias da série em fitness_metrics.json"""
+    today = date.today()
+    metrics = series_to_metrics(series, today - timedelta(days=days), today)
+    save_metrics(metrics)
+    return metrics
+
+
+def refresh_fitness_metrics(workouts_with_tss: List[dict], days: int = METRICS_WINDOW_DAYS) -> List[dict]:
+    """
+    Atualiza a série completa e salva o recorte dos últimos `days` dias em
+    fitness_metrics.json (usado pelo restante do app).
+    """
+    return metrics_window(update_fitness_series(workouts_with_tss, date.today()), days)
@@ -4,20 +4,82 @@ Módulo enriquecido de integração Garmin com cache e tratamento de erros robus
 Expõe métodos de saúde, training status, e exercícios com fallback gracioso.
 """
 from garminconnect import Garmin
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta, date
 from typing import Optional, Dict, List, Any
 from cache_manager import get_or_fetch, invalidate_type
+from storage import list_stream_ids, load_exercises, save_activity_stream, save_exercises
 
 import logging
+import threading
+import time
 
 logger = logging.getLogger(__name__)
 
 
+# Tipos de atividade com detalhes de exercícios (séries, reps, peso)
+STRENGTH_TYPE_KEYS = {
+    'strength_training', 'weight_training', 'functional_strength_training',
+    'gym_strength_training', 'crossfit', 'hiit'
+}
+
+# Limite padrão de requisições ao Garmin (evita HTTP 429)
+DEFAULT_REQUESTS_PER_SECOND = 4.0
+DEFAULT_BURST = 4
+
+# Paralelismo e frequência de persistência da busca de exercícios
+EXERCISE_FETCH_WORKERS = 4
+EXERCISE_SAVE_EVERY = 10
+# Marcador em exercises.json: atividade consultada, sem detalhes de exercícios
+EXERCISES_NO_DATA = 'no_data'
+
+# Streams por segundo: chaves do activity details do Garmin -> nomes usados no TSS
+STREAM_METRIC_KEYS = {
+    'sumDuration': 'time',
+    'directPower': 'power',
+    'directHeartRate': 'heart_rate',
+    'directSpeed': 'speed',
+    'directElevation': 'altitude',
+    'sumDistance': 'distance',
+    'directTimestamp': 'timestamp',
+}
+
+# Amostras pedidas ao Garmin por atividade (maxchart) e limite de atividades por
+# sync (mais recentes primeiro; o histórico antigo é completado aos poucos)
+STREAM_MAX_CHART = 20000
+STREAM_FETCH_LIMIT = 12
+
+
+class RateLimiter:
+    """Token bucket thread-safe para limitar requisições por segundo"""
+
+    def __init__(self, rate: float = DEFAULT_REQUESTS_PER_SECOND, burst: int = DEFAULT_BURST):
+        self.rate = max(0.01, float(rate))
+        self.capacity = max(1, int(burst))
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Bloqueia até haver um token disponível"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+                wait = (1.0 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
 class GarminEnhanced:
     """Wrapper enriquecido do cliente Garmin com cache e novos endpoints"""
     
-    def __init__(self, client: Garmin):
+    def __init__(self, client: Garmin, rate_limiter: Optional[RateLimiter] = None):
         self.client = client
+        self.rate_limiter = rate_limiter or RateLimiter()
     
     # ========== HEALTH METRICS (Saúde Avançada) ==========
     
@@ -33,13 +95,29 @@ class GarminEnhanced:
         )
     
     def _fetch_hrv(self, cdate: date) -> Optional[Dict]:
+        return self._fetch_health_day('get_hrv_data', 'HRV', cdate)
+    
+    def _fetch_health_day(self, method_name: str, label: str, cdate: date) -> Optional[Dict]:
+        """
+        Chamada diária de saúde no cliente. Erros de rede/API propagam (quem
+        chama decide se o dia fica pendente); None/{} é um dia realmente sem dado.
+        """
+        method = getattr(self.client, method_name, None)
+        if method is None:
+            raise NotImplementedError(f"Cliente sem {method_name}")
         try:
-            if hasattr(self.client, 'get_hrv_data'):
-                return self.client.get_hrv_data(cdate.isoformat())
-            return None
+            return method(cdate.isoformat())
         except Exception as e:
-            logger.warning(f"Erro ao buscar HRV: {e}")
-            return None
+            logger.warning(f"Erro ao buscar {label}: {e}")
+            raise
+    
+    def fetch_health_day(self, metric: str, cdate: date) -> Optional[Dict]:
+        """
+        Busca um dia de HRV/Stress/Sleep sem cache e sem engolir erros
+        (usado pelo sync do health_store: só resposta vazia vira dia final sem dado).
+        """
+        fetchers = {'hrv': self._fetch_hrv, 'stress': self._fetch_stress, 'sleep': self._fetch_sleep}
+        return fetchers[metric](cdate)
     
     def get_vo2_max_estimate(self) -> Optional[float]:
         """Obtém estimativa de VO2 Máx do Garmin"""
@@ -74,13 +152,7 @@ class GarminEnhanced:
         )
     
     def _fetch_stress(self, cdate: date) -> Optional[Dict]:
-        try:
-            if hasattr(self.client, 'get_stress_data'):
-                return self.client.get_stress_data(cdate.isoformat())
-            return None
-        except Exception as e:
-            logger.warning(f"Erro ao buscar Stress: {e}")
-            return None
+        return self._fetch_health_day('get_stress_data', 'Stress', cdate)
     
     def get_sleep_data(self, cdate: Optional[date] = None) -> Optional[Dict]:
         """Busca dados de sono para uma data"""
@@ -94,13 +166,7 @@ class GarminEnhanced:
         )
     
     def _fetch_sleep(self, cdate: date) -> Optional[Dict]:
-        try:
-            if hasattr(self.client, 'get_sleep_data'):
-                return self.client.get_sleep_data(cdate.isoformat())
-            return None
-        except Exception as e:
-            logger.warning(f"Erro ao buscar Sleep: {e}")
-            return None
+        return self._fetch_health_day('get_sleep_data', 'Sleep', cdate)
     
     def get_body_composition(self) -> Optional[Dict]:
         """Busca dados de composição corporal (peso, % gordura, músculos)"""
@@ -195,6 +261,7 @@ class GarminEnhanced:
     def _fetch_workout_exercises(self, activity_id: str) -> Optional[Dict]:
         try:
             if hasattr(self.client, 'get_workout_details'):
+                self.rate_limiter.acquire()
                 details = self.client.get_workout_details(activity_id)
                 if isinstance(details, dict):
                     # Extrair apenas os exercícios
@@ -212,44 +279,187 @@ class GarminEnhanced:
             return None
         except Exception as e:
             logger.warning(f"Erro ao buscar Workout Details {activity_id}: {e}")
-            return None
+            raise
     
-    def get_all_exercises_range(
+    def get_all_exercises(
         self,
-        start_date: date,
-        end_date: date,
-        activity_list: List[Dict]
+        activity_list: List[Dict],
+        max_workers: int = EXERCISE_FETCH_WORKERS,
+        persist: bool = True
     ) -> Dict[str, Dict]:
         """
-        Busca exercícios para todas as atividades de força em um período.
+        Busca exercícios para todas as atividades de força da lista.
+        
+        Apenas atividades ausentes do armazenamento de exercícios
+        (exercises.json) são consultadas no Garmin, em paralelo e sob o
+        rate limiter. Os resultados são persistidos incrementalmente, então
+        uma sincronização interrompida não perde o que já foi baixado.
+        Atividades sem detalhes de exercícios recebem um marcador
+        (EXERCISES_NO_DATA) para não serem consultadas de novo; falhas de
+        rede ficam pendentes para a próxima sincronização.
         
         Args:
-            start_date, end_date: Período
             activity_list: Lista de atividades do Garmin
+            max_workers: Requisições simultâneas
+            persist: Salvar resultados em exercises.json
         
         Returns:
-            {activity_id: {...exercicio_details...}}
+            {activity_id: {...exercicio_details...}} (sem os marcadores)
         """
+        if not hasattr(self.client, 'get_workout_details'):
+            return {}
+        stored = load_exercises() if persist else {}
         all_exercises = {}
+        missing_ids = []
         
         # Filtrar apenas atividades de força
-        strength_activities = [
-            a for a in activity_list
-            if a.get('activityType', {}).get('typeKey', '').lower() in [
-                'strength_training', 'weight_training', 'functional_strength_training',
-                'gym_strength_training', 'crossfit', 'hiit'
-            ]
-        ]
-        
-        for activity in strength_activities:
+        for activity in activity_list:
+            type_key = ((activity.get('activityType') or {}).get('typeKey') or '').lower()
+            if type_key not in STRENGTH_TYPE_KEYS:
+                continue
             activity_id = activity.get('activityId') or activity.get('activityUUID')
-            if activity_id:
-                exercises = self.get_workout_exercises(activity_id)
+            if not activity_id:
+                continue
+            
+            key = str(activity_id)
+            if key in stored:
+                if not stored[key].get(EXERCISES_NO_DATA):
+                    all_exercises[key] = stored[key]
+            elif key not in missing_ids:
+                missing_ids.append(key)
+        
+        if not missing_ids:
+            return all_exercises
+        
+        logger.info(f"[EXERCISES] Buscando detalhes de {len(missing_ids)} atividades de força")
+        
+        pending_save = 0
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            futures = {
+                executor.submit(self._fetch_workout_exercises, activity_id): activity_id
+                for activity_id in missing_ids
+            }
+            for future in as_completed(futures):
+                activity_id = futures[future]
+                try:
+                    exercises = future.result()
+                except Exception as e:
+                    logger.warning(f"Erro ao buscar exercícios {activity_id}: {e}")
+                    continue
                 if exercises:
                     all_exercises[activity_id] = exercises
+                else:
+                    exercises = {'activity_id': activity_id, EXERCISES_NO_DATA: True}
+                if persist:
+                    stored[activity_id] = exercises
+                    pending_save += 1
+                    if pending_save >= EXERCISE_SAVE_EVERY:
+                        save_exercises(stored)
+                        pending_save = 0
+        
+        if persist and pending_save:
+            save_exercises(stored)
         
         return all_exercises
     
+    # ========== STREAMS POR SEGUNDO ==========
+    
+    @staticmethod
+    def parse_activity_streams(details: Optional[Dict]) -> Dict[str, List[float]]:
+        """
+        Converte o activity details do Garmin (metricDescriptors +
+        activityDetailMetrics) em colunas {'time', 'power', 'heart_rate', ...}.
+        """
+        if not isinstance(details, dict):
+            return {}
+        descriptors = details.get('metricDescriptors') or []
+        rows = details.get('activityDetailMetrics') or []
+        columns = {}
+        for descriptor in descriptors:
+            name = STREAM_METRIC_KEYS.get(descriptor.get('key'))
+            index = descriptor.get('metricsIndex')
+            if name and index is not None:
+                columns[name] = index
+        if not ({'time', 'timestamp'} & set(columns)) or not rows:
+            return {}
+        
+        stream = {name: [] for name in columns}
+        skipped = 0
+        for row in rows:
+            metrics = (row.get('metrics') if isinstance(row, dict) else None) or []
+            # Linha malformada (valor não numérico) é descartada inteira para
+            # manter as colunas alinhadas; não é erro de rede, não deve re-tentar
+            try:
+                values = [
+                    float(metrics[index]) if index < len(metrics) and metrics[index] is not None else float('nan')
+                    for index in columns.values()
+                ]
+            except (TypeError, ValueError):
+                skipped += 1
+                continue
+            for name, value in zip(columns, values):
+                stream[name].append(value)
+        if skipped:
+            logger.warning(f"Stream: {skipped} linha(s) malformada(s) descartada(s)")
+        
+        # Sem sumDuration: tempo relativo a partir do timestamp (ms)
+        timestamps = stream.pop('timestamp', None)
+        if 'time' not in stream and timestamps:
+            stream['time'] = [(t - timestamps[0]) / 1000.0 for t in timestamps]
+        return stream
+    
+    def _fetch_activity_streams(self, activity_id: str) -> Dict[str, List[float]]:
+        try:
+            if hasattr(self.client, 'get_activity_details'):
+                self.rate_limiter.acquire()
+                details = self.client.get_activity_details(activity_id, maxchart=STREAM_MAX_CHART)
+                return self.parse_activity_streams(details)
+        except Exception as e:
+            logger.warning(f"Erro ao buscar streams {activity_id}: {e}")
+            raise
+        return {}
+    
+    def sync_activity_streams(
+        self,
+        activity_list: List[Dict],
+        max_workers: int = EXERCISE_FETCH_WORKERS,
+        limit: int = STREAM_FETCH_LIMIT
+    ) -> int:
+        """
+        Baixa e salva streams por segundo das atividades que ainda não têm
+        (streams/<id>.npz). Atividades sem stream recebem um marcador vazio
+        para não serem consultadas de novo; falhas de rede ficam pendentes.
+        
+        Returns:
+            Quantidade de atividades com stream salvo nesta chamada
+        """
+        stored = list_stream_ids()
+        missing_ids = []
+        for activity in sorted(activity_list, key=lambda a: str(a.get('startTimeLocal', '')), reverse=True):
+            activity_id = activity.get('activityId')
+            if activity_id and str(activity_id) not in stored and str(activity_id) not in missing_ids:
+                missing_ids.append(str(activity_id))
+        missing_ids = missing_ids[:limit]
+        if not missing_ids:
+            return 0
+        
+        logger.info(f"[STREAMS] Buscando streams de {len(missing_ids)} atividades")
+        saved = 0
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            futures = {
+                executor.submit(self._fetch_activity_streams, activity_id): activity_id
+                for activity_id in missing_ids
+            }
+            for future in as_completed(futures):
+                activity_id = futures[future]
+                try:
+                    stream = future.result()
+                except Exception:
+                    continue
+                save_activity_stream(activity_id, stream)
+                saved += 1 if stream else 0
+        return saved
+    
     # ========== UTILITÁRIOS ==========
     
     def invalidate_all_caches(self):
@@ -0,0 +1,189 @@
+"""
+Armazenamento diário de séries de saúde (HRV, Sono, Stress, FC de repouso) em SQLite.
+
+Diferente de health_metrics.json (snapshot dos últimos dias sobrescrito a cada
+sync), aqui cada linha é (métrica, dia) e o histórico cresce a cada sincronização:
+- Leitura por intervalo, sem carregar o histórico inteiro em memória
+- Dias já consolidados (is_final) nunca são buscados de novo no Garmin
+- Dias recentes (hoje/ontem) ficam provisórios e são rebuscados até consolidarem
+- Dias sem dado também são gravados (valor NULL) para não gerar chamadas repetidas
+"""
+import json
+import sqlite3
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+
+from storage import DATA_DIR, _try_secure_file
+
+
+HEALTH_STORE_DB = DATA_DIR / "health_store.db"
+
+# Métricas armazenadas (mesmas chaves de health_metrics.json + FC de repouso)
+HEALTH_SERIES = ('hrv', 'stress', 'sleep', 'rhr')
+
+# Um dia é considerado final quando buscado pelo menos FINAL_LAG_DAYS dias depois
+# (sono/HRV de hoje e o stress de ontem ainda podem mudar no Garmin)
+FINAL_LAG_DAYS = 1
+
+
+def _connect() -> sqlite3.Connection:
+    """Abre a conexão e garante o schema"""
+    conn = sqlite3.connect(HEALTH_STORE_DB)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS health_daily (
+            metric TEXT NOT NULL,
+            day TEXT NOT NULL,
+            value TEXT,
+            is_final INTEGER NOT NULL DEFAULT 0,
+            fetched_at TIMESTAMP NOT NULL,
+            PRIMARY KEY (metric, day)
+        )
+    """)
+    return conn
+
+
+def _as_date(value) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(str(value)[:10], '%Y-%m-%d').date()
+
+
+def _is_final(day: date, fetched_on: date) -> bool:
+    return day < fetched_on - timedelta(days=FINAL_LAG_DAYS)
+
+
+def save_days(metric: str, days: Dict[str, Optional[dict]], fetched_on: Optional[date] = None) -> int:
+    """
+    Grava (ou atualiza) os dias de uma métrica.
+
+    Args:
+        metric: Uma de HEALTH_SERIES
+        days: {'YYYY-MM-DD': dados} — None registra "dia sem dado"
+        fetched_on: Data da coleta (padrão: hoje), define se o dia já é final
+
+    Returns:
+        Quantidade de dias gravados
+    """
+    if not days:
+        return 0
+    fetched_on = fetched_on or date.today()
+    now = datetime.now().isoformat()
+
+    rows = []
+    for day_str, data in days.items():
+        day = _as_date(day_str)
+        rows.append((
+            metric,
+            day.isoformat(),
+            json.dumps(data) if data is not None else None,
+            1 if _is_final(day, fetched_on) else 0,
+            now,
+        ))
+
+    conn = _connect()
+    try:
+        # Não rebaixa um dia final com dado para provisório/vazio
+        conn.executemany("""
+            INSERT INTO health_daily (metric, day, value, is_final, fetched_at)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(metric, day) DO UPDATE SET
+                value = COALESCE(excluded.value, health_daily.value),
+                is_final = MAX(excluded.is_final, health_daily.is_final),
+                fetched_at = excluded.fetched_at
+        """, rows)
+        conn.commit()
+    finally:
+        conn.close()
+    _try_secure_file(HEALTH_STORE_DB)
+    return len(rows)
+
+
+def load_range(metric: str, start, end) -> Dict[str, dict]:
+    """
+    Lê os dias [start, end] de uma métrica, em ordem cronológica.
+
+    Returns:
+        {'YYYY-MM-DD': dados} apenas para dias com dado
+    """
+    if not HEALTH_STORE_DB.exists():
+        return {}
+    conn = _connect()
+    try:
+        cursor = conn.execute(
+            "SELECT day, value FROM health_daily "
+            "WHERE metric = ? AND day BETWEEN ? AND ? AND value IS NOT NULL ORDER BY day",
+            (metric, _as_date(start).isoformat(), _as_date(end).isoformat())
+        )
+        result = {}
+        for day, value in cursor:
+            try:
+                result[day] = json.loads(value)
+            except (TypeError, json.JSONDecodeError):
+                continue
+        return result
+    finally:
+        conn.close()
+
+
+def days_to_fetch(metric: str, start, end) -> List[date]:
+    """
+    Dias de [start, end] que ainda precisam ser buscados no Garmin
+    (ausentes no store ou ainda não finais), do mais recente ao mais antigo.
+    """
+    start, end = _as_date(start), _as_date(end)
+    final_days = set()
+    if HEALTH_STORE_DB.exists():
+        conn = _connect()
+        try:
+            cursor = conn.execute(
+                "SELECT day FROM health_daily WHERE metric = ? AND day BETWEEN ? AND ? AND is_final = 1",
+                (metric, start.isoformat(), end.isoformat())
+            )
+            final_days = {row[0] for row in cursor}
+        finally:
+            conn.close()
+
+    pending = []
+    current = end
+    while current >= start:
+        if current.isoformat() not in final_days:
+            pending.append(current)
+        current -= timedelta(days=1)
+    return pending
+
+
+def import_snapshot(health_data: dict, fetched_on: Optional[date] = None) -> int:
+    """Importa as seções diárias de um health_metrics.json para o store"""
+    if not isinstance(health_data, dict):
+        return 0
+    if fetched_on is None and health_data.get('timestamp'):
+        try:
+            fetched_on = _as_date(health_data['timestamp'])
+        except ValueError:
+            fetched_on = None
+
+    total = 0
+    for metric in ('hrv', 'stress', 'sleep'):
+        section = health_data.get(metric)
+        if isinstance(section, dict) and section:
+            total += save_days(metric, section, fetched_on)
+    return total
+
+
+def get_store_stats() -> dict:
+    """Retorna quantidade de dias e intervalo armazenado por métrica"""
+    if not HEALTH_STORE_DB.exists():
+        return {}
+    conn = _connect()
+    try:
+        cursor = conn.execute(
+            "SELECT metric, COUNT(value), MIN(day), MAX(day) FROM health_daily GROUP BY metric"
+        )
+        return {
+            metric: {'days': count, 'first_day': first, 'last_day': last}
+            for metric, count, first, last in cursor
+        }
+    finally:
+        conn.close()
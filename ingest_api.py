@@ -0,0 +1,334 @@
+"""
+Endpoint de ingestão push (estilo Garmin Health API) no servidor Flask do app.
+
+Rotas:
+- POST /api/ingest/activities  -> {"activities": [...]} (também "activityDetails",
+  "manuallyUpdatedActivities") no formato push do Garmin ou no formato Connect
+- POST /api/ingest/health      -> {"dailies": [...], "sleeps": [...], "hrv": [...],
+  "stressDetails": [...]}
+
+Cada payload é validado, deduplicado (activityId/summaryId) e dispara apenas o
+recálculo incremental de CTL/ATL/TSB a partir do dia mais antigo alterado,
+sem sincronização completa.
+
+Autenticação: header "Authorization: Bearer <INGEST_TOKEN>" ou "X-Ingest-Token".
+Sem INGEST_TOKEN configurado as rotas não são registradas (atrás de túnel ou
+proxy reverso toda requisição chega de 127.0.0.1, então "só local" não protege).
+"""
+import hmac
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from flask import jsonify, request
+
+import health_store
+from config import INGEST_TOKEN
+from fitness_series import refresh_fitness_metrics
+from storage import (
+    DATA_WRITE_LOCK, load_config, load_health_metrics, load_workouts,
+    save_health_metrics, save_workouts
+)
+from tss_enrichment import enrich_workouts_with_tss
+
+logger = logging.getLogger(__name__)
+
+
+# Limites de segurança do payload
+MAX_PAYLOAD_BYTES = 5 * 1024 * 1024
+MAX_ITEMS_PER_PAYLOAD = 1000
+
+ACTIVITY_PAYLOAD_KEYS = ('activities', 'activityDetails', 'manuallyUpdatedActivities')
+HEALTH_PAYLOAD_KEYS = ('dailies', 'sleeps', 'hrv', 'stressDetails')
+
+# =============================================================================
+# AUTENTICAÇÃO / VALIDAÇÃO DE REQUISIÇÃO
+# =============================================================================
+
+def _is_authorized() -> bool:
+    """Valida o token da requisição contra INGEST_TOKEN (sem token configurado, nega)"""
+    if not INGEST_TOKEN:
+        return False
+
+    auth = request.headers.get('Authorization', '')
+    token = auth[7:].strip() if auth.lower().startswith('bearer ') else request.headers.get('X-Ingest-Token', '')
+    return bool(token) and hmac.compare_digest(token.encode(), INGEST_TOKEN.encode())
+
+
+def _read_payload(list_keys: Tuple[str, ...]) -> Tuple[Optional[Dict], Optional[Tuple]]:
+    """Lê o JSON da requisição. Retorna (payload, None) ou (None, resposta_de_erro)"""
+    if not _is_authorized():
+        return None, (jsonify({'error': 'unauthorized'}), 401)
+
+    if request.content_length and request.content_length > MAX_PAYLOAD_BYTES:
+        return None, (jsonify({'error': 'payload too large'}), 413)
+
+    payload = request.get_json(silent=True)
+    if isinstance(payload, list):
+        payload = {list_keys[0]: payload}
+    if not isinstance(payload, dict) or not any(isinstance(payload.get(k), list) for k in list_keys):
+        return None, (jsonify({'error': f"JSON deve conter uma lista em: {', '.join(list_keys)}"}), 400)
+
+    total = sum(len(payload.get(k) or []) for k in list_keys if isinstance(payload.get(k), list))
+    if total > MAX_ITEMS_PER_PAYLOAD:
+        return None, (jsonify({'error': f'máximo de {MAX_ITEMS_PER_PAYLOAD} itens por payload'}), 413)
+
+    return payload, None
+
+
+# =============================================================================
+# NORMALIZAÇÃO DE ATIVIDADES
+# =============================================================================
+
+def _activity_key(activity: dict):
+    """Mesma chave de deduplicação usada na sincronização"""
+    return (
+        activity.get('activityId') or activity.get('activityUUID')
+        or activity.get('startTimeLocal') or activity.get('startTime')
+    )
+
+
+def _to_number(value) -> Optional[float]:
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def normalize_push_activity(item: dict) -> Tuple[Optional[dict], Optional[str]]:
+    """
+    Converte uma atividade push (Health API) para o formato Connect salvo no app.
+
+    Atividades que já estão no formato Connect (activityType dict e
+    startTimeLocal) são apenas validadas.
+
+    Returns:
+        (atividade_normalizada, None) ou (None, motivo_da_rejeição)
+    """
+    if not isinstance(item, dict):
+        return None, 'item não é um objeto'
+
+    # Formato Connect (ex.: reenviado pelo poster local)
+    if isinstance(item.get('activityType'), dict) and item.get('startTimeLocal'):
+        activity = dict(item)
+        try:
+            datetime.strptime(str(activity['startTimeLocal'])[:19].replace('T', ' '), '%Y-%m-%d %H:%M:%S')
+        except ValueError:
+            return None, 'startTimeLocal inválido'
+    else:
+        start_seconds = _to_number(item.get('startTimeInSeconds'))
+        if start_seconds is None or start_seconds <= 0:
+            return None, 'startTimeInSeconds ausente'
+        offset = _to_number(item.get('startTimeOffsetInSeconds')) or 0.0
+        start_gmt = datetime.fromtimestamp(start_seconds, tz=timezone.utc)
+        start_local = start_gmt + timedelta(seconds=offset)
+
+        type_key = str(item.get('activityType') or 'other').lower()
+        activity = {
+            'activityId': item.get('activityId') or item.get('summaryId'),
+            'summaryId': item.get('summaryId'),
+            'activityName': item.get('activityName') or type_key.replace('_', ' ').title(),
+            'activityType': {'typeKey': type_key},
+            'startTimeLocal': start_local.strftime('%Y-%m-%d %H:%M:%S'),
+            'startTimeGMT': start_gmt.strftime('%Y-%m-%d %H:%M:%S'),
+            'duration': _to_number(item.get('durationInSeconds')),
+            'distance': _to_number(item.get('distanceInMeters')) or 0.0,
+            'averageHR': _to_number(item.get('averageHeartRateInBeatsPerMinute')),
+            'maxHR': _to_number(item.get('maxHeartRateInBeatsPerMinute')),
+            'averageSpeed': _to_number(item.get('averageSpeedInMetersPerSecond')),
+            'averagePower': _to_number(item.get('averagePowerInWatts')),
+            'normalizedPower': _to_number(item.get('normalizedPowerInWatts')),
+            'calories': _to_number(item.get('activeKilocalories')),
+            'elevationGain': _to_number(item.get('totalElevationGainInMeters')),
+            'deviceName': item.get('deviceName'),
+            'source': 'push',
+        }
+        activity = {k: v for k, v in activity.items() if v is not None}
+
+    duration = _to_number(activity.get('duration'))
+    if duration is None or duration <= 0 or duration > 7 * 86400:
+        return None, 'duração inválida'
+    activity['duration'] = duration
+
+    if not _activity_key(activity):
+        return None, 'activityId/summaryId ausente'
+
+    return activity, None
+
+
+def ingest_activities(items: List[dict], config: Optional[dict] = None) -> Dict[str, Any]:
+    """
+    Valida, deduplica e mescla atividades no armazenamento e atualiza a série
+    materializada (update_fitness_series refaz a EMA só a partir do dia mais
+    antigo cuja contribuição mudou).
+
+    Returns:
+        Resumo com contagens de aceitas/atualizadas/duplicadas/rejeitadas
+    """
+    result = {'accepted': 0, 'updated': 0, 'duplicates': 0, 'rejected': []}
+
+    with DATA_WRITE_LOCK:
+        workouts = load_workouts()
+        index = {}
+        for i, w in enumerate(workouts):
+            key = _activity_key(w)
+            if key:
+                index[str(key)] = i
+
+        changed = False
+        for position, item in enumerate(items):
+            activity, reason = normalize_push_activity(item)
+            if activity is None:
+                result['rejected'].append({'index': position, 'reason': reason})
+                continue
+
+            key = str(_activity_key(activity))
+            existing = index.get(key)
+            if existing is not None:
+                merged = {**workouts[existing], **activity}
+                if merged == workouts[existing]:
+                    result['duplicates'] += 1
+                    continue
+                workouts[existing] = merged
+                changed = True
+                result['updated'] += 1
+            else:
+                index[key] = len(workouts)
+                workouts.append(activity)
+                changed = True
+                result['accepted'] += 1
+
+        if not changed:
+            return result
+
+        save_workouts(workouts)
+        # TSS vem do memo (só atividades novas/alteradas são calculadas) e a
+        # série refaz a EMA a partir do dia alterado
+        refresh_fitness_metrics(enrich_workouts_with_tss(workouts, config or load_config()))
+
+    return result
+
+
+# =============================================================================
+# NORMALIZAÇÃO DE SAÚDE
+# =============================================================================
+
+def _health_entries(payload: dict):
+    """
+    Converte listas push em (seção, data, dados) no formato de health_metrics.json.
+    Entradas com valor inválido saem com dados None (contadas como rejeitadas).
+    """
+    for item in payload.get('hrv') or []:
+        day = item.get('calendarDate') if isinstance(item, dict) else None
+        if day and item.get('lastNightAvg') is not None:
+            yield 'hrv', day, {'hrvSummary': {'calendarDate': day, 'lastNightAverage': item.get('lastNightAvg')}}
+
+    for item in payload.get('sleeps') or []:
+        day = item.get('calendarDate') if isinstance(item, dict) else None
+        if day and item.get('durationInSeconds'):
+            yield 'sleep', day, {'dailySleepDTO': {
+                'calendarDate': day,
+                'sleepTimeSeconds': item.get('durationInSeconds'),
+                'deepSleepSeconds': item.get('deepSleepDurationInSeconds', 0),
+                'remSleepSeconds': item.get('remSleepInSeconds', 0),
+            }}
+
+    for key in ('dailies', 'stressDetails'):
+        for item in payload.get(key) or []:
+            day = item.get('calendarDate') if isinstance(item, dict) else None
+            raw_avg = item.get('averageStressLevel') if day else None
+            avg = _to_number(raw_avg)
+            if raw_avg is not None and avg is None:
+                yield 'stress', day, None
+            elif day and avg is not None and avg >= 0:
+                yield 'stress', day, {
+                    'calendarDate': day,
+                    'avgStressLevel': avg,
+                    'maxStressLevel': item.get('maxStressLevel'),
+                }
+            rhr = item.get('restingHeartRateInBeatsPerMinute') if day else None
+            if rhr:
+                yield 'rhr', day, {'restingHeartRate': rhr}
+
+
+def ingest_health(payload: dict) -> Dict[str, Any]:
+    """
+    Mescla métricas de saúde push no health_store (histórico por dia) e no
+    snapshot health_metrics.json (apenas HRV/Stress/Sleep).
+    """
+    result = {'accepted': 0, 'duplicates': 0, 'rejected': 0}
+    store_days = {}
+
+    with DATA_WRITE_LOCK:
+        health = load_health_metrics() or {}
+        changed = False
+        for section, day, data in _health_entries(payload):
+            try:
+                datetime.strptime(day, '%Y-%m-%d')
+            except (TypeError, ValueError):
+                result['rejected'] += 1
+                continue
+            if data is None:
+                result['rejected'] += 1
+                continue
+            store_days.setdefault(section, {})[day] = data
+            if section == 'rhr':
+                result['accepted'] += 1
+                continue
+            bucket = health.setdefault(section, {})
+            if bucket.get(day) == data:
+                result['duplicates'] += 1
+                continue
+            bucket[day] = data
+            result['accepted'] += 1
+            changed = True
+
+        for section, days in store_days.items():
+            health_store.save_days(section, days)
+
+        if changed:
+            health['timestamp'] = datetime.now().isoformat()
+            save_health_metrics(health)
+
+    return result
+
+
+# =============================================================================
+# ROTAS
+# =============================================================================
+
+def register_ingest_routes(server) -> None:
+    """Registra as rotas de ingestão no servidor Flask do Dash (só com INGEST_TOKEN configurado)"""
+    if not INGEST_TOKEN:
+        logger.info("[INGEST] INGEST_TOKEN não configurado: rotas de ingestão push desativadas")
+        return
+
+    @server.route('/api/ingest/activities', methods=['POST'])
+    def ingest_activities_route():
+        payload, error = _read_payload(ACTIVITY_PAYLOAD_KEYS)
+        if error:
+            return error
+        items = []
+        for key in ACTIVITY_PAYLOAD_KEYS:
+            if isinstance(payload.get(key), list):
+                items.extend(payload[key])
+        try:
+            result = ingest_activities(items)
+        except Exception as e:
+            logger.error(f"[INGEST] Erro ao ingerir atividades: {e}", exc_info=True)
+            return jsonify({'error': 'falha ao processar atividades'}), 500
+        logger.info(f"[INGEST] Atividades: {result['accepted']} novas, {result['updated']} atualizadas, "
+                    f"{result['duplicates']} duplicadas, {len(result['rejected'])} rejeitadas")
+        return jsonify(result), 200
+
+    @server.route('/api/ingest/health', methods=['POST'])
+    def ingest_health_route():
+        payload, error = _read_payload(HEALTH_PAYLOAD_KEYS)
+        if error:
+            return error
+        try:
+            result = ingest_health(payload)
+        except Exception as e:
+            logger.error(f"[INGEST] Erro ao ingerir saúde: {e}", exc_info=True)
+            return jsonify({'error': 'falha ao processar dados de saúde'}), 500
+        return jsonify(result), 200
@@ -0,0 +1,144 @@
+"""
+Previsão Monte Carlo de CTL/ATL/TSB para um plano de treino.
+
+Em vez de extrapolar uma reta pelos últimos CTLs, roda a própria recursão EMA
+sobre milhares de cenários do TSS diário planejado:
+- A variabilidade dia a dia é aprendida do histórico: razão entre o TSS de
+  cada dia treinado e a média dos dias treinados nos 28 dias anteriores
+- Cada simulação sorteia (bootstrap) uma razão por dia planejado
+- Todas as simulações passam de uma vez pelo motor vetorizado (ema_load_matrix)
+- O resultado são faixas de percentis de CTL, ATL e TSB por dia e no dia da prova
+"""
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from calculations import ATL_TIME_CONSTANT, CTL_TIME_CONSTANT, ema_load_matrix
+
+
+FORECAST_SIMULATIONS = 2000
+FORECAST_PERCENTILES = (10, 25, 50, 75, 90)
+
+# Histórico usado para aprender a variabilidade diária
+VARIABILITY_WINDOW_DAYS = 180
+# Janela da média de referência de cada dia treinado
+BASELINE_DAYS = 28
+# Mínimo de dias treinados na janela de referência para a razão valer
+MIN_BASELINE_SESSIONS = 4
+# Mínimo de razões para usar o bootstrap (abaixo disso o plano é determinístico)
+MIN_RATIOS = 10
+# Razões extremas (ex.: prova longa) são limitadas para não dominar a cauda
+MAX_DAY_RATIO = 3.0
+
+
+def learn_day_ratios(daily_tss, window_days: int = VARIABILITY_WINDOW_DAYS) -> np.ndarray:
+    """
+    Razões TSS do dia / média dos dias treinados nos BASELINE_DAYS anteriores,
+    para cada dia treinado dos últimos `window_days` dias.
+
+    Returns:
+        Array de razões (array([1.0]) quando o histórico é insuficiente)
+    """
+    x = np.asarray(daily_tss, dtype=np.float64)[-(window_days + BASELINE_DAYS):]
+    if x.size <= BASELINE_DAYS:
+        return np.array([1.0])
+
+    trained = (x > 0).astype(np.float64)
+    load_sum = np.concatenate([[0.0], np.cumsum(x)])
+    session_sum = np.concatenate([[0.0], np.cumsum(trained)])
+
+    days = np.arange(BASELINE_DAYS, x.size)
+    baseline_load = load_sum[days] - load_sum[days - BASELINE_DAYS]
+    baseline_sessions = session_sum[days] - session_sum[days - BASELINE_DAYS]
+
+    valid = (x[days] > 0) & (baseline_sessions >= MIN_BASELINE_SESSIONS)
+    if valid.sum() < MIN_RATIOS:
+        return np.array([1.0])
+
+    baseline = baseline_load[valid] / baseline_sessions[valid]
+    return np.clip(x[days][valid] / baseline, 0.0, MAX_DAY_RATIO)
+
+
+def simulate_load_forecast(
+    planned_tss,
+    initial_ctl: float,
+    initial_atl: float,
+    day_ratios=None,
+    n_simulations: int = FORECAST_SIMULATIONS,
+    adherence: float = 1.0,
+    seed: Optional[int] = None
+) -> Dict[str, np.ndarray]:
+    """
+    Simula CTL/ATL/TSB dia a dia para o TSS planejado.
+
+    Args:
+        planned_tss: TSS planejado por dia (a partir de amanhã)
+        initial_ctl / initial_atl: Estado de hoje
+        day_ratios: Razões para o bootstrap (learn_day_ratios); None = plano exato
+        n_simulations: Quantidade de cenários
+        adherence: Probabilidade de cada sessão planejada ser feita (0-1)
+        seed: Semente do gerador (reprodutibilidade)
+
+    Returns:
+        dict com 'percentiles' e matrizes (percentis, dias) 'ctl', 'atl', 'tsb'
+    """
+    planned = np.asarray(planned_tss, dtype=np.float64)
+    if planned.size == 0:
+        empty = np.empty((len(FORECAST_PERCENTILES), 0))
+        return {'percentiles': FORECAST_PERCENTILES, 'ctl': empty, 'atl': empty, 'tsb': empty}
+
+    rng = np.random.default_rng(seed)
+    ratios = np.asarray(day_ratios if day_ratios is not None else [1.0], dtype=np.float64)
+    scenarios = planned * rng.choice(ratios, size=(n_simulations, planned.size))
+    if adherence < 1.0:
+        scenarios *= rng.random(scenarios.shape) < adherence
+
+    ema = ema_load_matrix(
+        scenarios,
+        (CTL_TIME_CONSTANT, ATL_TIME_CONSTANT),
+        initial=(initial_ctl, initial_atl)
+    )
+    ctl, atl = ema[0], ema[1]
+    return {
+        'percentiles': FORECAST_PERCENTILES,
+        'ctl': np.percentile(ctl, FORECAST_PERCENTILES, axis=0),
+        'atl': np.percentile(atl, FORECAST_PERCENTILES, axis=0),
+        'tsb': np.percentile(ctl - atl, FORECAST_PERCENTILES, axis=0),
+    }
+
+
+def forecast_from_series(
+    series: dict,
+    planned_tss: List[float],
+    n_simulations: int = FORECAST_SIMULATIONS,
+    adherence: float = 1.0,
+    seed: Optional[int] = None
+) -> dict:
+    """
+    Previsão a partir da série materializada (fitness_series.json): estado
+    inicial = último dia da série, variabilidade aprendida do TSS diário dela.
+
+    Returns:
+        Resultado de simulate_load_forecast + 'dates' e 'final' ({métrica: {percentil: valor}}
+        no último dia planejado, ex.: dia da prova)
+    """
+    ctl_values = (series or {}).get('ctl') or [0.0]
+    atl_values = (series or {}).get('atl') or [0.0]
+    ratios = learn_day_ratios((series or {}).get('daily_tss') or [])
+
+    result = simulate_load_forecast(
+        planned_tss, ctl_values[-1], atl_values[-1], ratios,
+        n_simulations=n_simulations, adherence=adherence, seed=seed
+    )
+
+    if series and series.get('start'):
+        last_day = datetime.strptime(series['start'], '%Y-%m-%d').date() + timedelta(days=len(ctl_values) - 1)
+    else:
+        last_day = date.today()
+    result['dates'] = [(last_day + timedelta(days=i + 1)).isoformat() for i in range(len(planned_tss))]
+    result['final'] = {
+        metric: {p: round(float(result[metric][i, -1]), 1) for i, p in enumerate(FORECAST_PERCENTILES)}
+        for metric in ('ctl', 'atl', 'tsb')
+    } if len(planned_tss) else {}
+    return result
@@ -0,0 +1,127 @@
+"""
+Índices de risco de carga sobre o histórico completo (vetorizados).
+
+Calculados de uma vez para todos os dias a partir da carga diária e do CTL
+da série materializada (fitness_series.json, chave 'indices'):
+- acwr_rolling: carga aguda (média 7 dias) / crônica (média 28 dias)
+- acwr_ewma: mesma razão com médias exponenciais (Williams et al., 2017)
+- monotony: média / desvio padrão da carga dos últimos 7 dias (Foster)
+- strain: carga semanal × monotonia (Foster)
+- ramp: variação do CTL em 7 dias (pontos/semana)
+
+Dias antes do início da série contam como carga zero (mesma convenção do CTL).
+Valores indefinidos (ex.: crônica zero) ficam None.
+"""
+from datetime import date, datetime, timedelta
+from typing import Dict, Optional
+
+import numpy as np
+
+from calculations import ema_load_matrix
+
+
+ACUTE_DAYS = 7
+CHRONIC_DAYS = 28
+MONOTONY_DAYS = 7
+RAMP_DAYS = 7
+
+# EWMA com λ = 2/(N+1) equivale à EMA linear com τ = (N+1)/2
+ACUTE_EWMA_TAU = (ACUTE_DAYS + 1) / 2
+CHRONIC_EWMA_TAU = (CHRONIC_DAYS + 1) / 2
+
+LOAD_INDICES = ('acwr_rolling', 'acwr_ewma', 'monotony', 'strain', 'ramp')
+
+# Faixas de referência
+ACWR_SWEET_SPOT = (0.8, 1.3)
+ACWR_DANGER = 1.5
+MONOTONY_HIGH = 2.0
+RAMP_HIGH = 8.0
+
+# Casas decimais salvas (os índices são recalculados inteiros a cada atualização)
+INDEX_DECIMALS = 3
+
+
+def _rolling_sum(x: np.ndarray, window: int) -> np.ndarray:
+    """Soma móvel de `window` dias terminando em cada dia (zeros antes do início)"""
+    csum = np.cumsum(x)
+    shifted = np.concatenate([np.zeros(window), csum[:-window]]) if x.size > window else np.zeros(x.size)
+    return csum - shifted[:x.size]
+
+
+def _safe_divide(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    out = np.full(numerator.shape, np.nan)
+    np.divide(numerator, denominator, out=out, where=denominator > 1e-9)
+    return out
+
+
+def compute_load_indices(daily_tss, ctl) -> Dict[str, np.ndarray]:
+    """
+    Todos os índices para todos os dias (NaN onde indefinido).
+
+    Args:
+        daily_tss: Carga diária da série
+        ctl: CTL da série (mesmo tamanho)
+    """
+    x = np.asarray(daily_tss, dtype=np.float64)
+    ctl = np.asarray(ctl, dtype=np.float64)
+    if x.size == 0:
+        return {name: np.empty(0) for name in LOAD_INDICES}
+
+    acute = _rolling_sum(x, ACUTE_DAYS) / ACUTE_DAYS
+    chronic = _rolling_sum(x, CHRONIC_DAYS) / CHRONIC_DAYS
+    ewma = ema_load_matrix(x, (ACUTE_EWMA_TAU, CHRONIC_EWMA_TAU))
+
+    week_sum = _rolling_sum(x, MONOTONY_DAYS)
+    week_mean = week_sum / MONOTONY_DAYS
+    week_var = np.maximum(_rolling_sum(x * x, MONOTONY_DAYS) / MONOTONY_DAYS - week_mean ** 2, 0.0)
+    monotony = _safe_divide(week_mean, np.sqrt(week_var))
+
+    ctl_before = np.concatenate([np.zeros(RAMP_DAYS), ctl[:-RAMP_DAYS]])[:ctl.size] if ctl.size > RAMP_DAYS \
+        else np.zeros(ctl.size)
+
+    return {
+        'acwr_rolling': _safe_divide(acute, chronic),
+        'acwr_ewma': _safe_divide(ewma[0], ewma[1]),
+        'monotony': monotony,
+        'strain': week_sum * monotony,
+        'ramp': ctl - ctl_before,
+    }
+
+
+def indices_for_storage(indices: Dict[str, np.ndarray]) -> Dict[str, list]:
+    """Converte para listas JSON (arredondadas, NaN -> None)"""
+    stored = {}
+    for name, values in indices.items():
+        rounded = np.round(values, INDEX_DECIMALS)
+        stored[name] = [None if np.isnan(v) else v for v in rounded.tolist()]
+    return stored
+
+
+def indices_range(series: dict, start_date: date, end_date: date) -> Dict[str, list]:
+    """
+    Recorte [start_date, end_date] dos índices salvos na série.
+
+    Returns:
+        {'dates': [...], índice: [...]} — dias fora da série ficam None
+    """
+    stored = (series or {}).get('indices') or {}
+    if not series or not series.get('start') or not stored:
+        return {'dates': [], **{name: [] for name in LOAD_INDICES}}
+
+    series_start = datetime.strptime(series['start'], '%Y-%m-%d').date()
+    first = (start_date - series_start).days
+    n_days = (end_date - start_date).days + 1
+    result = {'dates': [(start_date + timedelta(days=i)).isoformat() for i in range(max(n_days, 0))]}
+    for name in LOAD_INDICES:
+        values = stored.get(name, [])
+        result[name] = [
+            values[i] if 0 <= i < len(values) else None
+            for i in range(first, first + max(n_days, 0))
+        ]
+    return result
+
+
+def latest_indices(series: dict) -> Dict[str, Optional[float]]:
+    """Índices do último dia da série ({índice: valor ou None})"""
+    stored = (series or {}).get('indices') or {}
+    return {name: (stored.get(name) or [None])[-1] for name in LOAD_INDICES}
@@ -25,6 +25,8 @@ from reportlab.graphics.charts.piecharts import Pie
 import plotly.graph_objects as go
 from PIL import Image as PILImage
 
+from rollups import aggregate_by_category, empty_totals, sum_totals
+
 # =============================================================================
 # CONFIGURAÇÕES GLOBAIS
 # =============================================================================
@@ -102,7 +104,8 @@ def create_weekly_report(
     config: Dict,
     start_date: datetime,
     end_date: datetime,
-    output_path: str
+    output_path: str,
+    totals_by_category: Optional[Dict[str, Dict]] = None
 ) -> str:
     """
     Cria relatório semanal em PDF
@@ -114,6 +117,8 @@ def create_weekly_report(
         start_date: Data inicial
         end_date: Data final
         output_path: Caminho para salvar PDF
+        totals_by_category: Totais do período por modalidade (rollups);
+            se None, agrega a lista de treinos
         
     Returns:
         Caminho do arquivo gerado
@@ -162,16 +167,19 @@ def create_weekly_report(
     # === RESUMO EXECUTIVO ===
     story.append(Paragraph("📈 Resumo Executivo", heading_style))
     
-    # Calcular estatísticas da semana
-    total_activities = len(workouts)
-    total_distance = sum(float(w.get('distance', 0) or 0) for w in workouts) / 1000  # em km
-    total_duration = sum(float(w.get('duration', 0) or 0) for w in workouts) / 3600  # em horas
-    total_tss = sum(float(w.get('training_stress_score', 0) or 0) for w in workouts)
+    # Estatísticas da semana (totais por modalidade das tabelas de rollups)
+    if totals_by_category is None:
+        totals_by_category = aggregate_by_category(workouts)
+    totals = sum_totals(totals_by_category)
+    total_activities = int(totals['count'])
+    total_distance = totals['distance']  # em km
+    total_duration = totals['duration']  # em horas
+    total_tss = totals['tss']
     
     # Separar por modalidade
-    swim_count = len([w for w in workouts if w.get('activityType', {}).get('typeKey') == 'lap_swimming'])
-    bike_count = len([w for w in workouts if w.get('activityType', {}).get('typeKey') == 'cycling'])
-    run_count = len([w for w in workouts if w.get('activityType', {}).get('typeKey') == 'running'])
+    swim_count = int(totals_by_category.get('swimming', empty_totals())['count'])
+    bike_count = int(totals_by_category.get('cycling', empty_totals())['count'])
+    run_count = int(totals_by_category.get('running', empty_totals())['count'])
     
     summary_data = [
         ['Métrica', 'Valor', 'Status'],
@@ -276,7 +284,7 @@ def create_weekly_report(
             
             duration_min = int(float(workout.get('duration', 0) or 0) / 60)
             distance_km = float(workout.get('distance', 0) or 0) / 1000
-            tss = float(workout.get('training_stress_score', 0) or 0)
+            tss = float(workout.get('tss', workout.get('training_stress_score', 0)) or 0)
             
             workouts_data.append([
                 date_str[-5:],  # Apenas MM-DD
@@ -361,7 +369,8 @@ def create_monthly_report(
     config: Dict,
     month: int,
     year: int,
-    output_path: str
+    output_path: str,
+    totals_by_category: Optional[Dict[str, Dict]] = None
 ) -> str:
     """
     Cria relatório mensal em PDF (mais detalhado que o semanal)
@@ -373,6 +382,8 @@ def create_monthly_report(
         month: Mês (1-12)
         year: Ano
         output_path: Caminho para salvar PDF
+        totals_by_category: Totais do mês por modalidade (rollups);
+            se None, agrega a lista de treinos
         
     Returns:
         Caminho do arquivo gerado
@@ -424,24 +435,23 @@ def create_monthly_report(
     # === RESUMO DO MÊS ===
     story.append(Paragraph("📈 Resumo do Mês", heading_style))
     
-    # Estatísticas
-    total_activities = len(workouts)
-    total_distance = sum(float(w.get('distance', 0) or 0) for w in workouts) / 1000
-    total_duration = sum(float(w.get('duration', 0) or 0) for w in workouts) / 3600
-    total_tss = sum(float(w.get('training_stress_score', 0) or 0) for w in workouts)
+    # Estatísticas (totais por modalidade das tabelas de rollups)
+    if totals_by_category is None:
+        totals_by_category = aggregate_by_category(workouts)
+    totals = sum_totals(totals_by_category)
+    total_activities = int(totals['count'])
+    total_distance = totals['distance']
+    total_duration = totals['duration']
+    total_tss = totals['tss']
     
     # Por modalidade
-    swim_workouts = [w for w in workouts if w.get('activityType', {}).get('typeKey') == 'lap_swimming']
-    bike_workouts = [w for w in workouts if w.get('activityType', {}).get('typeKey') == 'cycling']
-    run_workouts = [w for w in workouts if w.get('activityType', {}).get('typeKey') == 'running']
-    
-    swim_distance = sum(float(w.get('distance', 0) or 0) for w in swim_workouts) / 1000
-    bike_distance = sum(float(w.get('distance', 0) or 0) for w in bike_workouts) / 1000
-    run_distance = sum(float(w.get('distance', 0) or 0) for w in run_workouts) / 1000
+    swim = totals_by_category.get('swimming', empty_totals())
+    bike = totals_by_category.get('cycling', empty_totals())
+    run = totals_by_category.get('running', empty_totals())
+    swim_count, bike_count, run_count = int(swim['count']), int(bike['count']), int(run['count'])
     
-    swim_time = sum(float(w.get('duration', 0) or 0) for w in swim_workouts) / 3600
-    bike_time = sum(float(w.get('duration', 0) or 0) for w in bike_workouts) / 3600
-    run_time = sum(float(w.get('duration', 0) or 0) for w in run_workouts) / 3600
+    swim_distance, bike_distance, run_distance = swim['distance'], bike['distance'], run['distance']
+    swim_time, bike_time, run_time = swim['duration'], bike['duration'], run['duration']
     
     summary_data = [
         ['Métrica Geral', 'Valor'],
@@ -451,17 +461,17 @@ def create_monthly_report(
         ['TSS Total', f'{total_tss:.0f}'],
         ['', ''],
         ['🏊 Natação', ''],
-        ['   Treinos', f'{len(swim_workouts)}'],
+        ['   Treinos', f'{swim_count}'],
         ['   Distância', f'{swim_distance:.1f} km'],
         ['   Tempo', f'{swim_time:.1f} h'],
         ['', ''],
         ['🚴 Ciclismo', ''],
-        ['   Treinos', f'{len(bike_workouts)}'],
+        ['   Treinos', f'{bike_count}'],
         ['   Distância', f'{bike_distance:.1f} km'],
         ['   Tempo', f'{bike_time:.1f} h'],
         ['', ''],
         ['🏃 Corrida', ''],
-        ['   Treinos', f'{len(run_workouts)}'],
+        ['   Treinos', f'{run_count}'],
         ['   Distância', f'{run_distance:.1f} km'],
         ['   Tempo', f'{run_time:.1f} h'],
     ]
@@ -514,17 +524,17 @@ def create_monthly_report(
     ]
     
     # Distribuição de modalidades
-    if len(swim_workouts) > 0:
-        swim_percent = (len(swim_workouts) / total_activities) * 100
-        analysis.append(f"• Natação representou {swim_percent:.0f}% dos treinos ({len(swim_workouts)} sessões).")
+    if swim_count > 0:
+        swim_percent = (swim_count / total_activities) * 100
+        analysis.append(f"• Natação representou {swim_percent:.0f}% dos treinos ({swim_count} sessões).")
     
-    if len(bike_workouts) > 0:
-        bike_percent = (len(bike_workouts) / total_activities) * 100
-        analysis.append(f"• Ciclismo representou {bike_percent:.0f}% dos treinos ({len(bike_workouts)} sessões).")
+    if bike_count > 0:
+        bike_percent = (bike_count / total_activities) * 100
+        analysis.append(f"• Ciclismo representou {bike_percent:.0f}% dos treinos ({bike_count} sessões).")
     
-    if len(run_workouts) > 0:
-        run_percent = (len(run_workouts) / total_activities) * 100
-        analysis.append(f"• Corrida representou {run_percent:.0f}% dos treinos ({len(run_workouts)} sessões).")
+    if run_count > 0:
+        run_percent = (run_count / total_activities) * 100
+        analysis.append(f"• Corrida representou {run_percent:.0f}% dos treinos ({run_count} sessões).")
     
     for item in analysis:
         story.append(Paragraph(item, styles['Normal']))
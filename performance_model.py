@@ -0,0 +1,186 @@
+"""
+Modelo de desempenho de Banister (fitness-fadiga) ajustado ao histórico do atleta.
+
+O CTL/ATL do app usa constantes fixas (42/7 dias). Aqui k1, k2, τ1 e τ2 são
+ajustados por mínimos quadrados (calculations.fit_banister) contra marcadores
+de desempenho extraídos do próprio histórico:
+- power_20min: melhor potência de 20 min no ciclismo (stream ou resumo Garmin)
+- speed_20min: melhor velocidade de 20 min na corrida (stream)
+
+Marcadores são extraídos uma vez por atividade (performance_markers.json) e
+reduzidos ao melhor valor de cada semana (treinos leves não são testes).
+O ajuste só é refeito quando a carga ou os marcadores mudam
+(performance_model.json).
+"""
+import hashlib
+import logging
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from calculations import (
+    _activity_category, _activity_day, banister_performance, best_effort_stream, fit_banister
+)
+from storage import (
+    list_stream_ids, load_activity_stream, load_performance_markers, load_performance_model,
+    save_performance_markers, save_performance_model
+)
+
+logger = logging.getLogger(__name__)
+
+
+MODEL_VERSION = 1
+
+# Duração do melhor esforço usado como marcador (segundos)
+MARKER_WINDOW_SECONDS = 1200
+
+# Marcadores: categoria da atividade, coluna do stream e campos de resumo do Garmin
+PERFORMANCE_MARKERS = {
+    'power_20min': {
+        'category': 'cycling', 'stream': 'power',
+        'summary': ('max20MinPower', 'maxAvgPower_1200'),
+        'label': 'Potência 20 min', 'unit': 'W',
+    },
+    'speed_20min': {
+        'category': 'running', 'stream': 'speed',
+        'summary': (),
+        'label': 'Velocidade 20 min', 'unit': 'm/s',
+    },
+}
+
+
+def _activity_markers(activity: dict, stream: Optional[dict]) -> Dict[str, Optional[float]]:
+    """Melhores esforços de uma atividade ({marcador: valor ou None})"""
+    category = _activity_category(activity)
+    markers = {}
+    for kind, spec in PERFORMANCE_MARKERS.items():
+        value = None
+        if category == spec['category']:
+            column = (stream or {}).get(spec['stream'])
+            if column is not None and len(column) >= MARKER_WINDOW_SECONDS:
+                time = (stream or {}).get('time')
+                time = time if time is not None and len(time) == len(column) else None
+                value = best_effort_stream(column, time, MARKER_WINDOW_SECONDS) or None
+            if value is None:
+                for field in spec['summary']:
+                    try:
+                        value = float(activity.get(field) or 0) or None
+                    except (TypeError, ValueError):
+                        value = None
+                    if value:
+                        break
+        markers[kind] = value
+    return markers
+
+
+def update_markers(workouts: List[dict]) -> dict:
+    """
+    Extrai marcadores das atividades ainda não processadas (ou que ganharam
+    stream desde a última extração) e salva em performance_markers.json.
+
+    Returns:
+        {activity_id: {'day', 'stream', marcador: valor}}
+    """
+    markers = load_performance_markers()
+    stream_ids = list_stream_ids()
+    changed = False
+
+    for activity in workouts:
+        activity_id = activity.get('activityId')
+        if activity_id is None:
+            continue
+        activity_id = str(activity_id)
+        if _activity_category(activity) not in {spec['category'] for spec in PERFORMANCE_MARKERS.values()}:
+            continue
+        has_stream = activity_id in stream_ids
+        known = markers.get(activity_id)
+        if known is not None and (known.get('stream') or not has_stream):
+            continue
+        try:
+            day = _activity_day(activity)
+        except (ValueError, TypeError, AttributeError):
+            day = None
+        if day is None:
+            continue
+        stream = load_activity_stream(activity_id) if has_stream else None
+        markers[activity_id] = {'day': day.isoformat(), 'stream': has_stream, **_activity_markers(activity, stream)}
+        changed = True
+
+    if changed:
+        save_performance_markers(markers)
+    return markers
+
+
+def weekly_best(markers: dict, kind: str) -> Tuple[List[str], List[float]]:
+    """Melhor valor do marcador em cada semana ISO (dia do melhor esforço, valor)"""
+    best = {}
+    for entry in markers.values():
+        value = entry.get(kind)
+        if not value:
+            continue
+        day = datetime.strptime(entry['day'], '%Y-%m-%d').date()
+        week = day.isocalendar()[:2]
+        if week not in best or value > best[week][1]:
+            best[week] = (entry['day'], value)
+    ordered = sorted(best.values())
+    return [day for day, _ in ordered], [value for _, value in ordered]
+
+
+def _fingerprint(series: dict, days: List[str], values: List[float]) -> str:
+    payload = f"{MODEL_VERSION}|{series.get('start')}|{len(series.get('daily_tss', []))}|" \
+              f"{sum(series.get('daily_tss', [])):.3f}|{list(zip(days, values))}"
+    return hashlib.md5(payload.encode()).hexdigest()[:16]
+
+
+def refresh_performance_model(workouts: List[dict], series: dict) -> dict:
+    """
+    Atualiza marcadores e reajusta o modelo de cada marcador se a carga
+    (série materializada) ou os marcadores mudaram.
+
+    Returns:
+        {marcador: parâmetros de fit_banister + 'fingerprint', 'fitted_at'}
+        (marcadores com dados insuficientes ficam de fora)
+    """
+    if not series or not series.get('start'):
+        return {}
+    markers = update_markers(workouts)
+    model = load_performance_model()
+    series_start = datetime.strptime(series['start'], '%Y-%m-%d').date()
+    changed = False
+
+    for kind in PERFORMANCE_MARKERS:
+        days, values = weekly_best(markers, kind)
+        fingerprint = _fingerprint(series, days, values)
+        if model.get(kind, {}).get('fingerprint') == fingerprint:
+            continue
+        offsets = [(datetime.strptime(day, '%Y-%m-%d').date() - series_start).days for day in days]
+        params = fit_banister(series['daily_tss'], offsets, values)
+        changed = True
+        if params is None:
+            model.pop(kind, None)
+            continue
+        params.update({'fingerprint': fingerprint, 'fitted_at': datetime.now().isoformat()})
+        model[kind] = params
+        logger.info(
+            f"[BANISTER] {kind}: τ1={params['tau_fitness']:.0f} τ2={params['tau_fatigue']:.0f} "
+            f"k1={params['k1']:.3f} k2={params['k2']:.3f} R²={params['r2']:.2f} ({params['n_markers']} marcadores)"
+        )
+
+    if changed:
+        save_performance_model(model)
+    return model
+
+
+def performance_curve(series: dict, params: dict, start_date: date, end_date: date) -> Tuple[List[str], List[float]]:
+    """Desempenho modelado por dia em [start_date, end_date] (limitado à série)"""
+    if not series or not series.get('start') or not params:
+        return [], []
+    series_start = datetime.strptime(series['start'], '%Y-%m-%d').date()
+    predicted = banister_performance(series['daily_tss'], params)
+    first = max((start_date - series_start).days, 0)
+    last = min((end_date - series_start).days, len(predicted) - 1)
+    if last < first:
+        return [], []
+    dates = [(series_start + timedelta(days=i)).isoformat() for i in range(first, last + 1)]
+    return dates, np.round(predicted[first:last + 1], 2).tolist()
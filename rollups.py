@@ -0,0 +1,207 @@
+"""
+Tabelas de agregação (rollups) por dia, semana ISO e mês, por modalidade.
+
+Resumo semanal, gráfico da semana, metas, progresso por modalidade, tendência
+mensal, heatmap de TSS, calendário e relatórios PDF somavam horas, distância,
+TSS e quantidade com laços próprios sobre o histórico inteiro. Aqui há uma
+única camada de agregação, mantida incrementalmente como a série de fitness:
+- Guarda a contribuição de cada atividade (chave -> dia, modalidade, valores)
+- Atividades novas, alteradas ou removidas só somam/subtraem a diferença nos
+  baldes do seu dia, semana e mês
+- As views leem os baldes (O(período), não O(histórico))
+
+Formato salvo (rollups.json):
+    {'version',
+     'day':   {'AAAA-MM-DD': {modalidade: {'count', 'duration', 'distance', 'tss'}}},
+     'week':  {'AAAA-Www':   {...}},
+     'month': {'AAAA-MM':    {...}},
+     'contributions': {chave: [dia, modalidade, duração (h), distância (km), tss]}}
+"""
+import logging
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from calculations import CATEGORY_CODES, _activity_category, _activity_day, _safe_float
+from fitness_series import _activity_key
+from storage import load_rollups, save_rollups
+
+logger = logging.getLogger(__name__)
+
+
+ROLLUPS_VERSION = 1
+
+ROLLUP_FIELDS = ('count', 'duration', 'distance', 'tss')
+
+# Casas decimais guardadas (evita resíduos de soma/subtração incremental)
+ROLLUP_DECIMALS = 9
+
+
+def day_key(day: date) -> str:
+    return day.isoformat()
+
+
+def week_key(day: date) -> str:
+    iso_year, iso_week, _ = day.isocalendar()
+    return f"{iso_year}-W{iso_week:02d}"
+
+
+def month_key(day: date) -> str:
+    return f"{day.year:04d}-{day.month:02d}"
+
+
+ROLLUP_GRAINS = {'day': day_key, 'week': week_key, 'month': month_key}
+
+
+def empty_totals() -> Dict[str, float]:
+    return {field: 0 for field in ROLLUP_FIELDS}
+
+
+def _contributions(workouts_with_tss: List[dict]) -> Dict[str, list]:
+    """Contribuição [dia, modalidade, horas, km, tss] por atividade com data válida"""
+    contributions = {}
+    for position, activity in enumerate(workouts_with_tss):
+        try:
+            day = _activity_day(activity)
+        except (ValueError, TypeError, AttributeError):
+            continue
+        if day is None:
+            continue
+        category = activity.get('category') or _activity_category(activity)
+        if category not in CATEGORY_CODES:
+            category = 'other'
+        key = _activity_key(activity, position)
+        if key in contributions:
+            key = f"{key}#{position}"
+        contributions[key] = [
+            day.isoformat(),
+            category,
+            _safe_float(activity.get('duration')) / 3600,
+            _safe_float(activity.get('distance')) / 1000,
+            _safe_float(activity.get('tss')),
+        ]
+    return contributions
+
+
+def _apply(rollups: dict, contribution: list, sign: int) -> None:
+    """Soma (sign=1) ou subtrai (sign=-1) uma contribuição nos baldes dos três grãos"""
+    day_str, category, duration, distance, tss = contribution
+    day = date.fromisoformat(day_str)
+    deltas = {'count': sign, 'duration': sign * duration, 'distance': sign * distance, 'tss': sign * tss}
+    for grain, key_of in ROLLUP_GRAINS.items():
+        buckets = rollups[grain]
+        key = key_of(day)
+        values = buckets.setdefault(key, {}).setdefault(category, empty_totals())
+        for field, delta in deltas.items():
+            values[field] = round(values[field] + delta, ROLLUP_DECIMALS)
+        if values['count'] <= 0:
+            del buckets[key][category]
+            if not buckets[key]:
+                del buckets[key]
+
+
+def update_rollups(workouts_with_tss: List[dict]) -> dict:
+    """
+    Atualiza (e salva se mudou) as tabelas com as atividades atuais: só as
+    contribuições novas, alteradas ou removidas mexem nos baldes.
+
+    Args:
+        workouts_with_tss: Atividades já com 'tss' (enrich_workouts_with_tss)
+    """
+    rollups = load_rollups()
+    created = rollups.get('version') != ROLLUPS_VERSION
+    if created:
+        rollups = {'version': ROLLUPS_VERSION, 'contributions': {}, **{grain: {} for grain in ROLLUP_GRAINS}}
+
+    old = rollups['contributions']
+    new = _contributions(workouts_with_tss)
+    changed = 0
+    for key, previous in old.items():
+        current = new.get(key)
+        if current is None or list(previous) != current:
+            _apply(rollups, previous, -1)
+            changed += 1
+    for key, current in new.items():
+        previous = old.get(key)
+        if previous is None or list(previous) != current:
+            _apply(rollups, current, 1)
+            changed += 1
+
+    if changed or created:
+        rollups['contributions'] = new
+        save_rollups(rollups)
+        logger.info(f"[ROLLUPS] {changed} contribuições aplicadas ({len(new)} atividades)")
+    return rollups
+
+
+# === LEITURA ===
+
+def sum_totals(by_category: Dict[str, dict], categories: Optional[Iterable[str]] = None) -> Dict[str, float]:
+    """Soma os valores de um balde ({modalidade: valores}) nas modalidades pedidas (todas se None)"""
+    totals = empty_totals()
+    wanted = set(categories) if categories is not None else None
+    for category, values in (by_category or {}).items():
+        if wanted is not None and category not in wanted:
+            continue
+        for field in ROLLUP_FIELDS:
+            totals[field] += values.get(field, 0)
+    return totals
+
+
+def period_by_category(rollups: dict, grain: str, day: date) -> Dict[str, dict]:
+    """Balde do dia/semana/mês que contém `day` ({modalidade: valores})"""
+    return (rollups or {}).get(grain, {}).get(ROLLUP_GRAINS[grain](day), {})
+
+
+def period_totals(rollups: dict, grain: str, day: date, categories: Optional[Iterable[str]] = None) -> Dict[str, float]:
+    """Totais do dia/semana/mês que contém `day`"""
+    return sum_totals(period_by_category(rollups, grain, day), categories)
+
+
+def range_by_category(rollups: dict, start_date: date, end_date: date) -> Dict[str, dict]:
+    """Valores por modalidade somados nos dias de [start_date, end_date]"""
+    days = (rollups or {}).get('day', {})
+    result: Dict[str, dict] = {}
+    day = start_date
+    while day <= end_date:
+        for category, values in days.get(day_key(day), {}).items():
+            totals = result.setdefault(category, empty_totals())
+            for field in ROLLUP_FIELDS:
+                totals[field] += values.get(field, 0)
+        day += timedelta(days=1)
+    return result
+
+
+def range_totals(rollups: dict, start_date: date, end_date: date,
+                 categories: Optional[Iterable[str]] = None) -> Dict[str, float]:
+    """Totais nos dias de [start_date, end_date]"""
+    return sum_totals(range_by_category(rollups, start_date, end_date), categories)
+
+
+def daily_field(rollups: dict, start_date: date, end_date: date, field: str,
+                categories: Optional[Iterable[str]] = None) -> Dict[str, float]:
+    """{'AAAA-MM-DD': valor} de um campo por dia em [start_date, end_date] (dias sem atividade ausentes)"""
+    days = (rollups or {}).get('day', {})
+    result = {}
+    day = start_date
+    while day <= end_date:
+        bucket = days.get(day_key(day))
+        if bucket:
+            result[day_key(day)] = sum_totals(bucket, categories)[field]
+        day += timedelta(days=1)
+    return result
+
+
+def latest_day(rollups: dict) -> Optional[date]:
+    """Dia da atividade mais recente (None sem atividades)"""
+    days = (rollups or {}).get('day', {})
+    return date.fromisoformat(max(days)) if days else None
+
+
+def aggregate_by_category(workouts_with_tss: List[dict]) -> Dict[str, dict]:
+    """Agregação avulsa de uma lista de atividades por modalidade (mesmas regras das tabelas, sem salvar)"""
+    result: Dict[str, dict] = {}
+    for _, category, duration, distance, tss in _contributions(workouts_with_tss).values():
+        totals = result.setdefault(category, empty_totals())
+        for field, value in zip(ROLLUP_FIELDS, (1, duration, distance, tss)):
+            totals[field] += value
+    return result
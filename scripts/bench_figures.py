@@ -0,0 +1,136 @@
+"""
+Benchmark da geração de figuras: listas Python x arrays tipados (float32) + WebGL.
+
+Para cada tamanho de série monta a mesma figura de linha de duas formas:
+- 'listas': go.Scatter com listas Python (como os builders faziam)
+- 'tipado': figure_traces.scatter (float32 em forma binária; Scattergl a
+  partir de WEBGL_MIN_POINTS pontos)
+e mede o tamanho do JSON enviado ao navegador, o tempo de montar + serializar
+a figura (pio.to_json, como o figure_cache) e o tempo de ler o JSON
+(JSON.parse + decodificação do base64 no Node, se disponível; senão json.loads).
+
+O desenho em si (SVG x WebGL) depende do navegador e não é medido aqui.
+
+Exemplos:
+    python scripts/bench_figures.py
+    python scripts/bench_figures.py --sizes 365 3650 86400 --repeat 10
+    python scripts/bench_figures.py --decimals 3 --json
+"""
+import argparse
+import json
+import shutil
+import subprocess
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+import numpy as np
+import plotly.graph_objects as go
+import plotly.io as pio
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from figure_traces import WEBGL_MIN_POINTS, scatter  # noqa: E402
+
+# Lê o JSON como o navegador: JSON.parse e, para 'bdata', base64 -> Float32Array
+NODE_PARSE = """
+const payload = require('fs').readFileSync(0, 'utf8');
+const repeat = parseInt(process.argv[1], 10);
+const start = process.hrtime.bigint();
+for (let r = 0; r < repeat; r++) {
+    const figure = JSON.parse(payload);
+    for (const trace of figure.data) {
+        if (trace.y && trace.y.bdata) {
+            const bytes = Buffer.from(trace.y.bdata, 'base64');
+            new Float32Array(bytes.buffer, bytes.byteOffset, bytes.length / 4);
+        }
+    }
+}
+console.log(Number(process.hrtime.bigint() - start) / 1e6 / repeat);
+"""
+
+
+def _series(size: int, decimals: int, seed: int):
+    rng = np.random.default_rng(seed)
+    start = date.today() - timedelta(days=size - 1)
+    dates = [(start + timedelta(days=i)).isoformat() for i in range(size)]
+    values = np.round(60 + np.cumsum(rng.normal(0, 1.5, size)), decimals).tolist()
+    return dates, values
+
+
+def _figure(kind: str, dates, values):
+    if kind == 'listas':
+        trace = go.Scatter(x=dates, y=values, mode='lines', name='CTL')
+    else:
+        trace = scatter(dates, values, mode='lines', name='CTL')
+    return go.Figure(trace)
+
+
+def _parse_ms(payload: str, repeat: int) -> tuple:
+    node = shutil.which('node')
+    if node:
+        proc = subprocess.run([node, '-e', NODE_PARSE, str(repeat)], input=payload,
+                              capture_output=True, text=True)
+        if proc.returncode == 0:
+            return float(proc.stdout.strip()), 'node'
+    start = time.perf_counter()
+    for _ in range(repeat):
+        json.loads(payload)
+    return (time.perf_counter() - start) * 1000 / repeat, 'python'
+
+
+def run(sizes, decimals: int, repeat: int, seed: int) -> list:
+    # Aquecimento (imports e validadores do Plotly fora da medição)
+    for kind in ('listas', 'tipado'):
+        pio.to_json(_figure(kind, *_series(10, decimals, seed)), validate=False)
+
+    results = []
+    for size in sizes:
+        dates, values = _series(size, decimals, seed)
+        for kind in ('listas', 'tipado'):
+            start = time.perf_counter()
+            for _ in range(repeat):
+                payload = pio.to_json(_figure(kind, dates, values), validate=False)
+            build_ms = (time.perf_counter() - start) * 1000 / repeat
+            parse_ms, parser = _parse_ms(payload, repeat)
+            results.append({
+                'points': size,
+                'kind': kind,
+                'trace_type': json.loads(payload)['data'][0]['type'],
+                'bytes': len(payload.encode()),
+                'build_ms': build_ms,
+                'parse_ms': parse_ms,
+                'parser': parser,
+            })
+    return results
+
+
+def _print_report(results: list) -> None:
+    print(f"WebGL a partir de {WEBGL_MIN_POINTS} pontos; leitura via {results[0]['parser'] if results else '-'}\n")
+    print(f"{'pontos':>8}  {'forma':<7} {'trace':<10} {'JSON (KB)':>10} {'montar+serializar':>18} {'leitura':>10}")
+    for r in results:
+        print(f"{r['points']:>8}  {r['kind']:<7} {r['trace_type']:<10} {r['bytes'] / 1024:>10.1f} "
+              f"{r['build_ms']:>15.2f} ms {r['parse_ms']:>7.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de figuras: listas x float32 binário + WebGL")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[42, 365, 2000, 10000, 86400],
+                        help="Quantidade de pontos por série (86400 = stream de 24h por segundo)")
+    parser.add_argument('--decimals', type=int, default=1, help="Casas decimais dos valores (o app arredonda em 1)")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--json', action='store_true', help="Imprime resultados em JSON")
+    args = parser.parse_args()
+
+    results = run(args.sizes, args.decimals, args.repeat, args.seed)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        _print_report(results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,147 @@
+"""
+Benchmark offline da sincronização com o Garmin (fetch_garmin_data).
+
+Usa o FakeGarmin (fake_garmin.py) para medir tempo total de sync e número de
+chamadas à API sob latência, taxa de erro e throttling configuráveis, sem
+tocar no Garmin real nem nos dados do usuário (cada cenário roda em um HOME
+temporário isolado).
+
+Exemplos:
+    python scripts/bench_sync.py
+    python scripts/bench_sync.py --days 730 --latency 0.05 --error-rate 0.02
+    python scripts/bench_sync.py --rate-limit 10 --scenario incremental
+    python scripts/bench_sync.py --fixtures fixtures/garmin_sync.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+SCENARIOS = {
+    'cold': 'Sincronização inicial (armazenamento vazio)',
+    'incremental': 'Sincronização incremental (histórico, exercícios, streams e saúde já salvos até ontem)',
+}
+
+
+def _run_child(args) -> dict:
+    """Executa um cenário dentro do HOME temporário (processo filho)"""
+    sys.path.insert(0, str(ROOT))
+
+    from fake_garmin import FakeGarmin, synthetic_fixtures
+    from garmin_enhanced import GarminEnhanced
+    import health_store
+    from storage import load_config, save_activity_stream, save_exercises, save_workouts
+    import app as fitness_app
+
+    if args.fixtures:
+        with open(args.fixtures, "r") as f:
+            fixtures = json.load(f)
+    else:
+        fixtures = synthetic_fixtures(days=args.days, seed=args.seed)
+
+    if args.scenario == 'incremental':
+        yesterday = (date.today() - timedelta(days=1)).isoformat()
+        history = [a for a in fixtures.get('activities', []) if str(a.get('startTimeLocal', ''))[:10] < yesterday]
+        save_workouts(history)
+        history_ids = {str(a.get('activityId')) for a in history}
+        save_exercises({
+            activity_id: {'activity_id': activity_id, **details}
+            for activity_id, details in fixtures.get('get_workout_details', {}).items()
+            if activity_id in history_ids
+        })
+        details = fixtures.get('get_activity_details', {})
+        for activity_id in history_ids:
+            save_activity_stream(activity_id, GarminEnhanced.parse_activity_streams(details.get(activity_id)))
+        for metric in ('hrv', 'stress', 'sleep'):
+            health_store.save_days(metric, {
+                day: data for day, data in fixtures.get(f'get_{metric}_data', {}).items() if day < yesterday
+            })
+
+    client = FakeGarmin(
+        fixtures,
+        latency=args.latency,
+        latency_jitter=args.jitter,
+        error_rate=args.error_rate,
+        max_calls_per_second=args.rate_limit,
+        seed=args.seed,
+    )
+
+    start = time.perf_counter()
+    success, message = fitness_app.fetch_garmin_data(config=load_config(), client=client)
+    elapsed = time.perf_counter() - start
+
+    return {
+        'scenario': args.scenario,
+        'success': success,
+        'message': message,
+        'elapsed_s': elapsed,
+        **client.stats(),
+    }
+
+
+def _print_report(result: dict) -> None:
+    print(f"\n=== {result['scenario']}: {SCENARIOS.get(result['scenario'], '')} ===")
+    print(f"Resultado: {result['message']}")
+    print(f"Tempo total: {result['elapsed_s']:.3f}s")
+    print(f"Chamadas: {result['total_calls']} | Erros: {result['total_errors']} | 429: {result['total_throttled']}")
+    for method, count in sorted(result['by_method'].items(), key=lambda x: -x[1]):
+        errors = result['errors_by_method'].get(method, 0)
+        throttled = result['throttled_by_method'].get(method, 0)
+        print(f"  {method:<28} {count:>5} chamadas  {errors:>3} erros  {throttled:>3} throttled")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark offline de fetch_garmin_data com FakeGarmin")
+    parser.add_argument('--days', type=int, default=365, help="Dias de histórico sintético")
+    parser.add_argument('--latency', type=float, default=0.0, help="Latência por chamada (s)")
+    parser.add_argument('--jitter', type=float, default=0.0, help="Jitter de latência (±s)")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Probabilidade de erro por chamada (0-1)")
+    parser.add_argument('--rate-limit', type=float, default=None, help="Máximo de chamadas/s antes de 429")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--fixtures', type=str, default=None, help="Arquivo gravado por RecordingGarmin")
+    parser.add_argument('--scenario', choices=sorted(SCENARIOS), action='append',
+                        help="Cenário(s) a executar (padrão: todos)")
+    parser.add_argument('--json', action='store_true', help="Imprime resultados em JSON")
+    parser.add_argument('--_child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args._child:
+        args.scenario = args.scenario[0]
+        print(json.dumps(_run_child(args)))
+        return
+
+    results = []
+    for scenario in args.scenario or list(SCENARIOS):
+        with tempfile.TemporaryDirectory(prefix="fitness_bench_") as home:
+            cmd = [sys.executable, __file__, '--_child', '--scenario', scenario,
+                   '--days', str(args.days), '--latency', str(args.latency),
+                   '--jitter', str(args.jitter), '--error-rate', str(args.error_rate),
+                   '--seed', str(args.seed)]
+            if args.rate_limit is not None:
+                cmd += ['--rate-limit', str(args.rate_limit)]
+            if args.fixtures:
+                cmd += ['--fixtures', str(Path(args.fixtures).resolve())]
+
+            env = dict(os.environ, HOME=home, ENV='benchmark')
+            proc = subprocess.run(cmd, cwd=home, env=env, capture_output=True, text=True)
+            if proc.returncode != 0:
+                print(proc.stderr, file=sys.stderr)
+                sys.exit(proc.returncode)
+            results.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for result in results:
+            _print_report(result)
+
+
+if __name__ == '__main__':
+    main()
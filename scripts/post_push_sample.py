@@ -0,0 +1,87 @@
+"""
+Envia um payload push de exemplo (formato Garmin Health API) para o endpoint
+de ingestão do app, útil para testar /api/ingest/* localmente.
+
+O token vem de --token ou da variável de ambiente INGEST_TOKEN (sem token
+configurado no app as rotas de ingestão não existem).
+
+Exemplos:
+    INGEST_TOKEN=segredo python scripts/post_push_sample.py
+    python scripts/post_push_sample.py --url http://127.0.0.1:8050 --token segredo
+    python scripts/post_push_sample.py --file payload.json --kind health
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import urllib.error
+import urllib.request
+from datetime import date
+
+
+def sample_activities() -> dict:
+    """Payload com uma corrida de 45 min iniciada há 2 horas"""
+    start = int(time.time()) - 2 * 3600
+    return {
+        'activities': [{
+            'summaryId': f'push-{start}',
+            'activityType': 'RUNNING',
+            'activityName': 'Corrida (push)',
+            'startTimeInSeconds': start,
+            'startTimeOffsetInSeconds': -3 * 3600,
+            'durationInSeconds': 45 * 60,
+            'distanceInMeters': 9000.0,
+            'averageSpeedInMetersPerSecond': 3.33,
+            'averageHeartRateInBeatsPerMinute': 148,
+            'maxHeartRateInBeatsPerMinute': 171,
+            'activeKilocalories': 560,
+        }]
+    }
+
+
+def sample_health() -> dict:
+    """Payload com HRV, sono e stress do dia"""
+    today = date.today().isoformat()
+    return {
+        'hrv': [{'calendarDate': today, 'lastNightAvg': 58}],
+        'sleeps': [{'calendarDate': today, 'durationInSeconds': 7.5 * 3600,
+                    'deepSleepDurationInSeconds': 5400, 'remSleepInSeconds': 6000}],
+        'dailies': [{'calendarDate': today, 'averageStressLevel': 31, 'maxStressLevel': 88}],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Envia payload push de exemplo para o app")
+    parser.add_argument('--url', default='http://127.0.0.1:8050', help="URL base do app")
+    parser.add_argument('--token', default=os.getenv('INGEST_TOKEN'), help="INGEST_TOKEN (Bearer)")
+    parser.add_argument('--kind', choices=['activities', 'health'], default='activities')
+    parser.add_argument('--file', default=None, help="Arquivo JSON com o payload (opcional)")
+    args = parser.parse_args()
+
+    if args.file:
+        with open(args.file, "r") as f:
+            payload = json.load(f)
+    else:
+        payload = sample_activities() if args.kind == 'activities' else sample_health()
+
+    headers = {'Content-Type': 'application/json'}
+    if args.token:
+        headers['Authorization'] = f'Bearer {args.token}'
+
+    req = urllib.request.Request(
+        f"{args.url.rstrip('/')}/api/ingest/{args.kind}",
+        data=json.dumps(payload).encode(),
+        headers=headers,
+        method='POST',
+    )
+    try:
+        with urllib.request.urlopen(req, timeout=30) as resp:
+            print(resp.status, json.dumps(json.loads(resp.read()), indent=2, ensure_ascii=False))
+    except urllib.error.HTTPError as e:
+        print(e.code, e.read().decode(), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -7,15 +7,19 @@ Gerencia leitura e gravação de:
 - Métricas de fitness (fitness_metrics.json)
 - Histórico de treinos (workouts_42_dias.json)
 - Tokens OAuth do Garmin (garmin_tokens.json/) [PROTEGIDOS]
+- Streams por segundo das atividades (streams/<activity_id>.npz)
+- Índice do calendário particionado por mês (calendar/<AAAA-MM>.json)
 """
 import json
 import os
 import logging
 import hashlib
+import threading
 from datetime import datetime, timedelta
 from pathlib import Path
 from cryptography.fernet import Fernet
 import base64
+import numpy as np
 
 logger = logging.getLogger(__name__)
 
@@ -33,6 +37,18 @@ SYNC_FILE = DATA_DIR / "sync_state.json"
 HEALTH_DATA_FILE = DATA_DIR / "health_metrics.json"
 TRAINING_STATUS_FILE = DATA_DIR / "training_status.json"
 EXERCISES_FILE = DATA_DIR / "exercises.json"
+THRESHOLD_HISTORY_FILE = DATA_DIR / "threshold_history.json"
+STREAMS_DIR = DATA_DIR / "streams"
+FITNESS_SERIES_FILE = DATA_DIR / "fitness_series.json"
+PERFORMANCE_MARKERS_FILE = DATA_DIR / "performance_markers.json"
+PERFORMANCE_MODEL_FILE = DATA_DIR / "performance_model.json"
+ROLLUPS_FILE = DATA_DIR / "rollups.json"
+CALENDAR_DIR = DATA_DIR / "calendar"
+CALENDAR_MANIFEST_FILE = CALENDAR_DIR / "manifest.json"
+
+# Serializa leitura-modificação-escrita de workouts/health_metrics entre a
+# sincronização do Garmin (app.fetch_garmin_data) e a ingestão push (ingest_api)
+DATA_WRITE_LOCK = threading.RLock()
 
 
 def _get_encryption_key() -> bytes:
@@ -151,6 +167,96 @@ def save_config(config: dict) -> None:
     _try_secure_file(CONFIG_FILE)
 
 
+def load_fitness_series() -> dict:
+    """Carrega a série materializada de carga diária e CTL/ATL (histórico completo)"""
+    if FITNESS_SERIES_FILE.exists():
+        try:
+            with open(FITNESS_SERIES_FILE, "r") as f:
+                return json.load(f)
+        except Exception:
+            return {}
+    return {}
+
+
+def save_fitness_series(series: dict) -> None:
+    """Salva a série materializada de carga diária e CTL/ATL"""
+    with open(FITNESS_SERIES_FILE, "w") as f:
+        json.dump(series, f)
+    _try_secure_file(FITNESS_SERIES_FILE)
+
+
+def load_rollups() -> dict:
+    """Carrega as tabelas de agregação por dia/semana/mês e modalidade"""
+    if ROLLUPS_FILE.exists():
+        try:
+            with open(ROLLUPS_FILE, "r") as f:
+                return json.load(f)
+        except Exception:
+            return {}
+    return {}
+
+
+def save_rollups(rollups: dict) -> None:
+    """Salva as tabelas de agregação por dia/semana/mês e modalidade"""
+    with open(ROLLUPS_FILE, "w") as f:
+        json.dump(rollups, f)
+    _try_secure_file(ROLLUPS_FILE)
+
+
+def load_performance_markers() -> dict:
+    """Carrega os marcadores de desempenho por atividade (melhores esforços)"""
+    if PERFORMANCE_MARKERS_FILE.exists():
+        try:
+            with open(PERFORMANCE_MARKERS_FILE, "r") as f:
+                return json.load(f)
+        except Exception:
+            return {}
+    return {}
+
+
+def save_performance_markers(markers: dict) -> None:
+    """Salva os marcadores de desempenho por atividade"""
+    with open(PERFORMANCE_MARKERS_FILE, "w") as f:
+        json.dump(markers, f)
+    _try_secure_file(PERFORMANCE_MARKERS_FILE)
+
+
+def load_performance_model() -> dict:
+    """Carrega os parâmetros ajustados do modelo de Banister"""
+    if PERFORMANCE_MODEL_FILE.exists():
+        try:
+            with open(PERFORMANCE_MODEL_FILE, "r") as f:
+                return json.load(f)
+        except Exception:
+            return {}
+    return {}
+
+
+def save_performance_model(model: dict) -> None:
+    """Salva os parâmetros ajustados do modelo de Banister"""
+    with open(PERFORMANCE_MODEL_FILE, "w") as f:
+        json.dump(model, f, indent=2)
+    _try_secure_file(PERFORMANCE_MODEL_FILE)
+
+
+def load_threshold_history() -> list:
+    """Carrega o histórico de limiares (FTP, LTHR, paces...) por data efetiva"""
+    if THRESHOLD_HISTORY_FILE.exists():
+        try:
+            with open(THRESHOLD_HISTORY_FILE, "r") as f:
+                return json.load(f)
+        except Exception:
+            return []
+    return []
+
+
+def save_threshold_history(history: list) -> None:
+    """Salva o histórico de limiares"""
+    with open(THRESHOLD_HISTORY_FILE, "w") as f:
+        json.dump(history, f, indent=4)
+    _try_secure_file(THRESHOLD_HISTORY_FILE)
+
+
 # === CREDENCIAIS GARMIN ===
 
 def load_credentials() -> dict:
@@ -414,3 +520,110 @@ def save_exercises(exercises_data: dict) -> None:
         json.dump(exercises_data, f, indent=4)
     _try_secure_file(EXERCISES_FILE)
 
+
+# === VERSÃO DOS DADOS ===
+
+def data_version() -> tuple:
+    """
+    Versão dos dados de entrada do app: (mtime_ns, tamanho) de workouts,
+    config e histórico de limiares, mais o mtime da pasta de streams
+    (muda quando um stream é salvo). Barata (só stat); muda a cada gravação.
+    """
+    version = []
+    for path in (WORKOUTS_FILE, CONFIG_FILE, THRESHOLD_HISTORY_FILE, STREAMS_DIR):
+        try:
+            stat = path.stat()
+            version.append((stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            version.append(None)
+    return tuple(version)
+
+
+# === STREAMS POR SEGUNDO (potência, FC, velocidade, altitude) ===
+
+def _stream_path(activity_id) -> Path:
+    return STREAMS_DIR / f"{activity_id}.npz"
+
+
+def list_stream_ids() -> set:
+    """IDs de atividades com stream salvo (inclusive marcadores de "sem stream")"""
+    if not STREAMS_DIR.exists():
+        return set()
+    return {p.stem for p in STREAMS_DIR.glob("*.npz")}
+
+
+def load_activity_stream(activity_id) -> dict:
+    """Carrega streams de uma atividade ({} se não houver)"""
+    path = _stream_path(activity_id)
+    if not path.exists():
+        return {}
+    try:
+        with np.load(path) as data:
+            return {name: data[name] for name in data.files}
+    except Exception:
+        return {}
+
+
+def save_activity_stream(activity_id, stream: dict) -> None:
+    """
+    Salva streams de uma atividade (arrays float32 comprimidos).
+    stream vazio grava um marcador para não buscar de novo no Garmin.
+    """
+    STREAMS_DIR.mkdir(exist_ok=True, mode=0o700)
+    arrays = {name: np.asarray(values, dtype=np.float32) for name, values in (stream or {}).items()}
+    np.savez_compressed(_stream_path(activity_id), **arrays)
+    _try_secure_file(_stream_path(activity_id))
+
+
+# === ÍNDICE DO CALENDÁRIO (uma partição por mês) ===
+
+def _calendar_partition_path(month_key: str) -> Path:
+    return CALENDAR_DIR / f"{month_key}.json"
+
+
+def load_calendar_manifest() -> dict:
+    """Carrega o manifesto do índice do calendário ({'version', 'months': {mês: hash}})"""
+    if CALENDAR_MANIFEST_FILE.exists():
+        try:
+            with open(CALENDAR_MANIFEST_FILE, "r") as f:
+                return json.load(f)
+        except Exception:
+            return {}
+    return {}
+
+
+def save_calendar_manifest(manifest: dict) -> None:
+    """Salva o manifesto do índice do calendário"""
+    CALENDAR_DIR.mkdir(exist_ok=True, mode=0o700)
+    with open(CALENDAR_MANIFEST_FILE, "w") as f:
+        json.dump(manifest, f)
+    _try_secure_file(CALENDAR_MANIFEST_FILE)
+
+
+def load_calendar_partition(month_key: str) -> dict:
+    """Carrega a partição de um mês ('AAAA-MM'); {} se não existir"""
+    path = _calendar_partition_path(month_key)
+    if path.exists():
+        try:
+            with open(path, "r") as f:
+                return json.load(f)
+        except Exception:
+            return {}
+    return {}
+
+
+def save_calendar_partition(month_key: str, partition: dict) -> None:
+    """Salva a partição de um mês ('AAAA-MM')"""
+    CALENDAR_DIR.mkdir(exist_ok=True, mode=0o700)
+    path = _calendar_partition_path(month_key)
+    with open(path, "w") as f:
+        json.dump(partition, f)
+    _try_secure_file(path)
+
+
+def delete_calendar_partition(month_key: str) -> None:
+    """Remove a partição de um mês que ficou sem atividades"""
+    try:
+        _calendar_partition_path(month_key).unlink()
+    except FileNotFoundError:
+        pass
@@ -484,3 +484,77 @@ def auto_adjust_plan(current_metrics: Dict, original_plan: Dict) -> Dict:
         'adjustments': adjustments,
         'recommendation': adjustments[0]['suggestion'] if adjustments else 'Plano no caminho certo'
     }
+
+
+# ==================== TSS Planejado ====================
+
+WEEKDAY_INDEX = {
+    'Monday': 0, 'Tuesday': 1, 'Wednesday': 2, 'Thursday': 3,
+    'Friday': 4, 'Saturday': 5, 'Sunday': 6
+}
+
+# Template de referência: uma semana dele equivale a 7 × CTL atual (carga estável)
+REFERENCE_TEMPLATE = 'base_building'
+
+
+def template_daily_tss(template: Dict, weekly_tss: Optional[float] = None) -> List[float]:
+    """
+    Distribui o TSS semanal do template pelos dias (segunda a domingo).
+    
+    O target_tss de cada modalidade é dividido entre as sessões dela
+    proporcionalmente à duração.
+    
+    Args:
+        template: Template de WEEKLY_TEMPLATES (ou ajustado)
+        weekly_tss: Escala o total da semana para este valor (opcional)
+        
+    Returns:
+        Lista com 7 valores de TSS (segunda=0)
+    """
+    daily = [0.0] * 7
+    for modality, target in template.get('target_tss', {}).items():
+        sessions = [s for s in template['sessions'] if s['modality'] == modality and s['duration_min'] > 0]
+        total_minutes = sum(s['duration_min'] for s in sessions)
+        for session in sessions:
+            daily[WEEKDAY_INDEX[session['day']]] += target * session['duration_min'] / total_minutes
+    
+    if weekly_tss is not None:
+        total = sum(daily)
+        scale = weekly_tss / total if total > 0 else 0
+        daily = [tss * scale for tss in daily]
+    return daily
+
+
+def planned_tss_schedule(start_date: datetime, event_date: datetime,
+                         current_ctl: float, target_ctl: float) -> Dict:
+    """
+    TSS diário planejado de start_date até event_date (inclusive), semana a
+    semana pela fase sugerida (suggest_weekly_plan).
+    
+    A carga é escalada pelo CTL atual: uma semana do template de base
+    equivale a 7 × CTL (manutenção); as demais fases mantêm a proporção
+    entre os templates.
+    
+    Returns:
+        Dict com 'dates' (YYYY-MM-DD), 'daily_tss' e 'phases' (fase de cada dia)
+    """
+    reference_total = sum(WEEKLY_TEMPLATES[REFERENCE_TEMPLATE]['target_tss'].values())
+    scale = max(current_ctl, 1.0) * 7 / reference_total
+    
+    dates, daily_tss, phases = [], [], []
+    current = start_date
+    last_phase = None
+    weekly = None
+    while current.date() <= event_date.date():
+        if weekly is None or current.weekday() == 0:
+            weeks_to_event = max(0, -(-(event_date.date() - current.date()).days // 7))
+            plan = suggest_weekly_plan(current_ctl, target_ctl, weeks_to_event, last_phase)
+            last_phase = plan['phase']
+            template = WEEKLY_TEMPLATES[plan['template_key']]
+            weekly = template_daily_tss(template, sum(template['target_tss'].values()) * scale)
+        dates.append(current.strftime('%Y-%m-%d'))
+        daily_tss.append(weekly[current.weekday()])
+        phases.append(last_phase)
+        current += timedelta(days=1)
+    
+    return {'dates': dates, 'daily_tss': daily_tss, 'phases': phases}
@@ -0,0 +1,85 @@
+"""
+Enriquecimento de atividades com TSS derivado (não salvo nos workouts).
+
+Centraliza o caminho usado por todas as views, exportações, chat e ingestão:
+limiares vigentes na data de cada atividade, memo persistente de TSS,
+cálculo em lote e TSS por stream quando existe.
+"""
+import numpy as np
+
+from cache_manager import get_tss_memo, set_tss_memo
+from calculations import (
+    activity_dates, compute_stream_tss, compute_tss_batch, config_as_of,
+    extract_tss_columns, threshold_history_or_default, threshold_index,
+    tss_activity_signature, tss_config_fingerprint
+)
+from storage import list_stream_ids, load_activity_stream, load_config, load_threshold_history
+
+# Sufixo da assinatura no memo para atividades com stream; mudar a versão
+# quando compute_stream_tss mudar invalida só esses resultados
+STREAM_SIGNATURE_SUFFIX = ":stream-v3"
+
+
+def enrich_workouts_with_tss(workouts, config=None):
+    """Calcula TSS dinamicamente para cada workout (não salva)
+
+    Cada atividade usa os limiares vigentes na sua data (histórico de limiares).
+    O TSS derivado fica no memo (cache.db) por (atividade, fingerprint dos
+    limiares vigentes): só atividades novas/alteradas ou afetadas por uma
+    mudança de limiar passam pelo cálculo em lote (compute_tss_batch).
+    Atividades com stream por segundo salvo usam compute_stream_tss.
+    """
+    if config is None:
+        config = load_config()
+    if not workouts:
+        return []
+    
+    history = threshold_history_or_default(load_threshold_history(), config)
+    index = threshold_index(history, activity_dates(workouts))
+    entry_fps = [tss_config_fingerprint({**config, **entry}) for entry in history]
+    memos = [get_tss_memo(fp) for fp in entry_fps]
+    stream_ids = list_stream_ids()
+    
+    derived = [None] * len(workouts)
+    misses = []
+    for i, w in enumerate(workouts):
+        key = w.get('activityId') or w.get('activityUUID') or w.get('startTimeLocal')
+        sig = tss_activity_signature(w)
+        if str(w.get('activityId')) in stream_ids:
+            sig += STREAM_SIGNATURE_SUFFIX
+        cached = memos[index[i]].get(str(key)) if key else None
+        if cached and cached[0] == sig:
+            derived[i] = cached[1:]
+        else:
+            misses.append((i, key, sig))
+    
+    if misses:
+        rows = np.array([i for i, _, _ in misses])
+        result = compute_tss_batch(
+            extract_tss_columns([workouts[i] for i in rows]),
+            config_as_of(config, history, index[rows])
+        )
+        new_rows = {}
+        for j, (i, key, sig) in enumerate(misses):
+            derived[i] = (float(result['tss'][j]), result['tss_type'][j], result['category'][j])
+            # Stream por segundo disponível: NP/NGP/zonas reais substituem o resumo
+            if sig.endswith(STREAM_SIGNATURE_SUFFIX):
+                stream_result = compute_stream_tss(
+                    workouts[i], load_activity_stream(workouts[i].get('activityId')), {**config, **history[index[i]]}
+                )
+                if stream_result is not None:
+                    derived[i] = (stream_result['tss'], stream_result['tss_type'], stream_result['category'])
+            if key:
+                new_rows.setdefault(entry_fps[index[i]], {})[str(key)] = (sig, *derived[i])
+        for fp, fp_rows in new_rows.items():
+            set_tss_memo(fp, fp_rows)
+    
+    enriched = []
+    for w, (tss, tss_type, category) in zip(workouts, derived):
+        w_copy = dict(w)
+        w_copy['tss'] = tss
+        w_copy['tss_type'] = tss_type
+        w_copy['category'] = category
+        enriched.append(w_copy)
+
+    return enriched
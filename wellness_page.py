@@ -7,11 +7,18 @@ from dash import html, dcc
 import plotly.graph_objects as go
 from datetime import datetime, timedelta, date
 from storage import load_health_metrics, load_training_status
+from downsampling import downsample_xy, lttb_graph, target_points
+from figure_traces import bar, scatter
+import health_store
 import json
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Opções do seletor de intervalo das séries de saúde (dias)
+WELLNESS_RANGE_OPTIONS = [30, 90, 180, 365]
+WELLNESS_DEFAULT_RANGE = 90
+
 
 def render_wellness():
     """Renderiza aba 'Saúde & Wellness' com HRV, Stress, Sleep, VO2, Body Composition, Training Status"""
@@ -24,7 +31,7 @@ def render_wellness():
         health_data = {}
         training_data = {}
     
-    if not health_data and not training_data:
+    if not health_data and not training_data and not health_store.get_store_stats():
         return _render_no_data_alert()
     
     # Container principal
@@ -53,27 +60,74 @@ def render_wellness():
         dbc.Col([body_card], md=6)
     ], className="mb-3"))
     
-    # Charts (HRV, Stress, Sleep)
-    hrv_chart = _create_hrv_chart(health_data.get('hrv', {}))
-    stress_chart = _create_stress_chart(health_data.get('stress', {}))
-    sleep_chart = _create_sleep_chart(health_data.get('sleep', {}))
+    # Charts (HRV, Stress, Sleep, FC de repouso) com seletor de intervalo
+    components.append(dbc.Row([
+        dbc.Col([
+            dbc.RadioItems(
+                id='wellness-range',
+                options=[{'label': f'{d} dias', 'value': d} for d in WELLNESS_RANGE_OPTIONS],
+                value=WELLNESS_DEFAULT_RANGE,
+                inline=True,
+                className="text-center"
+            )
+        ], md=12)
+    ], className="mb-2"))
+    components.append(html.Div(
+        render_health_charts(WELLNESS_DEFAULT_RANGE, health_data),
+        id='wellness-charts'
+    ))
     
-    if hrv_chart:
-        components.append(dbc.Row([
-            dbc.Col([dcc.Graph(figure=hrv_chart)], md=12)
-        ], className="mb-3"))
+    return dbc.Container(components, fluid=False)
+
+
+def health_range(days):
+    """Intervalo [início, hoje] dos últimos `days` dias"""
+    end = date.today()
+    return end - timedelta(days=int(days) - 1), end
+
+
+def load_health_series(days, health_data=None):
+    """
+    Lê as séries diárias dos últimos `days` dias do health_store.
+
+    Se o store ainda estiver vazio (instalação anterior ao store), importa o
+    snapshot de health_metrics.json uma única vez.
+    """
+    start, end = health_range(days)
     
-    if stress_chart:
-        components.append(dbc.Row([
-            dbc.Col([dcc.Graph(figure=stress_chart)], md=12)
-        ], className="mb-3"))
+    if not health_store.get_store_stats():
+        if health_data is None:
+            health_data = load_health_metrics() or {}
+        health_store.import_snapshot(health_data)
     
-    if sleep_chart:
-        components.append(dbc.Row([
-            dbc.Col([dcc.Graph(figure=sleep_chart)], md=12)
-        ], className="mb-3"))
+    return {metric: health_store.load_range(metric, start, end) for metric in health_store.HEALTH_SERIES}
+
+
+def render_health_charts(days=WELLNESS_DEFAULT_RANGE, health_data=None):
+    """Renderiza os gráficos de HRV, Stress, Sleep e FC de repouso para o intervalo"""
+    try:
+        series = load_health_series(days, health_data)
+    except Exception as e:
+        logger.error(f"Erro ao carregar séries de saúde: {e}")
+        series = {}
     
-    return dbc.Container(components, fluid=False)
+    start, end = health_range(days)
+    # HRV, FC de repouso e stress (linhas) são reamostrados ao dar zoom
+    charts = [
+        ('hrv', _create_hrv_chart(series.get('hrv', {}))),
+        ('rhr', _create_rhr_chart(series.get('rhr', {}))),
+        ('stress', _create_stress_chart(series.get('stress', {}))),
+        (None, _create_sleep_chart(series.get('sleep', {}))),
+    ]
+    rows = [
+        dbc.Row([dbc.Col([
+            lttb_graph(key, chart, start, end) if key else dcc.Graph(figure=chart)
+        ], md=12)], className="mb-3")
+        for key, chart in charts if chart
+    ]
+    if not rows:
+        return dbc.Alert(f"Sem dados de saúde nos últimos {days} dias", color="light", className="text-center")
+    return rows
 
 
 def _render_no_data_alert():
@@ -281,38 +335,100 @@ def _get_training_status_color(status_type):
     return '#666666'  # Default gray
 
 
+def _hrv_points(hrv_data):
+    """(datas, valores) de HRV por dia"""
+    dates = []
+    values = []
+    
+    # Iterar sobre dados por data
+    if isinstance(hrv_data, dict):
+        for date_str, data in hrv_data.items():
+            if not isinstance(data, dict):
+                continue
+            
+            # Tentar extrair valor HRV
+            hrv_summary = data.get('hrvSummary', {})
+            if isinstance(hrv_summary, dict):
+                value = hrv_summary.get('lastNightAverage') or hrv_summary.get('value')
+                if value:
+                    try:
+                        values.append(float(value))
+                        dates.append(date_str)
+                    except (TypeError, ValueError):
+                        pass
+    return dates, values
+
+
+def _rhr_points(rhr_data):
+    """(datas, valores) de FC de repouso por dia"""
+    dates = []
+    values = []
+    for date_str, data in (rhr_data or {}).items():
+        value = data.get('restingHeartRate') if isinstance(data, dict) else None
+        if value:
+            try:
+                values.append(float(value))
+                dates.append(date_str)
+            except (TypeError, ValueError):
+                pass
+    return dates, values
+
+
+def _stress_points(stress_data):
+    """(datas, stress médio, stress máximo ou None) por dia"""
+    dates = []
+    avg_values = []
+    max_values = []
+    
+    # Iterar sobre dados por data
+    if isinstance(stress_data, dict):
+        for date_str, data in stress_data.items():
+            if not isinstance(data, dict):
+                continue
+            
+            avg = data.get('avgStressLevel')
+            max_val = data.get('maxStressLevel')
+            
+            if avg is not None:
+                try:
+                    avg_values.append(float(avg))
+                    max_values.append(float(max_val) if max_val else None)
+                    dates.append(date_str)
+                except (TypeError, ValueError):
+                    pass
+    return dates, avg_values, max_values
+
+
+def wellness_zoom_traces(chart, start, end, n_points):
+    """
+    Traces (x, y) reamostrados de um gráfico de saúde em [start, end], na
+    ordem dos traces da figura (fonte do zoom em app.py).
+    """
+    if chart == 'hrv':
+        return [downsample_xy(*_hrv_points(health_store.load_range('hrv', start, end)), n_points)]
+    if chart == 'rhr':
+        return [downsample_xy(*_rhr_points(health_store.load_range('rhr', start, end)), n_points)]
+    if chart == 'stress':
+        dates, avg_values, max_values = _stress_points(health_store.load_range('stress', start, end))
+        return [downsample_xy(dates, avg_values, n_points), downsample_xy(dates, max_values, n_points)]
+    return []
+
+
 def _create_hrv_chart(hrv_data):
     """Cria gráfico de HRV"""
     try:
         if not hrv_data or isinstance(hrv_data, list):
             return None
         
-        dates = []
-        values = []
-        
-        # Iterar sobre dados por data
-        if isinstance(hrv_data, dict):
-            for date_str, data in hrv_data.items():
-                if not isinstance(data, dict):
-                    continue
-                
-                # Tentar extrair valor HRV
-                hrv_summary = data.get('hrvSummary', {})
-                if isinstance(hrv_summary, dict):
-                    value = hrv_summary.get('lastNightAverage') or hrv_summary.get('value')
-                    if value:
-                        try:
-                            dates.append(date_str)
-                            values.append(float(value))
-                        except:
-                            pass
-        
+        dates, values = _hrv_points(hrv_data)
         if not dates or not values:
             return None
+        source_points = len(dates)
+        dates, values = downsample_xy(dates, values, target_points())
         
         fig = go.Figure()
-        fig.add_trace(go.Scatter(
-            x=dates, y=values,
+        fig.add_trace(scatter(
+            dates, values, source_points=source_points,
             mode='lines+markers',
             name='HRV',
             line=dict(color='#0066cc', width=2),
@@ -323,6 +439,7 @@ def _create_hrv_chart(hrv_data):
         
         fig.update_layout(
             title='HRV (Variabilidade da Frequência Cardíaca)',
+            uirevision='hrv',
             xaxis_title='Data',
             yaxis_title='HRV (ms)',
             hovermode='x unified',
@@ -335,40 +452,59 @@ def _create_hrv_chart(hrv_data):
         return None
 
 
+def _create_rhr_chart(rhr_data):
+    """Cria gráfico de FC de repouso"""
+    try:
+        if not rhr_data or not isinstance(rhr_data, dict):
+            return None
+        
+        dates, values = _rhr_points(rhr_data)
+        if not dates:
+            return None
+        source_points = len(dates)
+        dates, values = downsample_xy(dates, values, target_points())
+        
+        fig = go.Figure()
+        fig.add_trace(scatter(
+            dates, values, source_points=source_points,
+            mode='lines+markers',
+            name='FC Repouso',
+            line=dict(color='#e83e8c', width=2),
+            marker=dict(size=5)
+        ))
+        
+        fig.update_layout(
+            title='FC de Repouso',
+            uirevision='rhr',
+            xaxis_title='Data',
+            yaxis_title='bpm',
+            hovermode='x unified',
+            template='plotly_white',
+            height=300
+        )
+        return fig
+    except Exception as e:
+        logger.error(f"Erro ao criar gráfico FC de repouso: {e}")
+        return None
+
+
 def _create_stress_chart(stress_data):
     """Cria gráfico de Stress"""
     try:
         if not stress_data or isinstance(stress_data, list):
             return None
         
-        dates = []
-        avg_values = []
-        max_values = []
-        
-        # Iterar sobre dados por data
-        if isinstance(stress_data, dict):
-            for date_str, data in stress_data.items():
-                if not isinstance(data, dict):
-                    continue
-                
-                avg = data.get('avgStressLevel')
-                max_val = data.get('maxStressLevel')
-                
-                if avg is not None:
-                    try:
-                        dates.append(date_str)
-                        avg_values.append(float(avg))
-                        max_values.append(float(max_val) if max_val else None)
-                    except:
-                        pass
-        
+        dates, avg_values, max_values = _stress_points(stress_data)
         if not dates or not avg_values:
             return None
+        source_points = len(dates)
+        avg_dates, avg_values = downsample_xy(dates, avg_values, target_points())
+        max_dates, max_values = downsample_xy(dates, max_values, target_points())
         
         fig = go.Figure()
         
-        fig.add_trace(go.Scatter(
-            x=dates, y=avg_values,
+        fig.add_trace(scatter(
+            avg_dates, avg_values, source_points=source_points,
             mode='lines+markers',
             name='Stress Médio',
             line=dict(color='#ff6b6b', width=2),
@@ -377,17 +513,19 @@ def _create_stress_chart(stress_data):
             fillcolor='rgba(255, 107, 107, 0.1)'
         ))
         
-        if any(v is not None for v in max_values):
-            fig.add_trace(go.Scatter(
-                x=dates, y=max_values,
-                mode='lines',
-                name='Stress Máximo',
-                line=dict(color='#cc0000', width=1, dash='dash'),
-                opacity=0.7
-            ))
+        # Sempre presente (vazio sem máximo) para manter a ordem dos traces no zoom
+        fig.add_trace(scatter(
+            max_dates, max_values, source_points=source_points,
+            mode='lines',
+            name='Stress Máximo',
+            line=dict(color='#cc0000', width=1, dash='dash'),
+            opacity=0.7,
+            showlegend=bool(max_values)
+        ))
         
         fig.update_layout(
             title='Nível de Stress',
+            uirevision='stress',
             xaxis_title='Data',
             yaxis_title='Stress (0-100)',
             hovermode='x unified',
@@ -438,14 +576,14 @@ def _create_sleep_chart(sleep_data):
         
         fig = go.Figure()
         
-        fig.add_trace(go.Bar(
-            x=dates, y=deep_sleep,
+        fig.add_trace(bar(
+            dates, deep_sleep,
             name='Sleep Profundo',
             marker=dict(color='#4c63ff')
         ))
         
-        fig.add_trace(go.Bar(
-            x=dates, y=rem_sleep,
+        fig.add_trace(bar(
+            dates, rem_sleep,
             name='REM',
             marker=dict(color='#00d4ff')
         ))